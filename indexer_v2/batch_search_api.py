@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+배치 검색 API 서버
+- 여러 문장이 섞인 텍스트에서 영어 문장을 추출해 문장별로 자막 검색
+- stream 모드: 문장 하나가 끝날 때마다 NDJSON 한 줄씩 전송
+- GET /metrics: Prometheus 형식 메트릭 (검색 처리량/지연/캐시/풀, 클립 대기열)
+- 표준 라이브러리(http.server)만 사용
+"""
+
+import argparse
+import json
+import sys
+import os
+import sqlite3
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from search_interface import SubtitleSearch, WORD_PATTERN, FACETS
+from search_history import SearchHistory
+from theme_search import ThemeIndex
+from sentence_extractor import SentenceExtractor
+from query_log import QueryLog, DEFAULT_THRESHOLD_MS
+import metrics
+
+DEFAULT_RESULTS_PER_SENTENCE = 5
+MAX_RESULTS_PER_SENTENCE = 50
+DEFAULT_HISTORY_LIMIT = 50
+
+extractor = SentenceExtractor()
+
+
+def extract_english_sentences(text):
+    """텍스트에서 영어 문장만 순서대로 추출"""
+    return extractor.iter_script(text, 'en')
+
+
+def format_result(row, sentence_words):
+    """검색 결과 행을 API 응답 형식으로 변환"""
+    media_file, start_time, end_time, text, directory, subtitle_file, language = row
+    text_words = {w.strip("'") for w in WORD_PATTERN.findall(text.lower())}
+    matched = sum(1 for w in sentence_words if w in text_words)
+    confidence = matched / len(sentence_words) if sentence_words else 0.0
+
+    return {
+        'media_name': Path(media_file).stem,
+        'media_file': media_file,
+        'file_path': subtitle_file,
+        'directory': directory,
+        'subtitle_text': text,
+        'timestamp': start_time.split(',')[0],
+        'start_time': start_time,
+        'end_time': end_time,
+        'language': language,
+        'confidence': round(confidence, 2)
+    }
+
+
+def iter_sentence_results(searcher, sentences, results_per_sentence, **filters):
+    """
+    문장별 검색 결과를 하나씩 생성 (전체 결과를 메모리에 모으지 않음)
+    filters: title / season / facets (패싯을 요청하면 문장마다 facets, facets_capped 포함)
+             / collapse (같은 대사 묶음마다 대표 한 개, 결과마다 duplicate_count 포함)
+    결과마다 linked_media: 내용이 같은 자막 파일을 가진 다른 미디어 (없으면 빈 목록)
+    """
+    for index, sentence in enumerate(sentences, 1):
+        search_result = searcher.search_sentence(sentence, limit=results_per_sentence, **filters)
+        if filters.get('collapse'):
+            results = []
+            for row in search_result['results']:
+                item = format_result(row[:7], search_result['words'])
+                item['duplicate_count'] = row[7]
+                results.append(item)
+        else:
+            results = [format_result(row, search_result['words']) for row in search_result['results']]
+        for item in results:
+            item['linked_media'] = search_result['linked_media'].get(item['file_path'], [])
+        results.sort(key=lambda r: r['confidence'], reverse=True)
+
+        sentence_result = {
+            'sentence_index': index,
+            'search_sentence': sentence,
+            'found_count': len(results),
+            'search_time_ms': round(search_result['search_time_ms'], 3),
+            'results': results
+        }
+        if filters.get('facets'):
+            sentence_result['facets'] = search_result.get('facets', {})
+            sentence_result['facets_capped'] = search_result.get('facets_capped', False)
+        yield sentence_result
+
+
+def build_summary(total_sentences, total_results, elapsed):
+    """search_summary 블록 생성"""
+    average = total_results / total_sentences if total_sentences else 0.0
+    return {
+        'total_sentences': total_sentences,
+        'total_results': total_results,
+        'average_per_sentence': round(average, 1),
+        'search_time': round(elapsed, 3)
+    }
+
+
+class BatchSearchHandler(BaseHTTPRequestHandler):
+    searcher = None
+    history = None
+    themes = None
+
+    def log_message(self, format, *args):
+        # 수집기가 주기적으로 호출하는 /metrics는 로그에서 제외
+        if self.path == '/metrics':
+            return
+        print(f"🌐 {self.address_string()} - {format % args}")
+
+    def send_cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, message, status=400):
+        self.send_json({'success': False, 'error': message}, status)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def wants_stream(self, payload):
+        query = parse_qs(urlparse(self.path).query)
+        if query.get('stream', ['0'])[0] in ('1', 'true'):
+            return True
+        if 'application/x-ndjson' in self.headers.get('Accept', ''):
+            return True
+        return bool(payload.get('stream'))
+
+    def query_int(self, name, default, minimum=1):
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            return max(minimum, int(query.get(name, [default])[0]))
+        except ValueError:
+            return default
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_cors_headers()
+        self.end_headers()
+
+    def do_GET(self):
+        route = urlparse(self.path).path
+
+        if route == '/api/status':
+            db_path = Path(self.searcher.db_path)
+            self.send_json({
+                'status': 'ok',
+                'database': str(db_path),
+                'database_exists': db_path.exists(),
+                'ready': self.searcher.ready.is_set(),
+                'warmup': self.searcher.warmup_report
+            })
+        elif route == '/api/search-history':
+            kind = parse_qs(urlparse(self.path).query).get('kind', [None])[0]
+            self.send_json(self.history.recent(self.query_int('limit', DEFAULT_HISTORY_LIMIT), kind=kind))
+        elif route == '/api/popular-queries':
+            self.send_json(self.history.top_queries(self.query_int('limit', 20)))
+        elif route == '/api/themes':
+            self.send_json(self.themes.list_themes())
+        elif route == '/api/theme-search':
+            self.handle_theme_search()
+        elif route == '/metrics':
+            metrics.send_metrics(self)
+        else:
+            self.send_error_json(f"알 수 없는 경로: {route}", 404)
+
+    def do_POST(self):
+        route = urlparse(self.path).path
+
+        try:
+            payload = self.read_json()
+        except (ValueError, UnicodeDecodeError):
+            self.send_error_json("JSON 본문을 읽을 수 없습니다.")
+            return
+        if not isinstance(payload, dict):
+            self.send_error_json("JSON 본문은 객체여야 합니다.")
+            return
+
+        if route == '/api/extract-sentences':
+            self.handle_extract_sentences(payload)
+        elif route == '/api/batch-search':
+            self.handle_batch_search(payload)
+        elif route == '/api/save-search':
+            self.handle_save_search(payload)
+        else:
+            self.send_error_json(f"알 수 없는 경로: {route}", 404)
+
+    def handle_extract_sentences(self, payload):
+        text = payload.get('text', '')
+        if not isinstance(text, str):
+            self.send_error_json("text는 문자열이어야 합니다.")
+            return
+        sentences = list(extract_english_sentences(text))
+        self.send_json({
+            'success': True,
+            'extracted_sentences': sentences,
+            'sentence_count': len(sentences)
+        })
+
+    def handle_batch_search(self, payload):
+        text = payload.get('text', '')
+        if not isinstance(text, str):
+            self.send_error_json("text는 문자열이어야 합니다.")
+            return
+        if not text.strip():
+            self.send_error_json("검색할 텍스트가 없습니다.")
+            return
+
+        try:
+            per_sentence = int(payload.get('results_per_sentence', DEFAULT_RESULTS_PER_SENTENCE))
+        except (TypeError, ValueError):
+            self.send_error_json("results_per_sentence는 정수여야 합니다.")
+            return
+        per_sentence = max(1, min(per_sentence, MAX_RESULTS_PER_SENTENCE))
+
+        # 작품/시즌 필터 (예: {"title": "Batman The Animated Series", "season": 1})
+        # 패싯 (예: {"facets": ["title", "directory", "language"]}), 같은 대사 묶기 (예: {"collapse": true})
+        filters = {'title': payload.get('title') or None, 'season': payload.get('season'),
+                   'facets': payload.get('facets') or None, 'collapse': bool(payload.get('collapse'))}
+        if filters['season'] is not None:
+            try:
+                filters['season'] = int(filters['season'])
+            except (TypeError, ValueError):
+                self.send_error_json("season은 정수여야 합니다.")
+                return
+        if filters['facets'] is not None:
+            if not isinstance(filters['facets'], list) or any(name not in FACETS for name in filters['facets']):
+                self.send_error_json(f"facets는 {', '.join(FACETS)} 중에서 고른 목록이어야 합니다.")
+                return
+
+        if self.wants_stream(payload):
+            self.stream_batch_search(text, per_sentence, filters)
+            return
+
+        start_time = time.time()
+        sentences = list(extract_english_sentences(text))
+        try:
+            sentence_results = list(self.run_sentences(sentences, per_sentence, filters))
+        except sqlite3.Error as e:
+            # 잘못된 MATCH 구문 등 (스트리밍 경로는 error 줄로 전송)
+            self.send_error_json(f"검색 오류: {e}")
+            return
+        total_results = sum(r['found_count'] for r in sentence_results)
+
+        self.send_json({
+            'success': True,
+            'extracted_sentences': sentences,
+            'search_summary': build_summary(len(sentences), total_results, time.time() - start_time),
+            'sentence_results': sentence_results
+        })
+
+    def handle_theme_search(self):
+        query = parse_qs(urlparse(self.path).query)
+        name = query.get('name', [''])[0]
+        if not name:
+            self.send_error_json("테마 이름(name)이 필요합니다.")
+            return
+
+        language = query.get('language', [None])[0]
+        result = self.themes.open_theme(name, language, self.query_int('limit', 50),
+                                        self.query_int('offset', 0, minimum=0))
+        results = []
+        for row in result['results']:
+            item = format_result(row[:7], [])
+            item['phrase'] = row[7]
+            item['confidence'] = 1.0
+            results.append(item)
+
+        self.send_json({
+            'success': True,
+            'theme': name,
+            'found_count': len(results),
+            'search_time_ms': round(result['search_time_ms'], 3),
+            'results': results
+        })
+
+    def run_sentences(self, sentences, per_sentence, filters):
+        """문장별 검색 실행. 히스토리는 끝날 때(중단돼도) 검색한 문장을 한 트랜잭션으로 기록"""
+        entries = []
+        try:
+            for sentence_result in iter_sentence_results(self.searcher, sentences, per_sentence, **filters):
+                entries.append((sentence_result['search_sentence'], sentence_result['found_count'],
+                                sentence_result['search_time_ms'], None, 'sentence'))
+                yield sentence_result
+        finally:
+            self.history.record_many(entries)
+
+    def handle_save_search(self, payload):
+        sentences = payload.get('sentences')
+        if not isinstance(sentences, list) or not sentences:
+            self.send_error_json("저장할 문장 목록이 없습니다.")
+            return
+
+        try:
+            total_results = int(payload.get('total_results', 0))
+        except (TypeError, ValueError):
+            self.send_error_json("total_results는 정수여야 합니다.")
+            return
+
+        self.history.save_batch([str(s) for s in sentences], total_results)
+        self.send_json({'success': True})
+
+    def stream_batch_search(self, text, per_sentence, filters):
+        """문장별 결과를 NDJSON으로 스트리밍하고 마지막 줄에 요약 전송"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.send_cors_headers()
+        self.end_headers()
+
+        start_time = time.time()
+        total_sentences = 0
+        total_results = 0
+
+        try:
+            for sentence_result in self.run_sentences(extract_english_sentences(text), per_sentence, filters):
+                total_sentences += 1
+                total_results += sentence_result['found_count']
+                self.write_ndjson_line({'type': 'sentence', **sentence_result})
+
+            self.write_ndjson_line({
+                'type': 'summary',
+                'success': True,
+                'search_summary': build_summary(total_sentences, total_results, time.time() - start_time)
+            })
+        except (BrokenPipeError, ConnectionResetError):
+            print("⚠️  클라이언트 연결이 끊겨 스트리밍을 중단합니다.")
+        except Exception as e:
+            self.write_ndjson_line({'type': 'error', 'success': False, 'error': str(e)})
+
+        self.close_connection = True
+
+    def write_ndjson_line(self, payload):
+        line = json.dumps(payload, ensure_ascii=False) + '\n'
+        self.wfile.write(line.encode('utf-8'))
+        self.wfile.flush()
+
+
+def load_warmup_queries(path):
+    """예열 검색어 파일 읽기 ('en:검색어', 'ko:검색어' 형식 지원)"""
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            language = None
+            if line[:3] in ('en:', 'ko:'):
+                language, line = line[:2], line[3:].strip()
+            queries.append(('search', line, language))
+    return queries
+
+
+def start_warmup(searcher, history, args):
+    """인기 검색어 + 설정된 검색어로 백그라운드 예열 시작"""
+    queries = []
+    if args.warmup_top > 0:
+        for item in history.top_queries(args.warmup_top):
+            queries.append((item['kind'], item['query'], item['language']))
+    if args.warmup_queries:
+        queries.extend(load_warmup_queries(args.warmup_queries))
+    if args.warmup_themes:
+        queries.extend(ThemeIndex(args.db).theme_queries())
+
+    if not queries:
+        return None
+
+    print(f"🔥 검색 캐시 예열 시작: {len(queries)}개 검색어 (최대 {args.warmup_seconds:.0f}초)")
+    # 배치 검색과 같은 limit으로 예열해야 캐시가 적중함
+    return searcher.start_warmup(queries, args.warmup_seconds, limit=DEFAULT_RESULTS_PER_SENTENCE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 검색 API 서버")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--db', default='working_subtitles.db', help='자막 데이터베이스 경로')
+    parser.add_argument('--history-db', default='search_history.db', help='검색 히스토리 데이터베이스 경로')
+    parser.add_argument('--warmup-top', type=int, default=50, help='예열할 인기 검색어 개수 (0=예열 안 함)')
+    parser.add_argument('--warmup-seconds', type=float, default=10.0, help='예열 최대 시간(초)')
+    parser.add_argument('--warmup-queries', help='추가 예열 검색어 파일 (한 줄에 하나, 테마 검색어 등)')
+    parser.add_argument('--warmup-themes', action='store_true', help='테마 구문도 예열')
+    parser.add_argument('--warmup-wait', action='store_true', help='예열이 끝난 뒤 요청 받기 시작')
+    parser.add_argument('--query-log', help='쿼리 계측/느린 쿼리 로그 DB 경로 (없으면 기록 안 함)')
+    parser.add_argument('--slow-ms', type=float, default=DEFAULT_THRESHOLD_MS, help='느린 쿼리 기준(ms)')
+    parser.add_argument('--clip-db', help='clip_requests 테이블이 있는 DB (기본: --db), /metrics 클립 대기열용')
+    args = parser.parse_args()
+
+    query_log = QueryLog(args.query_log, threshold_ms=args.slow_ms) if args.query_log else None
+    BatchSearchHandler.searcher = SubtitleSearch(args.db, query_log=query_log)
+    BatchSearchHandler.history = SearchHistory(args.history_db)
+    BatchSearchHandler.themes = ThemeIndex(args.db)
+    metrics.REGISTRY.add_collector(metrics.clip_queue_collector(args.clip_db or args.db))
+
+    start_warmup(BatchSearchHandler.searcher, BatchSearchHandler.history, args)
+    if args.warmup_wait:
+        BatchSearchHandler.searcher.ready.wait(args.warmup_seconds + 1)
+    server = ThreadingHTTPServer((args.host, args.port), BatchSearchHandler)
+
+    print(f"🚀 배치 검색 API 서버 시작: http://{args.host}:{args.port}")
+    print(f"💾 데이터베이스: {args.db}")
+    print(f"📈 메트릭: http://{args.host}:{args.port}/metrics")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 서버를 종료합니다.")
+    finally:
+        server.server_close()
+        if query_log:
+            query_log.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+중복 자막 묶음(near_duplicates) / collapse 검색 벤치마크
+- 반복 대사를 섞은 합성 코퍼스(corpus.py, repeat_ratio)로
+  · 묶음 계산 속도: 파일 단위 assign_clusters (빈 DB에서 코퍼스 전체, 서명 캐시 비운 상태)
+  · 묶음 품질: 묶음 수, 큰 묶음, 첫 자막과 실제 단어 자카드 유사도가 0.5 미만인 구성원 비율 (잘못 묶임)
+  · 검색: 일반 검색 vs collapse 검색의 지연, 결과 행 수 / 그중 서로 다른 대사 수
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus
+from search_interface import SubtitleSearch
+import near_duplicates
+
+MISMERGE_SIMILARITY = 0.5
+
+
+def measure_assignment(corpus):
+    """코퍼스 전체를 파일 단위로 묶음 계산 → (초, 자막 수)"""
+    near_duplicates.signature.cache_clear()
+    near_duplicates.shingle_hashes.cache_clear()
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE subtitles (id INTEGER PRIMARY KEY, text TEXT)")
+    near_duplicates.create(cursor)
+    files = [[text for _, _, text in cues] for _, _, _, _, cues in corpus.iter_files()]
+    start = time.perf_counter()
+    for texts in files:
+        near_duplicates.assign_clusters(cursor, texts)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, sum(len(texts) for texts in files)
+
+
+def cluster_quality(db_path):
+    """(자막 수, 묶음 수, 큰 묶음 [(크기, 첫 자막)], 잘못 묶인 구성원 비율)"""
+    conn = sqlite3.connect(db_path)
+    total, clusters = conn.execute("SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM subtitles").fetchone()
+    largest = conn.execute("""
+        SELECT COUNT(*), MIN(id) FROM subtitles GROUP BY cluster_id ORDER BY COUNT(*) DESC LIMIT 3
+    """).fetchall()
+    largest = [(size, conn.execute("SELECT text FROM subtitles WHERE id = ?", (first,)).fetchone()[0])
+               for size, first in largest]
+
+    first_shingles, members, mismerged = {}, 0, 0
+    for cluster_id, text in conn.execute("""
+        SELECT cluster_id, text FROM subtitles
+        WHERE cluster_id IN (SELECT cluster_id FROM subtitles GROUP BY cluster_id HAVING COUNT(*) > 1)
+        ORDER BY id
+    """):
+        current = near_duplicates.shingles(near_duplicates.normalize(text))
+        first = first_shingles.setdefault(cluster_id, current)
+        if first is current:
+            continue
+        members += 1
+        if len(first & current) / len(first | current) < MISMERGE_SIMILARITY:
+            mismerged += 1
+    conn.close()
+    return total, clusters, largest, mismerged / members if members else 0.0
+
+
+def search_comparison(searcher, queries, limit, repeat):
+    """검색 방식(일반, collapse)별 (ms, 결과 행 수, 서로 다른 대사 수) - 검색어별 중앙값"""
+    summary = []
+    for collapse in (False, True):
+        rows = []
+        for query in queries:
+            best = None
+            for _ in range(repeat):
+                result = searcher.search(query, limit=limit, collapse=collapse)
+                best = result['search_time_ms'] if best is None else min(best, result['search_time_ms'])
+            distinct = len({near_duplicates.normalize(r[3]) for r in result['results']})
+            rows.append((best, result['count'], distinct))
+        summary.append([statistics.median(values) for values in zip(*rows)])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="중복 자막 묶음 / collapse 검색 벤치마크")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat-ratio', type=float, default=0.3)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workdir', help="코퍼스 DB 보관 디렉토리 (설정이 같으면 재사용)")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed, repeat_ratio=args.repeat_ratio)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        db_path = os.path.join(workdir, f"corpus_{corpus.cues}_{corpus.seed}_repeat{args.repeat_ratio}.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not corpus.matches_db(db_path):
+                corpus.build_db(db_path)
+
+        elapsed, cues = measure_assignment(corpus)
+        print(f"📦 코퍼스: 자막 {cues:,}개, 반복 대사 비율 {args.repeat_ratio:.0%}")
+        print(f"🧬 묶음 계산: {elapsed:.2f}초 ({cues / elapsed:,.0f} 자막/초, {elapsed / cues * 1e6:.1f}µs/자막)")
+
+        total, clusters, largest, mismerged = cluster_quality(db_path)
+        print(f"   묶음 {clusters:,}개 (자막의 {clusters / total:.1%}), 잘못 묶인 구성원 {mismerged:.3%}")
+        for size, text in largest:
+            print(f"   {size:6,}개  {text}")
+
+        searcher = SubtitleSearch(db_path, cache_size=0)
+        categories = {
+            'repeat_line': [f'"{near_duplicates.normalize(line)}"' for line in corpus.repeat_lines['en'][:6]],
+            'stopword': ['the', 'you', 'what', 'know'],
+            'rare_term': corpus.rare_terms(6),
+        }
+        print("-" * 78)
+        print(f"{'분류':12s}{'일반':>10s}{'collapse':>12s}   결과 행 (서로 다른 대사), limit {args.limit}")
+        for category, queries in categories.items():
+            (normal, normal_rows, normal_distinct), (collapsed, collapsed_rows, collapsed_distinct) = \
+                search_comparison(searcher, queries, args.limit, args.repeat)
+            print(f"{category:12s}{normal:8.2f}ms{collapsed:10.2f}ms"
+                  f"   {normal_rows:.0f}행 ({normal_distinct:.0f}) → {collapsed_rows:.0f}행 ({collapsed_distinct:.0f})")
+        searcher.close()
+
+
+if __name__ == "__main__":
+    main()
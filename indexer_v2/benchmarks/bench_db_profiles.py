@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+db_access 프로필 벤치마크
+- 적재: 자막 파일 단위 트랜잭션(FTS 트리거 포함)으로 같은 합성 자막을 SQLite 기본값 / write / bulk-load 연결로 저장
+- 검색: FTS 검색 반복을 기본값 / serve 연결로 실행
+- 유지보수: FTS rebuild + optimize를 기본값 / maintenance 연결로 실행
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from working_indexer import WorkingIndexer
+import db_access
+import fts_schema
+
+EN_WORDS = ("the a you I we it that this what is was are be have do know get go right just like think want "
+            "come time look well okay yeah people money house night morning dinner sorry thanks meeting").split()
+KO_WORDS = "그래 정말 미안해 고마워 지금 우리 회의 사랑해 내일 오늘 어디 가자 괜찮아 알았어".split()
+QUERIES = ['money', 'meet*', '"thank you"', '미안*', 'dinner OR morning']
+CUES_PER_FILE = 400
+
+
+def make_files(cue_count, seed=7):
+    """자막 파일 단위로 묶은 합성 행"""
+    rng = random.Random(seed)
+    files = []
+    for start in range(0, cue_count, CUES_PER_FILE):
+        episode = start // CUES_PER_FILE
+        media = f"/mnt/qnap/media_eng/Drama/Show{episode // 50}/E{episode:04d}.mkv"
+        rows = []
+        for i in range(start, min(start + CUES_PER_FILE, cue_count)):
+            ko = i % 3 == 0
+            words = KO_WORDS if ko else EN_WORDS
+            text = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 10)))
+            rows.append((media, media[:-4] + ('_ko.srt' if ko else '.srt'), '00:00:01,000', '00:00:02,000',
+                         1000, 2000, text, 'ko' if ko else 'en', '/mnt/qnap/media_eng/Drama'))
+        files.append(rows)
+    return files
+
+
+def plain_connect(db_path):
+    """SQLite 기본 설정 (프로필 도입 전)"""
+    return sqlite3.connect(db_path)
+
+
+def load(db_path, files, connect):
+    """파일마다 연결 → 트랜잭션 → 닫기 (WorkingIndexer.save_subtitles와 같은 패턴). 소요 시간(초)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        WorkingIndexer(db_path, fts_layout='compact')
+    # 인덱서 생성 시 설정된 WAL을 되돌려 기본값 비교가 되도록 함
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+    start = time.perf_counter()
+    for rows in files:
+        conn = connect(db_path)
+        with conn:
+            conn.executemany("""
+                INSERT INTO subtitles (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms,
+                                       text, language, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        conn.close()
+    return time.perf_counter() - start
+
+
+def search(db_path, connect, repeat, reuse=True):
+    """
+    검색 1회 지연 중앙값(ms)
+    reuse=False면 검색마다 새 연결 (video_player처럼 매번 연결하는 경우, 연결 비용 포함)
+    """
+    target = fts_schema.match_column('compact', 'fts')
+    conn = connect(db_path) if reuse else None
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            current = conn or connect(db_path)
+            current.execute(f"""
+                SELECT s.media_file, s.text FROM subtitles_fts fts JOIN subtitles s ON s.id = fts.rowid
+                WHERE {target} MATCH ? ORDER BY rank LIMIT 50
+            """, (query,)).fetchall()
+            if not reuse:
+                current.close()
+            timings.append((time.perf_counter() - start) * 1000)
+    if conn:
+        conn.close()
+    return statistics.median(timings)
+
+
+def maintain(db_path, connect):
+    """FTS rebuild + optimize 소요 시간(초)"""
+    conn = connect(db_path)
+    start = time.perf_counter()
+    with conn:
+        fts_schema.rebuild(conn.cursor())
+        conn.execute(f"INSERT INTO {fts_schema.FTS_TABLE}({fts_schema.FTS_TABLE}) VALUES('optimize')")
+    conn.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="db_access 프로필 벤치마크")
+    parser.add_argument('--cues', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    files = make_files(args.cues)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\n📊 자막 {args.cues:,}개 ({len(files):,}개 파일)")
+        print("-" * 50)
+
+        print("📥 적재 (파일 단위 트랜잭션):")
+        loaders = {
+            '기본값': plain_connect,
+            'write': lambda path: db_access.connect(path, 'write'),
+            'bulk-load': lambda path: db_access.connect(path, 'bulk-load'),
+        }
+        for name, connect in loaders.items():
+            elapsed = load(os.path.join(tmp, f'load_{name}.db'), files, connect)
+            print(f"   {name:12s}{elapsed:8.2f}초 ({args.cues / elapsed:,.0f} 자막/초)")
+
+        db_path = os.path.join(tmp, 'load_write.db')
+        print("🔍 검색 (중앙값, 연결 재사용 / 검색마다 새 연결):")
+        for name, connect in (('기본값', plain_connect), ('serve', lambda path: db_access.connect(path, 'serve'))):
+            pooled_ms = search(db_path, connect, args.repeat)
+            fresh_ms = search(db_path, connect, args.repeat, reuse=False)
+            print(f"   {name:12s}{pooled_ms:8.2f}ms{fresh_ms:10.2f}ms")
+
+        print("🔧 FTS rebuild + optimize (3회 번갈아 측정, 중앙값):")
+        maintainers = {'기본값': plain_connect, 'maintenance': lambda path: db_access.connect(path, 'maintenance')}
+        timings = {name: [] for name in maintainers}
+        for _ in range(3):
+            for name, connect in maintainers.items():
+                timings[name].append(maintain(db_path, connect))
+        for name, values in timings.items():
+            print(f"   {name:12s}{statistics.median(values):8.2f}초")
+
+
+if __name__ == "__main__":
+    main()
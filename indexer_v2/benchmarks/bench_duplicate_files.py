@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+같은 내용 자막 파일 연결(duplicate_subtitles) 벤치마크
+- 합성 코퍼스(corpus.py) SRT 트리를 만들고, 자막 파일 일부(--copy-ratio)를 미디어와 함께
+  다른 카테고리(Disney)에 같은 경로로 복사 (같은 영화가 Movie와 Disney에 있는 경우)
+- 같은 트리를 새 DB에 두 번 인덱싱: 연결 끔(dedupe_files=False, 기존 방식) vs 연결 켬
+- 인덱싱 시간, DB 크기, 저장한 자막 행 수, 연결한 파일 수 비교
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus, CATEGORIES
+
+COPY_CATEGORY = "Disney"
+
+
+def build_tree(corpus, root, copy_ratio, seed):
+    """SRT 트리 생성 후 자막 파일 일부를 COPY_CATEGORY로 복사. (원본 자막 파일 수, 복사한 파일 수)"""
+    _, subtitle_files = corpus.write_srt_tree(root)
+    rng = random.Random(seed)
+    copied = 0
+    for category in CATEGORIES:
+        for srt in sorted((Path(root) / category).rglob('*.srt')):
+            if rng.random() >= copy_ratio:
+                continue
+            target = Path(root) / COPY_CATEGORY / srt.relative_to(root)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(srt, target)
+            media = target.with_name(target.stem.removesuffix('_ko') + '.mkv')
+            media.touch()
+            copied += 1
+    return subtitle_files, copied
+
+
+def db_size(db_path):
+    """WAL 체크포인트 후 DB 파일 크기 (바이트)"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return sum(os.path.getsize(path) for path in (db_path, db_path + '-wal') if os.path.exists(path))
+
+
+def run_index(root, db_path, dedupe):
+    """트리 전체 인덱싱 → (초, DB 바이트, 자막 행 수, 연결한 파일 수)"""
+    from working_indexer import WorkingIndexer
+    import duplicate_subtitles
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        indexer = WorkingIndexer(db_path)
+        indexer.media_root = Path(root)
+        indexer.dedupe_files = dedupe
+        start = time.perf_counter()
+        for category in CATEGORIES + [COPY_CATEGORY]:
+            indexer.index_directory(Path(root) / category)
+        elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT COUNT(*) FROM subtitles").fetchone()[0]
+    linked, _ = duplicate_subtitles.savings(conn.cursor())
+    conn.close()
+    return elapsed, db_size(db_path), rows, linked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="같은 내용 자막 파일 연결 벤치마크")
+    parser.add_argument('--cues', type=int, default=40000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--copy-ratio', type=float, default=0.3, help="다른 카테고리에도 있는 자막 파일 비율")
+    parser.add_argument('--workdir', help="작업 디렉토리 (기본: 임시 디렉토리)")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.workdir or tmp)
+        root = workdir / 'media'
+        if root.exists():
+            shutil.rmtree(root)
+        subtitle_files, copied = build_tree(corpus, root, args.copy_ratio, args.seed)
+        print(f"📄 자막 파일 {subtitle_files:,}개 + 다른 카테고리 사본 {copied:,}개 (자막 {args.cues:,}개)")
+        print("-" * 78)
+
+        results = {}
+        for name, dedupe in (("기존 방식 (모두 파싱/저장)", False), ("같은 내용 연결", True)):
+            db_path = str(workdir / f"dedupe_{int(dedupe)}.db")
+            for path in (db_path, db_path + '-wal', db_path + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
+            results[dedupe] = run_index(root, db_path, dedupe)
+            elapsed, size, rows, linked = results[dedupe]
+            print(f"{name:28s}{elapsed:8.2f}초  DB {size / (1024 * 1024):7.2f} MB  "
+                  f"자막 행 {rows:9,}개  연결 {linked:,}개")
+
+        (base_time, base_size, base_rows, _), (time_, size, rows, _) = results[False], results[True]
+        print("-" * 78)
+        print(f"📉 절감: 인덱싱 시간 {1 - time_ / base_time:.1%}, DB 크기 {1 - size / base_size:.1%}, "
+              f"자막 행 {1 - rows / base_rows:.1%} (사본 비율 {copied / (subtitle_files + copied):.1%})")
+
+
+if __name__ == "__main__":
+    main()
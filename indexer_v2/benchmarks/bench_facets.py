@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+패싯 개수 계산 벤치마크
+- 합성 코퍼스(corpus.py) DB에서 검색어 분류(희귀어 / 불용어 / 구문)별로 비교
+  · 패싯마다 GROUP BY 쿼리 (FTS 조인을 패싯 수만큼 반복)
+  · SubtitleSearch.execute_facets 한 번 (상한 없음 / 기본 상한 FACET_SCAN_LIMIT)
+- 상한 없는 한 번 계산이 패싯별 쿼리와 같은 개수를 내는지 확인
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus, EN_PHRASES
+from search_interface import SubtitleSearch, FACETS, FACET_SCAN_LIMIT
+
+FACET_NAMES = ('title', 'directory', 'language')
+
+
+def separate_facets(searcher, conn, query):
+    """패싯마다 GROUP BY 쿼리 한 번씩 (기존 방식)"""
+    table, where, params = searcher.match_source(conn, query, None)
+    counts = {}
+    for name in FACET_NAMES:
+        rows = conn.execute(f"""
+            SELECT {FACETS[name]}, COUNT(*)
+            FROM {table} fts
+            JOIN subtitles s ON s.id = fts.rowid
+            WHERE {where}
+            GROUP BY 1
+        """, params).fetchall()
+        values = {}
+        for value, count in rows:
+            value = Path(value).name if name == 'directory' and value else value
+            values[value] = values.get(value, 0) + count
+        counts[name] = sorted(([value, count] for value, count in values.items()),
+                              key=lambda item: (-item[1], str(item[0])))
+    return counts
+
+
+def measure(func, queries, repeat):
+    """검색어별 최소 시간(ms)의 중앙값"""
+    timings = []
+    for query in queries:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(query)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="패싯 개수 계산 벤치마크")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workdir', help="코퍼스 DB 보관 디렉토리 (설정이 같으면 재사용)")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        db_path = os.path.join(workdir, f"corpus_{corpus.cues}_{corpus.seed}_standard.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not corpus.matches_db(db_path):
+                corpus.build_db(db_path)
+            # 예전에 만든 코퍼스 DB면 title 컬럼 추가
+            from working_indexer import WorkingIndexer
+            WorkingIndexer(db_path)
+
+        searcher = SubtitleSearch(db_path, cache_size=0)
+        categories = {
+            'rare_term': corpus.rare_terms(6),
+            'stopword': ['the', 'you', 'what', 'know'],
+            'phrase': [f'"{phrase}"' for phrase in EN_PHRASES[:4]],
+        }
+
+        print(f"📦 코퍼스: 자막 {args.cues:,}개, 패싯: {', '.join(FACET_NAMES)} (상한 {FACET_SCAN_LIMIT:,}행)")
+        print("-" * 78)
+        print(f"{'분류':12s}{'패싯별 쿼리':>14s}{'한 번(상한 없음)':>18s}{'한 번(상한)':>14s}{'일치':>8s}")
+        with searcher.connection() as pooled:
+            conn = pooled.conn
+            for category, queries in categories.items():
+                separate = measure(lambda q: separate_facets(searcher, conn, q), queries, args.repeat)
+                single = measure(lambda q: searcher.execute_facets(conn, q, None, FACET_NAMES, cap=2 ** 62),
+                                 queries, args.repeat)
+                capped = measure(lambda q: searcher.execute_facets(conn, q, None, FACET_NAMES),
+                                 queries, args.repeat)
+                same = all(separate_facets(searcher, conn, q) ==
+                           searcher.execute_facets(conn, q, None, FACET_NAMES, cap=2 ** 62)[0] for q in queries)
+                print(f"{category:12s}{separate:12.2f}ms{single:16.2f}ms{capped:12.2f}ms{'✅' if same else '❌':>7s}")
+        searcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+FTS 레이아웃 벤치마크
+- 같은 합성 자막(실제와 비슷한 긴 NAS 경로 포함)으로 standard / compact / minimal 레이아웃 DB를 만들어
+  DB 크기, FTS 인덱스 크기, 검색 지연(전체/언어 필터/접두사/구문) 비교
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from working_indexer import WorkingIndexer
+import fts_schema
+
+EN_WORDS = ("the a you I we it that this what is was are be have do know get go right just like think want "
+            "come time look well okay yeah people money house night morning dinner sorry thanks meeting").split()
+KO_WORDS = "그래 정말 미안해 고마워 지금 우리 회의 사랑해 내일 오늘 어디 가자 괜찮아 알았어".split()
+SHOWS = ["Batman The Animated Series", "Friends", "The Office US", "Breaking Bad", "Stranger Things"]
+
+QUERIES = [
+    ('단어', 'money', None),
+    ('단어 + 언어 필터', 'money', 'en'),
+    ('OR 문장 검색', '"dinner" OR "morning" OR "money"', None),
+    ('접두사', 'meet*', None),
+    ('한글 접두사', '미안*', 'ko'),
+    ('구문', '"thank you"', None),
+]
+
+
+def build(db_path, layout, cue_count, seed=11):
+    rng = random.Random(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        indexer = WorkingIndexer(db_path, fts_layout=layout)
+        with indexer.bulk_load():
+            conn = sqlite3.connect(db_path)
+            rows = []
+            for i in range(cue_count):
+                show = SHOWS[(i // 20000) % len(SHOWS)]
+                episode = i // 400
+                ko = i % 3 == 0
+                words = KO_WORDS if ko else EN_WORDS
+                text = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 10)))
+                directory = f"/mnt/qnap/media_eng/Drama/{show}"
+                media = f"{directory}/Season {episode // 20 + 1}/{show} - S{episode // 20 + 1:02d}E{episode % 20 + 1:02d} - 1080p WEB-DL.mkv"
+                subtitle = media[:-4] + ('_ko.srt' if ko else '.srt')
+                rows.append((media, subtitle, '00:00:01,000', '00:00:02,000', 1000, 2000,
+                             text, 'ko' if ko else 'en', directory))
+            conn.executemany("""
+                INSERT INTO subtitles (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms,
+                                       text, language, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+            conn.close()
+        indexer.fts.optimize()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def run_query(conn, layout, query, language):
+    """검색 1회 실행 시간(ms)"""
+    target = fts_schema.match_column(layout, 'fts')
+    start = time.perf_counter()
+    if language:
+        conn.execute(f"""
+            SELECT s.media_file, s.text FROM subtitles_fts fts JOIN subtitles s ON s.id = fts.rowid
+            WHERE {target} MATCH ? AND s.language = ? ORDER BY rank LIMIT 20
+        """, (query, language)).fetchall()
+    else:
+        conn.execute(f"""
+            SELECT s.media_file, s.text FROM subtitles_fts fts JOIN subtitles s ON s.id = fts.rowid
+            WHERE {target} MATCH ? ORDER BY rank LIMIT 20
+        """, (query,)).fetchall()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS 레이아웃 벤치마크")
+    parser.add_argument('--cues', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        conns = {}
+        for layout in fts_schema.FTS_LAYOUTS:
+            db_path = os.path.join(tmp, f'{layout}.db')
+            build(db_path, layout, args.cues)
+            conns[layout] = sqlite3.connect(db_path)
+            index_bytes = conns[layout].execute("SELECT SUM(length(block)) FROM subtitles_fts_data").fetchone()[0]
+            results[layout] = (os.path.getsize(db_path), index_bytes, {})
+
+        # 레이아웃을 번갈아 측정해서 측정 순서에 따른 편차를 줄임
+        for name, query, language in QUERIES:
+            timings = {layout: [] for layout in conns}
+            for _ in range(args.repeat):
+                for layout, conn in conns.items():
+                    if timings[layout] is None:
+                        continue
+                    try:
+                        timings[layout].append(run_query(conn, layout, query, language))
+                    except sqlite3.OperationalError:
+                        timings[layout] = None
+            for layout in conns:
+                results[layout][2][name] = statistics.median(timings[layout]) if timings[layout] else None
+
+        for conn in conns.values():
+            conn.close()
+
+    print(f"\n📊 자막 {args.cues:,}개")
+    print("-" * 70)
+    print(f"{'':18s}" + ''.join(f"{layout:>16s}" for layout in results))
+    print(f"{'DB 크기':16s}" + ''.join(f"{size / (1024 * 1024):14.1f}MB" for size, _, _ in results.values()))
+    print(f"{'FTS 인덱스':15s}" + ''.join(f"{index / (1024 * 1024):14.1f}MB" for _, index, _ in results.values()))
+    for name, _, _ in QUERIES:
+        cells = []
+        for _, _, latencies in results.values():
+            cells.append(f"{latencies[name]:14.2f}ms" if latencies[name] is not None else f"{'지원 안 함':>11s}")
+        print(f"{name:14s}" + ''.join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+FTS 세그먼트 병합 벤치마크
+- 자막 파일 단위 교체(감시 모드의 증분 갱신)를 반복하면서 세그먼트 수와 검색 지연 변화를 측정
+- 유지보수 없음 / 주기적 merge_idle / 배치 후 optimize 비교
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from working_indexer import WorkingIndexer
+
+WORDS = ("the a you I we it that this what is was are be have do know get go right just like think want "
+         "come time look well okay yeah people money house night morning dinner sorry thanks").split()
+QUERIES = ['money', '"thank you"', 'dinner OR morning', 'sorry', 'house night']
+
+
+def make_cues(rng, count):
+    cues = []
+    for i in range(count):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+        cues.append({'start_time': f"00:00:{i % 60:02d},000", 'end_time': f"00:00:{i % 60:02d},500",
+                     'text': text, 'language': 'en'})
+    return cues
+
+
+def query_latency(db_path, repeat=20):
+    conn = sqlite3.connect(db_path)
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            conn.execute("""
+                SELECT s.id FROM subtitles_fts f JOIN subtitles s ON s.id = f.rowid
+                WHERE f.text MATCH ? ORDER BY rank LIMIT 20
+            """, (query,)).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    return statistics.median(timings)
+
+
+def run(mode, files, cues_per_file, rounds, merge_every, seed=3):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench_fts.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            indexer = WorkingIndexer(db_path)
+            for f in range(files):
+                indexer.save_subtitles(f"/m/{f}.mkv", f"/m/{f}.srt", make_cues(rng, cues_per_file),
+                                       "/m", (0, 0))
+            indexer.fts.optimize()
+
+            samples = []
+            for r in range(1, rounds + 1):
+                # 파일 하나 교체 = 트랜잭션 하나 = 새 세그먼트
+                f = rng.randrange(files)
+                indexer.save_subtitles(f"/m/{f}.mkv", f"/m/{f}.srt", make_cues(rng, cues_per_file),
+                                       "/m", (r, r))
+                if mode == 'merge' and r % merge_every == 0:
+                    indexer.fts.merge_idle(time_budget=0.5)
+                elif mode == 'optimize' and r % merge_every == 0:
+                    indexer.fts.optimize()
+                if r % (rounds // 4) == 0:
+                    samples.append((r, indexer.fts.segment_stats()['segments'], query_latency(db_path)))
+        size = os.path.getsize(db_path)
+    return samples, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS 세그먼트 병합 벤치마크")
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--cues', type=int, default=300, help='파일당 자막 수')
+    parser.add_argument('--rounds', type=int, default=800, help='파일 교체 횟수')
+    parser.add_argument('--merge-every', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"📊 자막 {args.files * args.cues:,}개, 파일 교체 {args.rounds}회")
+    print("-" * 70)
+    for mode, title in (('none', '유지보수 없음 (automerge만)'),
+                        ('merge', f'merge_idle ({args.merge_every}회마다)'),
+                        ('optimize', f'optimize ({args.merge_every}회마다)')):
+        samples, size = run(mode, args.files, args.cues, args.rounds, args.merge_every)
+        trace = '  '.join(f"{r}회: {segments}seg/{latency:.2f}ms" for r, segments, latency in samples)
+        print(f"{title:28s} {trace}  DB {size / (1024 * 1024):.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
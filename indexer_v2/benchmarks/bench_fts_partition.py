@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+언어별 FTS 테이블 벤치마크
+- compact(단일 FTS + s.language 필터)와 partitioned(언어별 FTS 테이블 라우팅)의 언어 필터 검색 지연 비교
+- 한글 자막 일부에 영어 단어(TV, OK 등)가 섞인 합성 자막 사용 → 다른 언어에서 흔한 단어를 필터 검색할 때 차이가 큼
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_interface import SubtitleSearch
+from working_indexer import WorkingIndexer
+
+EN_WORDS = ("the a you I we it that this what is was are be have do know get go right just like think want "
+            "come time look well okay yeah people money house night morning dinner sorry thanks meeting").split()
+KO_WORDS = "그래 정말 미안해 고마워 지금 우리 회의 사랑해 내일 오늘 어디 가자 괜찮아 알았어".split()
+MIXED_WORDS = "TV OK CEO the okay".split()
+
+QUERIES = [
+    ('영어 흔한 단어 → ko', 'the', 'ko'),
+    ('영어 흔한 단어 → en', 'the', 'en'),
+    ('한글 접두사 → ko', '미안*', 'ko'),
+    ('한글 접두사 → en', '미안*', 'en'),
+    ('문장 OR → ko', '"okay" OR "tv" OR "ceo"', 'ko'),
+    ('문장 OR → en', '"dinner" OR "money"', 'en'),
+    ('필터 없음', 'money', None),
+]
+
+
+def build(db_path, layout, cue_count, seed=5):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(cue_count):
+        ko = i % 3 == 0
+        if ko:
+            words = [rng.choice(KO_WORDS) for _ in range(rng.randint(3, 8))]
+            if rng.random() < 0.3:
+                words.insert(rng.randrange(len(words)), rng.choice(MIXED_WORDS))
+        else:
+            words = [rng.choice(EN_WORDS) for _ in range(rng.randint(3, 10))]
+        media = f"/media/Drama/Show{i // 20000}/E{i // 400:04d}.mkv"
+        rows.append((media, media[:-4] + ('_ko.srt' if ko else '.srt'), '00:00:01,000', '00:00:02,000',
+                     1000, 2000, ' '.join(words), 'ko' if ko else 'en', '/media/Drama'))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        indexer = WorkingIndexer(db_path, fts_layout=layout)
+        with indexer.bulk_load():
+            conn = sqlite3.connect(db_path)
+            conn.executemany("""
+                INSERT INTO subtitles (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms,
+                                       text, language, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+            conn.close()
+        indexer.fts.optimize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="언어별 FTS 테이블 벤치마크")
+    parser.add_argument('--cues', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    layouts = ('compact', 'partitioned')
+    with tempfile.TemporaryDirectory() as tmp:
+        searchers = {}
+        for layout in layouts:
+            db_path = os.path.join(tmp, f'{layout}.db')
+            build(db_path, layout, args.cues)
+            # 결과 캐시 없이 매번 실행
+            searchers[layout] = SubtitleSearch(db_path, cache_size=0)
+
+        print(f"\n📊 자막 {args.cues:,}개 (영어 2/3, 한글 1/3)")
+        print("-" * 70)
+        print(f"{'':24s}{'compact':>12s}{'partitioned':>14s}{'배율':>8s}")
+        for name, query, language in QUERIES:
+            timings = {layout: [] for layout in layouts}
+            counts = {}
+            for _ in range(args.repeat):
+                # 레이아웃을 번갈아 측정
+                for layout in layouts:
+                    result = searchers[layout].search(query, language, limit=20)
+                    timings[layout].append(result['search_time_ms'])
+                    counts[layout] = result['count']
+            compact_ms = statistics.median(timings['compact'])
+            partitioned_ms = statistics.median(timings['partitioned'])
+            assert counts['compact'] == counts['partitioned']
+            print(f"{name:22s}{compact_ms:10.2f}ms{partitioned_ms:12.2f}ms{compact_ms / partitioned_ms:7.1f}x")
+
+        for searcher in searchers.values():
+            searcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+인덱싱 처리량 벤치마크 (단계별 분석)
+- 합성 코퍼스(corpus.py)를 SRT 파일 트리로 만들고 WorkingIndexer로 전체 인덱싱
+- 증분 모드(FTS 트리거)와 bulk 모드(적재 후 rebuild) 각각의 단계별 시간/처리량(index_profiler.StageTimer)을 JSON으로 출력
+- --profile cprofile|pyinstrument: 디렉토리 인덱싱을 프로파일러로 감싸서 실행
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus
+
+
+def index_corpus(db_path, media_root, bulk, profile=None, profile_output=None):
+    """media_root 전체 인덱싱. (경과 시간, 단계별 보고서)"""
+    # 인덱서 모듈은 import 시 배너를 출력하므로 JSON 출력과 섞이지 않게 여기서 import
+    with contextlib.redirect_stdout(io.StringIO()):
+        from working_indexer import WorkingIndexer
+        indexer = WorkingIndexer(db_path)
+    indexer.media_root = media_root
+    indexer.profile = profile
+    indexer.profile_output = profile_output
+    categories = sorted(path for path in media_root.iterdir() if path.is_dir())
+
+    start = time.perf_counter()
+    # 프로파일러 출력은 화면에 보이도록 인덱서 출력만 숨김
+    quiet = contextlib.redirect_stdout(io.StringIO()) if profile is None else contextlib.nullcontext()
+    with quiet:
+        with (indexer.bulk_load() if bulk else contextlib.nullcontext()):
+            for category in categories:
+                indexer.index_directory(category)
+    return time.perf_counter() - start, indexer.timer.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인덱싱 처리량 벤치마크")
+    parser.add_argument('--cues', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mode', choices=['incremental', 'bulk', 'both'], default='both')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'])
+    parser.add_argument('--profile-output')
+    parser.add_argument('--output', help="결과 JSON 저장 경로 (없으면 화면에 출력)")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed)
+    modes = ['incremental', 'bulk'] if args.mode == 'both' else [args.mode]
+    report = {'corpus': corpus.params(), 'results': {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        media_root = Path(tmp) / 'media'
+        media_count, subtitle_count = corpus.write_srt_tree(media_root)
+        report['corpus'].update(media_files=media_count, subtitle_files=subtitle_count)
+        print(f"📦 SRT 코퍼스: 미디어 {media_count:,}개, 자막 파일 {subtitle_count:,}개, 자막 {args.cues:,}개",
+              file=sys.stderr)
+
+        for mode in modes:
+            elapsed, stages = index_corpus(os.path.join(tmp, f'{mode}.db'), media_root, mode == 'bulk',
+                                           args.profile, args.profile_output)
+            report['results'][mode] = dict(stages, wall_seconds=round(elapsed, 3),
+                                           cues_per_second=round(args.cues / elapsed, 1),
+                                           files_per_second=round(subtitle_count / elapsed, 1))
+            print(f"   {mode:12s}{elapsed:8.2f}초 ({args.cues / elapsed:,.0f} 자막/초)", file=sys.stderr)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"💾 결과 저장: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+자막 언어 분류 벤치마크
+- 합성 코퍼스(corpus.py) 전체를 SRT 파일 단위로 분류: 기존 자막별 문자 루프 + 파일명 힌트 vs language_classifier
+- 속도와 함께 정확도(자막 단위)를 측정. 코퍼스에 현실적인 오염을 섞음 (결정적)
+  · 영어 파일 일부 자막에 한글 몇 글자 (♪ 가사, 간판 등)
+  · _ko 파일 일부 자막이 영어 (노래 제목, 영어 대사)
+  · 영어/한글이 번갈아 나오는 이중 자막 파일
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus
+import language_classifier
+
+STRAY_HANGUL_RATE = 0.02
+ENGLISH_IN_KO_RATE = 0.05
+BILINGUAL_FILE_RATE = 0.05
+
+
+def baseline_languages(texts, filename):
+    """기존 WorkingIndexer.detect_language를 자막마다 호출"""
+    languages = []
+    for text in texts:
+        if "_ko" in filename.lower():
+            languages.append("ko")
+            continue
+        korean_chars = sum(1 for c in text if '가' <= c <= '힯')
+        languages.append("ko" if korean_chars > 0 else "en")
+    return languages
+
+
+def build_files(corpus, seed):
+    """[(파일명, 자막 목록, 정답 언어 목록)]"""
+    rng = random.Random(seed)
+    files = []
+    for _, subtitle, language, _, cues in corpus.iter_files():
+        texts, truth = [], []
+        bilingual = language == 'en' and rng.random() < BILINGUAL_FILE_RATE
+        for index, (_, _, text) in enumerate(cues):
+            cue_language = language
+            if bilingual and index % 2:
+                text, cue_language = corpus.text(rng, 'ko'), 'ko'
+            elif language == 'en' and rng.random() < STRAY_HANGUL_RATE:
+                text += ' ♪ 사랑해'
+            elif language == 'ko' and rng.random() < ENGLISH_IN_KO_RATE:
+                # 한국어 자막 트랙 안의 영어 줄도 트랙 언어(ko)로 기록하는 것이 정답
+                text = corpus.text(rng, 'en')
+            texts.append(text)
+            truth.append(cue_language)
+        files.append((subtitle.name, texts, truth))
+    return files
+
+
+def measure(func, files, repeat):
+    """최소 실행 시간(초)과 자막 단위 정확도"""
+    best, correct, total = None, 0, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(texts, filename) for filename, texts, _ in files]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    for (_, _, truth), languages in zip(files, results):
+        correct += sum(1 for expected, actual in zip(truth, languages) if expected == actual)
+        total += len(truth)
+    return best, correct / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자막 언어 분류 벤치마크")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed)
+    files = build_files(corpus, args.seed)
+    cues = sum(len(texts) for _, texts, _ in files)
+
+    print(f"📄 자막 파일 {len(files):,}개, 자막 {cues:,}개")
+    print("-" * 70)
+    for name, func in (("기존 방식 (자막별 문자 루프 + 파일명)", baseline_languages),
+                       ("language_classifier (파일 단위)", language_classifier.cue_languages)):
+        elapsed, accuracy = measure(func, files, args.repeat)
+        print(f"{name:36s} {elapsed * 1000:9.1f}ms  {cues / elapsed:12,.0f} 자막/초  정확도 {accuracy * 100:6.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+디렉토리 스캔 벤치마크
+- 합성 미디어 트리(카테고리/시리즈/시즌)를 만들어 기존 rglob + exists() 방식과 MediaScanner 비교
+- --root를 주면 실제 마운트(SMB/NFS 등)에서 측정
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_scanner import MediaScanner, MEDIA_EXTENSIONS
+
+
+def build_tree(root, categories, shows, seasons, episodes):
+    """카테고리/시리즈/시즌 구조의 합성 트리 생성 (빈 파일)"""
+    count = 0
+    for c in range(categories):
+        for s in range(shows):
+            for n in range(seasons):
+                season_dir = Path(root) / f"Category{c}" / f"Show {c}-{s}" / f"Season {n + 1}"
+                season_dir.mkdir(parents=True)
+                for e in range(episodes):
+                    stem = f"Show {c}-{s} - S{n + 1:02d}E{e + 1:02d}"
+                    (season_dir / f"{stem}.mkv").touch()
+                    (season_dir / f"{stem}.srt").touch()
+                    if e % 2 == 0:
+                        (season_dir / f"{stem}_ko.srt").touch()
+                    (season_dir / f"{stem}.nfo").touch()
+                    count += 1
+    return count
+
+
+def legacy_scan(directory):
+    """기존 방식: rglob + is_file() + 자막 exists() 두 번"""
+    pairs = []
+    for media_file in Path(directory).rglob('*'):
+        if not media_file.is_file() or media_file.suffix.lower() not in MEDIA_EXTENSIONS:
+            continue
+        subtitle_files = []
+        en_srt = media_file.parent / f"{media_file.stem}.srt"
+        if en_srt.exists():
+            subtitle_files.append(en_srt)
+        ko_srt = media_file.parent / f"{media_file.stem}_ko.srt"
+        if ko_srt.exists():
+            subtitle_files.append(ko_srt)
+        if subtitle_files:
+            pairs.append(media_file)
+    return pairs
+
+
+def measure(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+
+def run(root, repeat):
+    candidates = [
+        ("기존 rglob + exists()", lambda: legacy_scan(root)),
+        ("MediaScanner (1 스레드)", lambda: MediaScanner(max_workers=1).find_media_and_subtitles(root)),
+        ("MediaScanner (8 스레드)", lambda: MediaScanner(max_workers=8).find_media_and_subtitles(root)),
+        ("MediaScanner (16 스레드)", lambda: MediaScanner(max_workers=16).find_media_and_subtitles(root)),
+    ]
+    for name, func in candidates:
+        elapsed, count = measure(func, repeat)
+        print(f"{name:28s} {elapsed * 1000:9.1f}ms  쌍 {count:,}개")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="디렉토리 스캔 벤치마크")
+    parser.add_argument('--root', help='실제 측정할 디렉토리 (없으면 합성 트리 생성)')
+    parser.add_argument('--categories', type=int, default=5)
+    parser.add_argument('--shows', type=int, default=40)
+    parser.add_argument('--seasons', type=int, default=4)
+    parser.add_argument('--episodes', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.root:
+        print(f"📁 측정 대상: {args.root}")
+        run(args.root, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        media_count = build_tree(tmp, args.categories, args.shows, args.seasons, args.episodes)
+        print(f"📁 합성 트리: 미디어 {media_count:,}개, 디렉토리 "
+              f"{args.categories * args.shows * args.seasons:,}개 (시즌 기준)")
+        print("-" * 60)
+        run(tmp, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+문장 분리기 벤치마크
+- 1MB 영어/한글 혼합 텍스트로 SentenceExtractor와 기존 방식(문자 단위 루프) 비교
+- langdetect가 설치되어 있으면 문장별 langdetect 방식도 함께 측정
+"""
+
+import argparse
+import random
+import re
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_extractor import SentenceExtractor
+
+EN_SENTENCES = [
+    "The meeting has been postponed until next Wednesday.",
+    "Please submit your expense reports by the end of the month.",
+    "I hope you have a great day!",
+    "Mr. Smith paid $3.50 for the coffee.",
+    "Could you please send me the agenda?",
+    "We should consider all our options before Friday.",
+]
+KO_SENTENCES = [
+    "회의가 다음 주 수요일로 연기되었습니다.",
+    "이달 말까지 경비 보고서를 제출해 주십시오.",
+    "좋은 하루 되세요!",
+    "오늘 TV에서 그 영화를 봤어요.",
+]
+
+
+def generate_text(size_bytes, seed=42):
+    """지정 크기의 영어/한글 혼합 문단 생성 (결정적)"""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        pool = EN_SENTENCES if rng.random() < 0.6 else KO_SENTENCES
+        sentence = rng.choice(pool)
+        separator = '\n' if rng.random() < 0.3 else ' '
+        parts.append(sentence + separator)
+        total += len(sentence.encode('utf-8')) + 1
+    return ''.join(parts)
+
+
+def baseline_extract(text):
+    """기존 방식: 단순 분리 + detect_language 스타일 문자 단위 루프"""
+    sentences = []
+    for sentence in re.split(r'(?<=[.!?])\s+|\n', text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        korean_chars = sum(1 for c in sentence if '\uac00' <= c <= '\ud7af')
+        if korean_chars == 0:
+            sentences.append(sentence)
+    return sentences
+
+
+def langdetect_extract(text):
+    """문장별 langdetect 호출 방식"""
+    from langdetect import detect
+    sentences = []
+    for sentence in re.split(r'(?<=[.!?])\s+|\n', text):
+        sentence = sentence.strip()
+        if sentence and detect(sentence) == 'en':
+            sentences.append(sentence)
+    return sentences
+
+
+def measure(func, text, repeat):
+    """최소 실행 시간(초)과 결과 개수 반환"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문장 분리기 벤치마크")
+    parser.add_argument('--size-mb', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = generate_text(int(args.size_mb * 1024 * 1024))
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    extractor = SentenceExtractor()
+
+    candidates = [
+        ("SentenceExtractor (정규식 1회)", extractor.extract_english, args.repeat),
+        ("기존 방식 (문자 단위 루프)", baseline_extract, args.repeat),
+    ]
+    try:
+        import langdetect  # noqa: F401
+        candidates.append(("문장별 langdetect", langdetect_extract, 1))
+    except ImportError:
+        print("ℹ️  langdetect 미설치 - langdetect 비교는 건너뜁니다.")
+
+    print(f"📄 입력 크기: {size_mb:.2f} MB")
+    print("-" * 60)
+    for name, func, repeat in candidates:
+        elapsed, count = measure(func, text, repeat)
+        throughput = size_mb / elapsed if elapsed else 0
+        print(f"{name:32s} {elapsed * 1000:9.1f}ms  {throughput:7.1f} MB/s  영어 문장 {count:,}개")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+통계/탐색 쿼리 벤치마크
+- 통계 화면(전체/언어별/디렉토리별)과 디렉토리 탐색을 subtitles 전체 집계로 실행할 때와
+  stats_summary 요약 테이블로 실행할 때의 지연 비교
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from working_indexer import WorkingIndexer
+import stats_summary
+
+SHOWS = ["Batman The Animated Series", "Friends", "The Office US", "Breaking Bad", "Stranger Things"]
+CATEGORIES = ["Drama", "Movie", "Anime", "Documentary"]
+
+
+def build(db_path, cue_count, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(cue_count):
+        episode = i // 400
+        directory = f"/mnt/qnap/media_eng/{CATEGORIES[episode % len(CATEGORIES)]}"
+        show = SHOWS[(i // 20000) % len(SHOWS)]
+        media = f"{directory}/{show}/{show} - E{episode:04d}.mkv"
+        ko = rng.random() < 0.4
+        rows.append((media, media[:-4] + ('_ko.srt' if ko else '.srt'), '00:00:01,000', '00:00:02,000',
+                     1000, 2000, 'hello there', 'ko' if ko else 'en', directory))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        indexer = WorkingIndexer(db_path, fts_layout='compact')
+        with indexer.bulk_load():
+            conn = sqlite3.connect(db_path)
+            conn.executemany("""
+                INSERT INTO subtitles (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms,
+                                       text, language, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+            conn.close()
+
+
+def full_scan(cursor, directory):
+    """요약 테이블 이전의 통계/탐색 쿼리"""
+    cursor.execute("SELECT COUNT(*) FROM subtitles").fetchone()
+    cursor.execute("SELECT COUNT(DISTINCT media_file) FROM subtitles").fetchone()
+    cursor.execute("SELECT COUNT(DISTINCT directory) FROM subtitles").fetchone()
+    cursor.execute("SELECT language, COUNT(*) FROM subtitles GROUP BY language").fetchall()
+    cursor.execute("""
+        SELECT directory, COUNT(*) AS subtitle_count, COUNT(DISTINCT media_file) AS file_count
+        FROM subtitles GROUP BY directory ORDER BY subtitle_count DESC
+    """).fetchall()
+    cursor.execute("""
+        SELECT media_file, COUNT(*) FROM subtitles WHERE directory = ? GROUP BY media_file ORDER BY media_file
+    """, (directory,)).fetchall()
+
+
+def summary(cursor, directory):
+    stats_summary.totals(cursor)
+    stats_summary.language_counts(cursor)
+    stats_summary.directory_counts(cursor)
+    stats_summary.media_counts(cursor, directory)
+
+
+def measure(func, cursor, directory, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(cursor, directory)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="통계/탐색 쿼리 벤치마크")
+    parser.add_argument('--cues', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stats.db')
+        build(db_path, args.cues)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        summary_rows = cursor.execute("SELECT COUNT(*) FROM stats_summary").fetchone()[0]
+        directory = "/mnt/qnap/media_eng/Drama"
+
+        full_ms = measure(full_scan, cursor, directory, args.repeat)
+        summary_ms = measure(summary, cursor, directory, args.repeat)
+        conn.close()
+
+    print(f"\n📊 자막 {args.cues:,}개, 요약 행 {summary_rows:,}개")
+    print("-" * 50)
+    print(f"   전체 집계:   {full_ms:10.2f}ms")
+    print(f"   요약 테이블: {summary_ms:10.2f}ms ({full_ms / summary_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+테마 열기 지연 벤치마크
+- 합성 자막 DB를 만들어 theme_hits 조회(open_theme)와 구문별 실시간 FTS 검색(live_theme_search) 비교
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from working_indexer import WorkingIndexer
+from theme_search import ThemeIndex, DEFAULT_THEMES
+
+FILLER_WORDS = ("the a you I we it that this what is was are be have do know get go "
+                "right just like think want come time look well okay yeah people").split()
+
+
+def build_corpus(db_path, cue_count, seed=7):
+    """테마 구문이 일부 섞인 합성 자막 생성"""
+    rng = random.Random(seed)
+    phrases = [p for theme in DEFAULT_THEMES.values() for p in theme['phrases']]
+
+    WorkingIndexer(db_path)
+    conn = sqlite3.connect(db_path)
+    rows = []
+    for i in range(cue_count):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(4, 12))]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words)), rng.choice(phrases))
+        text = ' '.join(words)
+        language = 'ko' if any('\uac00' <= c <= '\ud7af' for c in text) else 'en'
+        media = f"/media/Drama/Show{i // 5000}/E{i // 500:04d}.mkv"
+        rows.append((media, media[:-4] + '.srt', '00:00:01,000', '00:00:02,000', 1000, 2000,
+                     text, language, '/media/Drama'))
+
+    conn.executemany("""
+        INSERT INTO subtitles (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms,
+                               text, language, directory)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="테마 열기 지연 벤치마크")
+    parser.add_argument('--cues', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench_themes.db')
+        build_corpus(db_path, args.cues)
+        theme_index = ThemeIndex(db_path)
+
+        start = time.perf_counter()
+        added = theme_index.update_hits()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n📊 자막 {args.cues:,}개, 테마 히트 {sum(added.values()):,}개 (사전 계산 {build_ms:.0f}ms)")
+        print("-" * 70)
+        print(f"{'테마':22s} {'실시간 FTS':>12s} {'theme_hits':>12s} {'배율':>8s}")
+        for name in DEFAULT_THEMES:
+            live_ms = measure(lambda: theme_index.live_theme_search(name, limit=50), args.repeat)
+            hits_ms = measure(lambda: theme_index.open_theme(name, limit=50), args.repeat)
+            print(f"{name:22s} {live_ms:10.2f}ms {hits_ms:10.2f}ms {live_ms / hits_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
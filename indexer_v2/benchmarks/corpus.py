@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+재현 가능한 합성 자막 코퍼스
+- 같은 (cues, seed)면 항상 같은 미디어 경로, 자막 시간, 문장이 생성됨
+- 단어 빈도는 Zipf 분포 (흔한 불용어 ~ 한두 번 나오는 희귀어), 일부 자막에는 고정 구문을 넣어 구문 검색 결과가 나오게 함
+- 미디어마다 영어 자막(.srt), 일부 미디어는 한글 자막(_ko.srt)도 생성
+- write_srt_tree: 인덱서 벤치마크용 실제 SRT 파일 트리 (빈 .mkv 포함)
+- build_db: 검색 벤치마크용 DB (SRT 파싱 없이 bulk_load로 바로 적재 → 100만 개 이상도 빠르게 생성)
+"""
+
+import bisect
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_access
+import near_duplicates
+from title_normalizer import parse_media_path
+
+EN_STOPWORDS = ("the you i to a it and that is what we of in me this don't know be for have your "
+                "on no not my are just do he was with can all so get it's right but here").split()
+EN_COMMON = ("okay yeah well think go come want look time people money house night morning dinner sorry "
+             "thanks meeting tomorrow today where never always maybe really little something nothing "
+             "mother father brother sister friend office doctor police car phone door water coffee "
+             "work school party wedding love hate kill help stop wait listen remember forget believe").split()
+KO_COMMON = ("그래 정말 미안해 고마워 지금 우리 회의 사랑해 내일 오늘 어디 가자 괜찮아 알았어 "
+             "뭐야 진짜 그냥 아니 여기 거기 엄마 아빠 친구 회사 선생님 경찰 전화 커피 학교 결혼").split()
+EN_PHRASES = ["thank you", "i don't know", "what are you doing", "see you tomorrow",
+              "are you okay", "let's go", "i love you", "good morning"]
+KO_PHRASES = ["고마워 정말", "미안해 정말", "내일 보자", "사랑해 정말"]
+EN_SYLLABLES = [c + v for c in "bcdfghjklmnprstvz" for v in ("a", "e", "i", "o", "u", "ar", "en", "ol")]
+CATEGORIES = ["Drama", "Movie", "Anime", "Documentary"]
+SHOWS_PER_CATEGORY = 40
+PHRASE_RATE = 0.05
+# repeat_ratio > 0일 때 반복 대사 풀 크기 (언어별)와 변형 비율
+REPEAT_LINES = 200
+REPEAT_PUNCTUATION = ['', '.', '!', '?', '...']
+REPEAT_WORD_CHANGE_RATE = 0.1
+ZIPF_EXPONENT = 1.07
+
+
+def hangul_syllable(index):
+    """가(U+AC00)부터 index번째 완성형 음절"""
+    return chr(0xAC00 + index % 11172)
+
+
+def format_time(ms):
+    """밀리초 → SRT 시간 문자열 (00:01:23,456)"""
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+class SyntheticCorpus:
+    def __init__(self, cues=100000, seed=42, cues_per_file=400, ko_ratio=0.35,
+                 vocabulary=20000, media_root="/mnt/qnap/media_eng", repeat_ratio=0.0):
+        """repeat_ratio: 반복 대사(유행어, 재방송 등) 비율. 0이면 기존 코퍼스와 같은 내용"""
+        self.cues = cues
+        self.seed = seed
+        self.cues_per_file = cues_per_file
+        self.ko_ratio = ko_ratio
+        self.repeat_ratio = repeat_ratio
+        self.media_root = Path(media_root)
+
+        vocab_rng = random.Random(seed)
+        self.en_vocab = self.build_vocabulary(EN_STOPWORDS + EN_COMMON, vocabulary, vocab_rng, self.en_word)
+        self.ko_vocab = self.build_vocabulary(KO_COMMON, vocabulary // 2, vocab_rng, self.ko_word)
+        self.en_weights = self.zipf_cum_weights(len(self.en_vocab))
+        self.ko_weights = self.zipf_cum_weights(len(self.ko_vocab))
+        repeat_rng = random.Random(seed + 2)
+        self.repeat_lines = {language: [self.text(repeat_rng, language) for _ in range(REPEAT_LINES)]
+                             for language in ('en', 'ko')} if repeat_ratio else {}
+
+    def params(self):
+        """코퍼스를 식별하는 설정 (결과 JSON, 재사용 DB 확인용)"""
+        return {'cues': self.cues, 'seed': self.seed, 'cues_per_file': self.cues_per_file,
+                'ko_ratio': self.ko_ratio, 'en_vocabulary': len(self.en_vocab), 'ko_vocabulary': len(self.ko_vocab),
+                **({'repeat_ratio': self.repeat_ratio} if self.repeat_ratio else {})}
+
+    @staticmethod
+    def en_word(rng):
+        return ''.join(rng.choice(EN_SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    @staticmethod
+    def ko_word(rng):
+        return ''.join(hangul_syllable(rng.randrange(11172)) for _ in range(rng.randint(2, 3)))
+
+    @staticmethod
+    def build_vocabulary(base, size, rng, make_word):
+        """기본 단어(빈도 상위) 뒤에 생성한 희귀어를 붙인 어휘 (순서 = Zipf 순위)"""
+        vocab = list(dict.fromkeys(base))
+        seen = set(vocab)
+        while len(vocab) < size:
+            word = make_word(rng)
+            if word not in seen:
+                seen.add(word)
+                vocab.append(word)
+        return vocab
+
+    @staticmethod
+    def zipf_cum_weights(size):
+        return list(itertools.accumulate(1.0 / rank ** ZIPF_EXPONENT for rank in range(1, size + 1)))
+
+    def rare_terms(self, count=10, language='en'):
+        """빈도 순위 하위권 단어 (희귀어 검색용)"""
+        vocab = self.en_vocab if language == 'en' else self.ko_vocab
+        step = max(1, len(vocab) // (4 * count))
+        return [vocab[len(vocab) // 2 + i * step] for i in range(count)]
+
+    def text(self, rng, language):
+        """자막 한 줄"""
+        if language == 'ko':
+            vocab, weights, phrases, length = self.ko_vocab, self.ko_weights, KO_PHRASES, rng.randint(2, 6)
+        else:
+            vocab, weights, phrases, length = self.en_vocab, self.en_weights, EN_PHRASES, rng.randint(3, 10)
+        words = rng.choices(vocab, cum_weights=weights, k=length)
+        if rng.random() < PHRASE_RATE:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(phrases))
+        line = ' '.join(words)
+        return line[0].upper() + line[1:] if language == 'en' else line
+
+    def repeat_line(self, rng, language):
+        """반복 대사 풀에서 한 줄 (문장부호/대소문자 변형, 가끔 단어 하나 바꿈)"""
+        line = rng.choice(self.repeat_lines[language]) + rng.choice(REPEAT_PUNCTUATION)
+        if rng.random() < REPEAT_WORD_CHANGE_RATE:
+            words = line.split()
+            vocab = self.ko_vocab if language == 'ko' else self.en_vocab
+            words[rng.randrange(len(words))] = rng.choice(vocab[:1000])
+            line = ' '.join(words)
+        return line.upper() if language == 'en' and rng.random() < 0.1 else line
+
+    def sentences(self, count=20, seed_offset=1):
+        """배치 검색용 영어 문장 (코퍼스와 같은 분포, 다른 시드)"""
+        rng = random.Random(self.seed + seed_offset)
+        return [self.text(rng, 'en') + rng.choice(['.', '?', '!']) for _ in range(count)]
+
+    def iter_files(self):
+        """
+        자막 파일 단위로 생성: (media_file, subtitle_file, language, directory, [(start_ms, end_ms, text)])
+        전체 자막 수가 cues에 도달하면 중단
+        """
+        rng = random.Random(self.seed)
+        produced = 0
+        for episode in itertools.count():
+            if produced >= self.cues:
+                return
+            category = CATEGORIES[episode % len(CATEGORIES)]
+            show = f"Show {episode // len(CATEGORIES) % SHOWS_PER_CATEGORY:02d}"
+            number = episode // (len(CATEGORIES) * SHOWS_PER_CATEGORY)
+            season, ep = number // 20 + 1, number % 20 + 1
+            directory = self.media_root / category
+            media = directory / show / f"Season {season}" / f"{show} - S{season:02d}E{ep:02d} - 1080p WEB-DL.mkv"
+
+            languages = ['en', 'ko'] if rng.random() < self.ko_ratio else ['en']
+            for language in languages:
+                count = min(self.cues_per_file, self.cues - produced)
+                if count <= 0:
+                    break
+                clock = 1000
+                cues = []
+                for _ in range(count):
+                    start = clock + rng.randint(200, 4000)
+                    end = start + rng.randint(800, 5000)
+                    if self.repeat_ratio and rng.random() < self.repeat_ratio:
+                        text = self.repeat_line(rng, language)
+                    else:
+                        text = self.text(rng, language)
+                    cues.append((start, end, text))
+                    clock = end
+                subtitle = media.with_name(media.stem + ('_ko.srt' if language == 'ko' else '.srt'))
+                produced += count
+                yield media, subtitle, language, directory, cues
+
+    def write_srt_tree(self, root):
+        """root 아래에 SRT 파일 트리 생성 (media_root를 root로 바꿈). (미디어 수, 자막 파일 수) 반환"""
+        root = Path(root)
+        media_files, subtitle_files = set(), 0
+        for media, subtitle, _, _, cues in self.iter_files():
+            media = root / media.relative_to(self.media_root)
+            subtitle = root / subtitle.relative_to(self.media_root)
+            media.parent.mkdir(parents=True, exist_ok=True)
+            if media not in media_files:
+                media.touch()
+                media_files.add(media)
+            with open(subtitle, 'w', encoding='utf-8') as f:
+                for number, (start, end, text) in enumerate(cues, 1):
+                    f.write(f"{number}\n{format_time(start)} --> {format_time(end)}\n{text}\n\n")
+            subtitle_files += 1
+        return len(media_files), subtitle_files
+
+    def rows(self):
+        """subtitles 테이블 행 (WorkingIndexer.save_subtitles와 같은 값)"""
+        for media, subtitle, language, directory, cues in self.iter_files():
+            title = parse_media_path(str(media))
+            for start, end, text in cues:
+                yield (str(media), str(subtitle), format_time(start), format_time(end), start, end,
+                       text, language, str(directory), *title)
+
+    def build_db(self, db_path, fts_layout=None, chunk=50000):
+        """검색 벤치마크용 DB 생성 (bulk_load + FTS optimize). 코퍼스 설정을 metadata에 기록"""
+        from working_indexer import WorkingIndexer
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            indexer = WorkingIndexer(db_path, fts_layout=fts_layout)
+            with indexer.bulk_load():
+                conn = db_access.connect(db_path, 'bulk-load')
+                rows = self.rows()
+                while True:
+                    batch = list(itertools.islice(rows, chunk))
+                    if not batch:
+                        break
+                    with conn:
+                        conn.executemany("""
+                            INSERT INTO subtitles (media_file, subtitle_file, start_time, end_time,
+                                                   start_time_ms, end_time_ms, text, language, directory,
+                                                   title, season, episode)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, batch)
+                # 중복 묶음은 적재가 끝난 뒤 한 번에 (save_subtitles와 같은 cluster_id)
+                with conn:
+                    near_duplicates.backfill(conn.cursor())
+                conn.close()
+            indexer.fts.optimize()
+            indexer.update_metadata('synthetic_corpus', json.dumps(self.params(), sort_keys=True))
+
+    def matches_db(self, db_path):
+        """db_path가 같은 설정으로 만든 코퍼스 DB인지 (재사용 여부)"""
+        if not Path(db_path).exists():
+            return False
+        conn = db_access.connect(db_path, 'serve')
+        try:
+            row = conn.execute("SELECT value FROM metadata WHERE key = 'synthetic_corpus'").fetchone()
+        except Exception:
+            row = None
+        conn.close()
+        return row is not None and json.loads(row[0]) == self.params()
+
+
+# 테스트
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="합성 자막 코퍼스 생성")
+    parser.add_argument('target', help="DB 경로 (--srt면 SRT 트리를 만들 디렉토리)")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--srt', action='store_true', help="DB 대신 SRT 파일 트리 생성")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed)
+    if args.srt:
+        media_count, subtitle_count = corpus.write_srt_tree(args.target)
+        print(f"✅ 미디어 {media_count:,}개, 자막 파일 {subtitle_count:,}개 생성: {args.target}")
+    else:
+        corpus.build_db(args.target)
+        print(f"✅ 자막 {args.cues:,}개 DB 생성: {args.target}")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+검색/인덱싱 벤치마크 스위트
+- 합성 코퍼스(corpus.py) DB를 만들고 고정 워크로드(workload.py)를 실행해서 결과를 JSON으로 저장
+- --compare 이전 결과.json: 분류별 p50/p95/처리량 변화율 출력 (버전 간 회귀 확인)
+- --workdir를 지정하면 코퍼스 DB를 보관하고, 설정이 같으면 다음 실행에서 재사용 (100만 개 이상일 때)
+
+사용 예:
+    python benchmarks/run_suite.py --cues 1000000 --workdir /tmp/bench --output results.json
+    python benchmarks/run_suite.py --cues 1000000 --workdir /tmp/bench --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus
+from workload import build_workload, run_search_workload, run_concurrent_workload, run_index_workload
+from search_interface import SubtitleSearch
+import fts_schema
+import db_access
+
+SCHEMA_VERSION = 1
+# 이 이상 나빠지면 ⚠ 표시 (반복 실행 간 편차가 10% 안팎)
+REGRESSION_PERCENT = 10
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+    }
+
+
+def prepare_db(corpus, workdir, layout):
+    """코퍼스 DB 경로와 생성 시간(초, 재사용이면 None)"""
+    db_path = os.path.join(workdir, f"corpus_{corpus.cues}_{corpus.seed}_{layout or fts_schema.DEFAULT_LAYOUT}.db")
+    if corpus.matches_db(db_path):
+        conn = db_access.connect(db_path, 'serve')
+        same_layout = fts_schema.current_layout(conn.cursor()) == (layout or fts_schema.DEFAULT_LAYOUT)
+        conn.close()
+        if same_layout:
+            return db_path, None
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    start = time.perf_counter()
+    corpus.build_db(db_path, fts_layout=layout)
+    return db_path, round(time.perf_counter() - start, 3)
+
+
+def run(args, workdir):
+    corpus = SyntheticCorpus(cues=args.cues, seed=args.seed)
+    print(f"📦 코퍼스 준비: 자막 {args.cues:,}개 (seed={args.seed})")
+    db_path, build_seconds = prepare_db(corpus, workdir, args.layout)
+    print(f"   {'재사용' if build_seconds is None else f'생성 {build_seconds:.1f}초'}: {db_path}")
+
+    searcher = SubtitleSearch(db_path, cache_size=0)
+    with searcher.connection() as pooled:
+        layout = searcher.fts_layout(pooled.conn)
+    workload = build_workload(corpus)
+
+    print(f"🔍 검색 워크로드 ({args.repeat}회 반복)...")
+    search_results = run_search_workload(searcher, workload, repeat=args.repeat)
+    concurrent = run_concurrent_workload(searcher, workload, threads=args.threads, repeat=args.repeat)
+    searcher.close()
+
+    report = {
+        'schema_version': SCHEMA_VERSION,
+        'environment': environment(),
+        'corpus': corpus.params(),
+        'database': {'fts_layout': layout, 'size_bytes': os.path.getsize(db_path), 'build_seconds': build_seconds},
+        'search': search_results,
+        'concurrent': concurrent,
+        'workload': {category: [item if isinstance(item, str) else list(item) for item in items]
+                     for category, items in workload.items()},
+    }
+
+    if args.index_cues:
+        print(f"🗂️  인덱싱 워크로드 (자막 {args.index_cues:,}개 SRT)...")
+        report['indexing'] = run_index_workload(args.index_cues, args.seed)
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 검색 지연 (자막 {report['corpus']['cues']:,}개, {report['database']['fts_layout']})")
+    print("-" * 74)
+    print(f"{'분류':20s}{'p50':>10s}{'p95':>10s}{'p99':>10s}{'qps':>10s}{'결과':>8s}")
+    for category, stats in report['search'].items():
+        print(f"{category:20s}{stats['p50_ms']:8.2f}ms{stats['p95_ms']:8.2f}ms{stats['p99_ms']:8.2f}ms"
+              f"{stats['throughput_qps']:10.1f}{stats['avg_results']:8.1f}")
+    concurrent = report['concurrent']
+    print(f"{'동시 ' + str(concurrent['threads']) + '스레드':18s}{concurrent['p50_ms']:8.2f}ms"
+          f"{concurrent['p95_ms']:8.2f}ms{concurrent['p99_ms']:8.2f}ms{concurrent['throughput_qps']:10.1f}")
+
+    indexing = report.get('indexing')
+    if indexing:
+        print(f"\n🗂️  인덱싱 (SRT {indexing['corpus']['subtitle_files']:,}개 파일)")
+        for mode in ('incremental', 'bulk'):
+            print(f"   {mode:12s}{indexing[mode]['seconds']:8.2f}초 ({indexing[mode]['cues_per_second']:,.0f} 자막/초)")
+        print(f"   {'resume_noop':12s}{indexing['resume_noop']['seconds']:8.2f}초")
+
+
+def compare(report, baseline):
+    """이전 결과 대비 변화율 (+면 느려짐/줄어듦)"""
+    if baseline.get('corpus') != report['corpus']:
+        print("⚠️  기준 결과와 코퍼스 설정이 다릅니다. 비교가 정확하지 않을 수 있습니다.")
+    print(f"\n📈 기준 대비 ({baseline['environment'].get('git_revision')} → "
+          f"{report['environment'].get('git_revision')})")
+    print("-" * 60)
+    print(f"{'분류':20s}{'p50':>12s}{'p95':>12s}{'qps':>12s}")
+
+    def change(new, old, higher_is_better=False):
+        if not old:
+            return f"{'-':>12s}"
+        ratio = (new - old) / old * 100
+        worse = ratio < -REGRESSION_PERCENT if higher_is_better else ratio > REGRESSION_PERCENT
+        return f"{ratio:+10.1f}%{'⚠' if worse else ' '}"
+
+    for category, stats in report['search'].items():
+        old = baseline.get('search', {}).get(category)
+        if not old:
+            continue
+        print(f"{category:20s}{change(stats['p50_ms'], old['p50_ms'])}{change(stats['p95_ms'], old['p95_ms'])}"
+              f"{change(stats['throughput_qps'], old['throughput_qps'], higher_is_better=True)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색/인덱싱 벤치마크 스위트")
+    parser.add_argument('--cues', type=int, default=200000, help="검색용 코퍼스 자막 수")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--layout', choices=list(fts_schema.FTS_LAYOUTS), default=None)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--index-cues', type=int, default=20000, help="인덱싱 측정용 SRT 자막 수 (0이면 생략)")
+    parser.add_argument('--workdir', help="코퍼스 DB 보관 디렉토리 (없으면 임시 디렉토리)")
+    parser.add_argument('--output', help="결과 JSON 저장 경로")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        report = run(args, args.workdir)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            report = run(args, tmp)
+
+    print_report(report)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
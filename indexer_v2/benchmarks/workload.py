@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+고정 검색 워크로드와 측정
+- 분류: 희귀어 / 불용어 / 구문 / 접두사 / 언어 필터 / 배치 문장 (검색어는 코퍼스 설정으로 결정되므로 버전 간 비교 가능)
+- 검색은 SubtitleSearch(결과 캐시 없음)로 실행해서 풀, 레이아웃 라우팅까지 포함한 지연을 측정
+- 인덱서는 SRT 트리를 WorkingIndexer로 인덱싱 (증분 모드 / bulk 모드 / 변경 없는 --resume 재실행), 단계별 시간 포함
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SyntheticCorpus, EN_PHRASES, KO_PHRASES
+import db_access
+
+SEARCH_LIMIT = 20
+
+
+def build_workload(corpus, batch_size=20):
+    """분류 → [(검색어, 언어)]. batch_sentence는 문장 목록"""
+    return {
+        'rare_term': [(term, None) for term in corpus.rare_terms(8)] +
+                     [(term, 'ko') for term in corpus.rare_terms(4, 'ko')],
+        'stopword': [(word, None) for word in ('the', 'you', 'it', 'is', 'what', 'know')],
+        'phrase': [(f'"{phrase}"', None) for phrase in EN_PHRASES[:6]] +
+                  [(f'"{phrase}"', 'ko') for phrase in KO_PHRASES[:2]],
+        'prefix': [('mee*', None), ('mo*', None), ('th*', None), ('remem*', None), ('미안*', 'ko'), ('사*', 'ko')],
+        'language_filtered': [('money', 'en'), ('okay', 'ko'), ('the', 'ko'), ('사랑해', 'ko'),
+                              ('dinner OR coffee', 'en'), ('고마워', 'en')],
+        'batch_sentence': corpus.sentences(batch_size),
+    }
+
+
+def percentiles(values):
+    """지연 목록(ms) 요약"""
+    values = sorted(values)
+    if len(values) >= 2:
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        p50, p90, p95, p99 = cuts[49], cuts[89], cuts[94], cuts[98]
+    else:
+        p50 = p90 = p95 = p99 = values[0] if values else 0.0
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.fmean(values), 3) if values else 0.0,
+        'p50_ms': round(p50, 3),
+        'p90_ms': round(p90, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'max_ms': round(values[-1], 3) if values else 0.0,
+    }
+
+
+def run_one(searcher, category, item):
+    """검색 1회 (ms, 결과 수)"""
+    start = time.perf_counter()
+    if category == 'batch_sentence':
+        result = searcher.search_sentence(item, limit=SEARCH_LIMIT)
+    else:
+        query, language = item
+        result = searcher.search(query, language, limit=SEARCH_LIMIT)
+    return (time.perf_counter() - start) * 1000, result['count']
+
+
+def run_search_workload(searcher, workload, repeat=5):
+    """분류별 지연 백분위수와 처리량 (첫 1회는 예열로 측정에서 제외)"""
+    for category, items in workload.items():
+        for item in items:
+            run_one(searcher, category, item)
+
+    results = {}
+    for category, items in workload.items():
+        timings, hits = [], 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for item in items:
+                elapsed, count = run_one(searcher, category, item)
+                timings.append(elapsed)
+                hits += count
+        wall = time.perf_counter() - start
+        results[category] = dict(percentiles(timings),
+                                 throughput_qps=round(len(timings) / wall, 1),
+                                 avg_results=round(hits / len(timings), 2))
+    return results
+
+
+def run_concurrent_workload(searcher, workload, threads=4, repeat=5):
+    """모든 분류를 섞어서 여러 스레드로 실행했을 때의 처리량과 지연"""
+    jobs = [(category, item) for _ in range(repeat) for category, items in workload.items() for item in items]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        timings = [elapsed for elapsed, _ in pool.map(lambda job: run_one(searcher, *job), jobs)]
+    wall = time.perf_counter() - start
+    return dict(percentiles(timings), threads=threads, throughput_qps=round(len(jobs) / wall, 1))
+
+
+def run_index_workload(cues, seed):
+    """WorkingIndexer 인덱싱 처리량 (SRT 트리를 임시 디렉토리에 생성)"""
+    from working_indexer import WorkingIndexer
+
+    corpus = SyntheticCorpus(cues=cues, seed=seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        media_root = Path(tmp) / 'media'
+        media_count, subtitle_count = corpus.write_srt_tree(media_root)
+        categories = sorted(path for path in media_root.iterdir() if path.is_dir())
+
+        def index_all(db_path, bulk=False, resume=False):
+            with contextlib.redirect_stdout(io.StringIO()):
+                indexer = WorkingIndexer(db_path)
+                indexer.media_root = media_root
+                start = time.perf_counter()
+                with (indexer.bulk_load() if bulk else contextlib.nullcontext()):
+                    for category in categories:
+                        indexer.index_directory(category, resume=resume)
+                return time.perf_counter() - start, indexer.timer.report()
+
+        for mode, bulk in (('incremental', False), ('bulk', True)):
+            db_path = os.path.join(tmp, f'{mode}.db')
+            elapsed, stages = index_all(db_path, bulk=bulk)
+            conn = db_access.connect(db_path, 'serve')
+            indexed = conn.execute("SELECT COUNT(*) FROM subtitles").fetchone()[0]
+            conn.close()
+            results[mode] = {'seconds': round(elapsed, 3), 'cues': indexed,
+                             'cues_per_second': round(indexed / elapsed, 1),
+                             'files_per_second': round(subtitle_count / elapsed, 1),
+                             'stages': stages['stages']}
+
+        # 변경 없는 재실행: 체크포인트 비교만 하고 모두 건너뛰는 시간
+        elapsed, _ = index_all(os.path.join(tmp, 'incremental.db'), resume=True)
+        results['resume_noop'] = {'seconds': round(elapsed, 3), 'files_per_second': round(subtitle_count / elapsed, 1)}
+        results['corpus'] = dict(corpus.params(), media_files=media_count, subtitle_files=subtitle_count)
+    return results
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+SQLite 연결 + PRAGMA 프로필
+- 모든 모듈은 sqlite3.connect 대신 connect(db_path, profile)로 연결
+- 프로필
+  - serve: 검색/탐색 (WAL, mmap, 큰 페이지 캐시, 기본은 읽기 전용)
+  - write: 인덱서 증분 쓰기, 감시 모드, 검색 히스토리 (WAL + synchronous=NORMAL)
+  - bulk-load: 섀도 DB 대량 적재 (synchronous=OFF, 배타 잠금, 아주 큰 캐시). 적재 중 OS가 죽으면 DB를 버리고 다시 만듦
+  - maintenance: FTS rebuild/optimize/merge, 테마 히트, DB 교체 (큰 캐시, 정렬용 임시 저장소를 메모리에)
+- journal_mode=WAL은 DB 파일에 저장되는 설정. 읽기 연결에서 바꾸지 못하면(잠금 등) 기존 모드로 계속 사용
+"""
+
+import sqlite3
+
+MB = 1024 * 1024
+
+# PRAGMA는 순서대로 적용 (query_only는 journal_mode 다음)
+PROFILES = {
+    'serve': {
+        'timeout': 5.0,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64 * 1024,        # KiB 단위 (음수) → 64MB
+            'mmap_size': 256 * MB,
+            'temp_store': 'MEMORY',
+            'query_only': 'ON',
+        },
+    },
+    'write': {
+        'timeout': 30.0,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -32 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    },
+    'bulk-load': {
+        'timeout': 30.0,
+        'pragmas': {
+            # 배타 잠금을 WAL 전환보다 먼저 설정하면 공유 메모리(-shm) 파일 없이 동작
+            'locking_mode': 'EXCLUSIVE',
+            'journal_mode': 'WAL',
+            'synchronous': 'OFF',
+            'cache_size': -256 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    },
+    'maintenance': {
+        'timeout': 120.0,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -256 * 1024,
+            'mmap_size': 256 * MB,
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+
+DEFAULT_PROFILE = 'write'
+
+
+def apply_profile(conn, profile, **overrides):
+    """열린 연결에 프로필 PRAGMA 적용. overrides로 개별 PRAGMA 변경 (None이면 생략)"""
+    pragmas = dict(PROFILES[profile]['pragmas'])
+    pragmas.update(overrides)
+    for name, value in pragmas.items():
+        if value is None:
+            continue
+        try:
+            conn.execute(f"PRAGMA {name}={value}").fetchall()
+        except sqlite3.OperationalError:
+            # journal_mode 변경은 쓰기 잠금이 필요 → 다른 연결이 쓰는 중이면 기존 모드 유지
+            if name != 'journal_mode':
+                raise
+    return conn
+
+
+def connect(db_path, profile=DEFAULT_PROFILE, timeout=None, check_same_thread=True, **overrides):
+    """
+    프로필을 적용한 연결
+    - timeout: 잠금 대기 시간(초). None이면 프로필 기본값
+    - overrides: PRAGMA 개별 변경 (예: query_only=None → 읽기 전용 해제)
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"알 수 없는 프로필: {profile} (가능: {', '.join(PROFILES)})")
+    conn = sqlite3.connect(db_path, timeout=PROFILES[profile]['timeout'] if timeout is None else timeout,
+                           check_same_thread=check_same_thread)
+    return apply_profile(conn, profile, **overrides)
+
+
+def current_settings(conn, names=('journal_mode', 'synchronous', 'locking_mode', 'cache_size',
+                                  'mmap_size', 'temp_store', 'query_only')):
+    """현재 연결의 PRAGMA 값 (확인/벤치마크 출력용)"""
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+
+# 테스트
+if __name__ == "__main__":
+    import sys
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "working_subtitles_v2.db"
+    for name in PROFILES:
+        conn = connect(db_path, name)
+        print(f"🔧 {name}: {current_settings(conn)}")
+        conn.close()
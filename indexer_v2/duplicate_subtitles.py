@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+같은 내용의 자막 파일 (파일 전체 해시)
+- subtitle_files: 인덱싱한 자막 파일별 내용 해시(blake2b)와 자막 행을 가진 파일(canonical_file)
+  · canonical_file == subtitle_file: 자막 행을 가진 원본
+  · canonical_file != subtitle_file: 원본과 내용이 같은 사본 (자막 행 없이 연결만, 예: Movie와 Disney에 같은 영화)
+- 인덱서는 파싱 전에 해시를 계산해서 같은 내용의 원본이 있으면 파싱/저장 없이 연결만 기록
+- 원본이 바뀌거나 삭제되면 첫 사본으로 자막 행을 옮기고 나머지 사본을 다시 연결 (detach)
+"""
+
+import sqlite3
+from hashlib import blake2b
+
+from title_normalizer import parse_media_path
+
+HASH_CHUNK = 1 << 20
+# IN (...) 한 번에 넣는 경로 수 (SQLite 변수 개수 제한)
+LOOKUP_CHUNK = 500
+
+COLUMNS = ('subtitle_file', 'media_file', 'directory', 'content_hash', 'canonical_file', 'cue_count')
+
+
+def create(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS subtitle_files (
+            subtitle_file TEXT PRIMARY KEY,
+            media_file TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            canonical_file TEXT NOT NULL,
+            cue_count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subtitle_files_hash ON subtitle_files(content_hash)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subtitle_files_canonical ON subtitle_files(canonical_file)")
+
+
+def file_hash(path):
+    """자막 파일 내용 해시 (바이트 그대로, 인코딩/줄바꿈이 다르면 다른 파일)"""
+    digest = blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def lookup(cursor, subtitle_file):
+    """subtitle_files 행 dict (없으면 None)"""
+    cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM subtitle_files WHERE subtitle_file = ?", (str(subtitle_file),))
+    row = cursor.fetchone()
+    return dict(zip(COLUMNS, row)) if row else None
+
+
+def find_canonical(cursor, content_hash, exclude=None):
+    """같은 내용의 원본 행 (자기 자신 제외, 가장 먼저 등록된 것)"""
+    cursor.execute(f"""
+        SELECT {', '.join(COLUMNS)} FROM subtitle_files
+        WHERE content_hash = ? AND canonical_file = subtitle_file AND subtitle_file != ?
+        ORDER BY rowid LIMIT 1
+    """, (content_hash, str(exclude)))
+    row = cursor.fetchone()
+    return dict(zip(COLUMNS, row)) if row else None
+
+
+def register(cursor, subtitle_file, media_file, directory, content_hash, cue_count, canonical_file=None):
+    """원본(canonical_file 없음) 또는 사본 등록 (자막 행/체크포인트와 같은 트랜잭션에서)"""
+    cursor.execute(f"""
+        INSERT OR REPLACE INTO subtitle_files ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})
+    """, (str(subtitle_file), str(media_file), str(directory), content_hash,
+          str(canonical_file or subtitle_file), cue_count))
+
+
+def detach(cursor, subtitle_file, content_hash=None):
+    """
+    자막 파일의 기존 등록 정리 (행 교체/삭제 전에 호출)
+    - content_hash가 기록과 같으면(같은 내용 재인덱싱) 그대로 둠
+    - 원본이었고 사본이 있으면 첫 사본으로 자막 행을 옮기고 나머지 사본을 새 원본에 연결
+    반환: 자막 행을 넘겨받은 사본의 미디어 파일 (통계 요약 갱신용), 없으면 None
+    """
+    record = lookup(cursor, subtitle_file)
+    if record is None or (content_hash is not None and record['content_hash'] == content_hash):
+        return None
+    cursor.execute("DELETE FROM subtitle_files WHERE subtitle_file = ?", (str(subtitle_file),))
+    if record['canonical_file'] != record['subtitle_file']:
+        return None
+
+    cursor.execute(f"""
+        SELECT {', '.join(COLUMNS)} FROM subtitle_files WHERE canonical_file = ? ORDER BY rowid LIMIT 1
+    """, (str(subtitle_file),))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    heir = dict(zip(COLUMNS, row))
+    title, season, episode = parse_media_path(heir['media_file'])
+    cursor.execute("""
+        UPDATE subtitles SET media_file = ?, subtitle_file = ?, directory = ?, title = ?, season = ?, episode = ?
+        WHERE subtitle_file = ?
+    """, (heir['media_file'], heir['subtitle_file'], heir['directory'], title, season, episode, str(subtitle_file)))
+    cursor.execute("UPDATE subtitle_files SET canonical_file = ? WHERE canonical_file = ?",
+                   (heir['subtitle_file'], str(subtitle_file)))
+    return heir['media_file']
+
+
+def linked_files(cursor):
+    """사본 자막 파일 경로 집합"""
+    cursor.execute("SELECT subtitle_file FROM subtitle_files WHERE canonical_file != subtitle_file")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def linked_media(cursor, subtitle_files):
+    """원본 자막 파일 → 같은 내용 사본의 미디어 파일 목록 (검색 결과용). 테이블이 없는 DB면 빈 dict"""
+    subtitle_files = sorted(set(subtitle_files))
+    links = {}
+    try:
+        for i in range(0, len(subtitle_files), LOOKUP_CHUNK):
+            chunk = subtitle_files[i:i + LOOKUP_CHUNK]
+            cursor.execute(f"""
+                SELECT canonical_file, media_file FROM subtitle_files
+                WHERE canonical_file IN ({','.join('?' * len(chunk))}) AND subtitle_file != canonical_file
+                ORDER BY rowid
+            """, chunk)
+            for canonical_file, media_file in cursor.fetchall():
+                links.setdefault(canonical_file, []).append(media_file)
+    except sqlite3.OperationalError:
+        return {}
+    return links
+
+
+def savings(cursor):
+    """(사본 파일 수, 저장하지 않은 자막 수)"""
+    cursor.execute("""
+        SELECT COUNT(*), COALESCE(SUM(cue_count), 0) FROM subtitle_files WHERE canonical_file != subtitle_file
+    """)
+    return cursor.fetchone()
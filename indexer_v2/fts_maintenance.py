@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+FTS5 인덱스 유지보수
+- 증분 갱신(감시 모드, 파일별 교체)은 트랜잭션마다 작은 세그먼트를 만들어서 시간이 지날수록 검색이 느려짐
+- automerge / crisismerge 설정으로 쓰기 중 자동 병합 강도를 조절
+- 유휴 시간에 페이지 수가 제한된 merge 단계를 여러 번 실행 (단계마다 짧은 트랜잭션 → 검색/쓰기를 오래 막지 않음)
+- 대량 배치 후에는 optimize로 세그먼트를 하나로 합침
+- 세그먼트 수: %_idx의 서로 다른 segid 수, 인덱스 크기: %_data의 block 크기 합
+- 언어별 FTS 테이블(partitioned 레이아웃)이 있으면 모든 FTS 테이블에 같이 적용
+"""
+
+import sqlite3
+import time
+
+import db_access
+import fts_schema
+
+# 자동 병합: 같은 레벨에 세그먼트가 이만큼 쌓이면 쓰기 중 병합 (FTS5 기본값 4)
+DEFAULT_AUTOMERGE = 8
+# 같은 레벨에 이만큼 쌓이면 쓰기를 멈추고라도 병합 (FTS5 기본값 16)
+DEFAULT_CRISISMERGE = 16
+# 한 번의 merge 단계에서 쓰는 최대 페이지 수
+MERGE_PAGES = 500
+# 배치에서 이 이상 자막이 추가되면 optimize
+OPTIMIZE_THRESHOLD = 50000
+
+
+class FtsMaintenance:
+    def __init__(self, db_path, table=None):
+        """table: 대상 FTS 테이블. None이면 현재 레이아웃의 모든 FTS 테이블"""
+        self.db_path = db_path
+        self.table = table
+
+    def connect(self):
+        return db_access.connect(self.db_path, 'maintenance')
+
+    def tables(self, conn):
+        return [self.table] if self.table else fts_schema.fts_tables(conn.cursor())
+
+    def command(self, conn, name, value=None):
+        """FTS5 특수 INSERT 명령 실행 ('merge', 'optimize', 'automerge' 등)"""
+        for table in self.tables(conn):
+            if value is None:
+                conn.execute(f"INSERT INTO {table}({table}) VALUES(?)", (name,))
+            else:
+                conn.execute(f"INSERT INTO {table}({table}, rank) VALUES(?, ?)", (name, value))
+
+    def configure(self, automerge=DEFAULT_AUTOMERGE, crisismerge=DEFAULT_CRISISMERGE):
+        """병합 설정 저장 (%_config 테이블에 기록되어 이후 모든 연결에 적용)"""
+        conn = self.connect()
+        with conn:
+            self.command(conn, 'automerge', automerge)
+            self.command(conn, 'crisismerge', crisismerge)
+        conn.close()
+
+    def segment_stats(self):
+        """세그먼트 수와 인덱스 크기(바이트)"""
+        conn = self.connect()
+        segments, index_bytes = 0, 0
+        try:
+            for table in self.tables(conn):
+                segments += conn.execute(f"SELECT COUNT(DISTINCT segid) FROM {table}_idx").fetchone()[0]
+                index_bytes += conn.execute(f"SELECT COALESCE(SUM(length(block)), 0) FROM {table}_data").fetchone()[0]
+        except sqlite3.OperationalError:
+            pass
+        conn.close()
+        return {'segments': segments, 'index_bytes': index_bytes}
+
+    def merge_step(self, conn, pages=MERGE_PAGES, full=False):
+        """
+        merge 한 단계 실행. 병합할 것이 남아 있으면 True
+        full=True면 레벨과 관계없이 세그먼트가 2개 이상이면 병합 (유휴 시간에 하나로 수렴)
+        """
+        before = conn.total_changes
+        with conn:
+            self.command(conn, 'merge', -pages if full else pages)
+        # 할 일이 없으면 변경된 행이 2개 미만 (FTS5 문서 기준)
+        return conn.total_changes - before >= 2
+
+    def merge_idle(self, time_budget=1.0, pages=MERGE_PAGES):
+        """시간 예산 안에서 merge 단계 반복. 실행한 단계 수 반환"""
+        start_time = time.time()
+        conn = self.connect()
+        steps = 0
+        try:
+            while time.time() - start_time < time_budget:
+                steps += 1
+                if not self.merge_step(conn, pages, full=True):
+                    break
+        finally:
+            conn.close()
+        return steps
+
+    def optimize(self):
+        """모든 세그먼트를 하나로 병합 (대량 배치 후)"""
+        conn = self.connect()
+        with conn:
+            self.command(conn, 'optimize')
+        conn.close()
+
+    def after_batch(self, added_rows, time_budget=0.5):
+        """배치 후 유지보수: 대량이면 optimize, 아니면 제한된 merge. 실행한 작업 이름 반환"""
+        if added_rows >= OPTIMIZE_THRESHOLD:
+            self.optimize()
+            return 'optimize'
+        if added_rows > 0:
+            self.merge_idle(time_budget)
+            return 'merge'
+        return None
+
+
+# 테스트
+if __name__ == "__main__":
+    import sys
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "working_subtitles_v2.db"
+    action = sys.argv[2] if len(sys.argv) > 2 else 'stats'
+    fts = FtsMaintenance(db_path)
+
+    if action == 'optimize':
+        start = time.time()
+        fts.optimize()
+        print(f"✅ optimize 완료 ({time.time() - start:.2f}초)")
+    elif action == 'merge':
+        steps = fts.merge_idle(time_budget=10.0)
+        print(f"✅ merge {steps}단계 실행")
+
+    stats = fts.segment_stats()
+    print(f"🔍 FTS 세그먼트: {stats['segments']}개, 인덱스 크기: {stats['index_bytes'] / (1024 * 1024):.2f} MB")
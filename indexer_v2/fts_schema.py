@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+외부 콘텐츠(external content) FTS 동기화
+- subtitles의 INSERT/UPDATE/DELETE 트리거가 subtitles_fts를 갱신 (코드에서 FTS에 직접 쓰지 않음)
+- 삭제/수정은 FTS5 'delete' 명령에 이전 값을 넘겨야 인덱스에서 정확히 빠짐
+- 대량 적재 시에는 트리거를 내리고 적재 후 'rebuild' 한 번으로 FTS를 다시 만듦
+- FTS 레이아웃:
+  standard: text + 경로/언어 컬럼까지 색인 (기존 구조)
+  compact:  text만 색인 (경로 토큰 제거). 구문 검색 가능
+  minimal:  text만 색인 + detail=none (위치 정보 없음 → 가장 작음). 구문/NEAR 검색 불가, 단어/접두사 검색만
+  partitioned: compact + 언어별 FTS 테이블(subtitles_fts_en, subtitles_fts_ko)
+               언어 필터 검색은 해당 언어 테이블만 검색 (search_source 참고), 전체 검색은 subtitles_fts
+               언어별 테이블의 외부 콘텐츠는 해당 언어 행만 보이는 뷰(subtitles_en, subtitles_ko)
+               (subtitles 전체를 콘텐츠로 두면 다른 언어 행이 인덱스에 없어서 integrity-check가 항상 실패)
+  언어/경로 필터는 그 외 레이아웃에서는 subtitles 컬럼으로 처리 (s.language = ?)
+  MATCH 대상은 match_column()으로 선택 (detail=none은 컬럼 필터를 지원하지 않으므로 text만 있는 레이아웃은 테이블 전체로 검색)
+"""
+
+FTS_TABLE = 'subtitles_fts'
+FTS_LAYOUTS = {
+    'standard': {'columns': ('text', 'media_file', 'language', 'directory'), 'options': ''},
+    'compact': {'columns': ('text',), 'options': ''},
+    'minimal': {'columns': ('text',), 'options': ', detail=none'},
+    'partitioned': {'columns': ('text',), 'options': ''},
+}
+PARTITION_LANGUAGES = ('en', 'ko')
+DEFAULT_LAYOUT = 'standard'
+TRIGGER_NAMES = ('subtitles_fts_ai', 'subtitles_fts_ad', 'subtitles_fts_au')
+
+# 대량 적재 중이면 metadata에 기록 (중간에 종료되면 다음 시작 시 rebuild로 복구)
+BULK_LOAD_KEY = 'fts_bulk_load'
+
+
+def current_layout(cursor):
+    """기존 FTS 테이블의 레이아웃 (CREATE 문에서 판별). 테이블이 없으면 None"""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    sql = row[0].lower()
+    if 'media_file' in sql:
+        return 'standard'
+    if 'detail=none' in sql.replace(' ', ''):
+        return 'minimal'
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (partition_table(PARTITION_LANGUAGES[0]),))
+    return 'partitioned' if cursor.fetchone() else 'compact'
+
+
+def partition_table(language):
+    return f"{FTS_TABLE}_{language}"
+
+
+def partition_source(language):
+    """언어별 FTS 테이블의 콘텐츠 뷰"""
+    return f"subtitles_{language}"
+
+
+def create_partition(cursor, language):
+    """언어별 콘텐츠 뷰 + FTS 테이블 (채우기는 rebuild)"""
+    source = partition_source(language)
+    cursor.execute(f"""
+        CREATE VIEW IF NOT EXISTS {source} AS
+        SELECT id, text FROM subtitles WHERE language = '{language}'
+    """)
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE {partition_table(language)} USING fts5(
+            text,
+            content='{source}',
+            content_rowid='id'
+        )
+    """)
+
+
+def drop_partitions(cursor):
+    for language in PARTITION_LANGUAGES:
+        cursor.execute(f"DROP TABLE IF EXISTS {partition_table(language)}")
+        cursor.execute(f"DROP VIEW IF EXISTS {partition_source(language)}")
+
+
+def upgrade_partitions(cursor):
+    """
+    예전 partitioned DB(언어별 테이블의 콘텐츠가 subtitles 전체)면 언어별 뷰로 다시 만들고 rebuild
+    트리거는 테이블 이름으로 연결되어 있어서 그대로 사용. 다시 만들었으면 True
+    """
+    if current_layout(cursor) != 'partitioned':
+        return False
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?",
+                   (partition_table(PARTITION_LANGUAGES[0]),))
+    if f"content='{partition_source(PARTITION_LANGUAGES[0])}'" in cursor.fetchone()[0]:
+        return False
+    drop_partitions(cursor)
+    for language in PARTITION_LANGUAGES:
+        create_partition(cursor, language)
+        table = partition_table(language)
+        cursor.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+    return True
+
+
+def fts_tables(cursor):
+    """현재 레이아웃의 FTS 테이블 목록 (유지보수용)"""
+    layout = current_layout(cursor)
+    if layout is None:
+        return []
+    if layout == 'partitioned':
+        return [FTS_TABLE] + [partition_table(language) for language in PARTITION_LANGUAGES]
+    return [FTS_TABLE]
+
+
+def search_source(layout, language, alias='fts'):
+    """
+    검색 라우터: (FROM 절 FTS 테이블, MATCH 대상, s.language 필터 필요 여부)
+    partitioned 레이아웃에서 언어 필터가 있으면 해당 언어 테이블만 검색
+    """
+    if layout == 'partitioned' and language in PARTITION_LANGUAGES:
+        table = partition_table(language)
+        return table, f"{alias}.{table}", False
+    return FTS_TABLE, match_column(layout, alias), language is not None
+
+
+def match_column(layout, alias=FTS_TABLE):
+    """MATCH 왼쪽에 쓸 컬럼. 여러 컬럼 레이아웃은 text 컬럼만, text만 있는 레이아웃은 테이블 전체(숨은 컬럼)"""
+    if len(FTS_LAYOUTS[layout or DEFAULT_LAYOUT]['columns']) > 1:
+        return f"{alias}.text"
+    return f"{alias}.{FTS_TABLE}"
+
+
+def create_fts_table(cursor, layout=DEFAULT_LAYOUT):
+    """외부 콘텐츠 FTS 테이블 생성 (subtitles에 데이터가 있으면 rebuild로 채움)"""
+    spec = FTS_LAYOUTS[layout]
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {', '.join(spec['columns'])},
+            content='subtitles',
+            content_rowid='id'{spec['options']}
+        )
+    """)
+    if layout == 'partitioned':
+        for language in PARTITION_LANGUAGES:
+            create_partition(cursor, language)
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM subtitles)")
+    if cursor.fetchone()[0]:
+        rebuild(cursor)
+
+
+def change_layout(cursor, layout):
+    """FTS 레이아웃 변경 (트리거와 FTS 테이블을 새로 만들고 rebuild). 변경했으면 True"""
+    if current_layout(cursor) == layout:
+        return False
+    drop_triggers(cursor)
+    cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    drop_partitions(cursor)
+    create_fts_table(cursor, layout)
+    create_triggers(cursor)
+    return True
+
+
+def column_values(prefix, columns):
+    return ', '.join(f'{prefix}.{column}' for column in columns)
+
+
+def trigger_names(layout):
+    names = list(TRIGGER_NAMES)
+    if layout == 'partitioned':
+        for language in PARTITION_LANGUAGES:
+            names.extend(f"{partition_table(language)}_{suffix}" for suffix in ('ai', 'ad', 'au'))
+    return names
+
+
+def create_partition_triggers(cursor, language):
+    """언어별 테이블 트리거: 해당 언어 행만 반영 (UPDATE로 언어가 바뀌면 옮겨짐)"""
+    table = partition_table(language)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON subtitles WHEN new.language = '{language}' BEGIN
+            INSERT INTO {table}(rowid, text) VALUES (new.id, new.text);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON subtitles WHEN old.language = '{language}' BEGIN
+            INSERT INTO {table}({table}, rowid, text) VALUES ('delete', old.id, old.text);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON subtitles
+        WHEN old.language = '{language}' OR new.language = '{language}' BEGIN
+            INSERT INTO {table}({table}, rowid, text)
+                SELECT 'delete', old.id, old.text WHERE old.language = '{language}';
+            INSERT INTO {table}(rowid, text)
+                SELECT new.id, new.text WHERE new.language = '{language}';
+        END
+    """)
+
+
+def create_triggers(cursor):
+    """현재 FTS 레이아웃의 컬럼에 맞춰 동기화 트리거 생성"""
+    layout = current_layout(cursor)
+    if layout == 'partitioned':
+        for language in PARTITION_LANGUAGES:
+            create_partition_triggers(cursor, language)
+    fts_columns = FTS_LAYOUTS[layout]['columns']
+    columns = ', '.join(fts_columns)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS subtitles_fts_ai AFTER INSERT ON subtitles BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {column_values('new', fts_columns)});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS subtitles_fts_ad AFTER DELETE ON subtitles BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {column_values('old', fts_columns)});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS subtitles_fts_au AFTER UPDATE ON subtitles BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {column_values('old', fts_columns)});
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {column_values('new', fts_columns)});
+        END
+    """)
+
+
+def drop_triggers(cursor):
+    for name in trigger_names('partitioned'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def triggers_installed(cursor):
+    names = trigger_names(current_layout(cursor))
+    placeholders = ', '.join('?' for _ in names)
+    cursor.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name IN ({placeholders})",
+                   names)
+    return cursor.fetchone()[0] == len(names)
+
+
+def rebuild(cursor):
+    """
+    subtitles 테이블 내용으로 FTS 인덱스 전체 재구성
+    언어별 테이블은 콘텐츠 뷰에 해당 언어 행만 있으므로 같은 'rebuild'로 충분
+    """
+    for table in fts_tables(cursor):
+        cursor.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+
+
+def integrity_check(cursor):
+    """모든 FTS 테이블(언어별 테이블 포함)이 콘텐츠와 일치하는지 검사 (불일치면 sqlite3.DatabaseError)"""
+    for table in fts_tables(cursor):
+        cursor.execute(f"INSERT INTO {table}({table}, rank) VALUES('integrity-check', 1)")
+
+
+# 레이아웃 변경
+if __name__ == "__main__":
+    import sys
+
+    import db_access
+    import time
+
+    if len(sys.argv) < 3 or sys.argv[2] not in FTS_LAYOUTS:
+        print(f"사용법: python fts_schema.py <DB 경로> <{'|'.join(FTS_LAYOUTS)}>")
+        sys.exit(1)
+
+    conn = db_access.connect(sys.argv[1], 'maintenance')
+    cursor = conn.cursor()
+    print(f"현재 레이아웃: {current_layout(cursor)}")
+
+    start = time.time()
+    with conn:
+        changed = change_layout(cursor, sys.argv[2])
+    if changed:
+        conn.execute("VACUUM")
+        print(f"✅ {sys.argv[2]} 레이아웃으로 변경 완료 ({time.time() - start:.1f}초)")
+    else:
+        print("ℹ️  이미 같은 레이아웃입니다.")
+    conn.close()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+인덱싱 단계별 시간 측정과 프로파일러 연결
+- StageTimer: 단계(scan / probe / checkpoint / parse / detect / clean / insert / maintenance / rebuild)별
+  누적 시간과 처리량(파일/초, 자막/초, 바이트/초)
+- StageTimer.add는 metrics 레지스트리에도 누적 (indexer_stage_seconds_total 등, /metrics로 노출)
+- profiled: index_directory를 cProfile 또는 pyinstrument(설치된 경우)로 감싸는 선택적 훅
+"""
+
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import metrics
+
+# 출력 순서 (인덱싱 흐름 순)
+STAGES = ('scan', 'probe', 'checkpoint', 'dedup', 'parse', 'detect', 'clean', 'cluster', 'insert', 'maintenance', 'rebuild')
+STAGE_NAMES = {
+    'scan': '디렉토리 스캔',
+    'probe': '미디어 정보',
+    'checkpoint': '체크포인트 확인',
+    'dedup': '중복 파일 확인',
+    'parse': 'SRT 파싱',
+    'detect': '언어 감지',
+    'clean': '텍스트 정리',
+    'cluster': '중복 묶음',
+    'insert': 'DB 저장',
+    'maintenance': 'FTS 병합/테마',
+    'rebuild': 'FTS 재구성',
+}
+PROFILERS = ('cprofile', 'pyinstrument')
+
+STAGE_SECONDS = metrics.counter('indexer_stage_seconds', "인덱싱 단계별 누적 시간 (초)", ('stage',))
+STAGE_FILES = metrics.counter('indexer_stage_files', "인덱싱 단계별 처리 파일 수", ('stage',))
+STAGE_CUES = metrics.counter('indexer_stage_cues', "인덱싱 단계별 처리 자막 수", ('stage',))
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def reset(self):
+        self.stages.clear()
+
+    def add(self, name, seconds, files=0, cues=0, bytes=0):
+        totals = self.stages.setdefault(name, {'seconds': 0.0, 'files': 0, 'cues': 0, 'bytes': 0})
+        totals['seconds'] += seconds
+        totals['files'] += files
+        totals['cues'] += cues
+        totals['bytes'] += bytes
+        STAGE_SECONDS.labels(stage=name).inc(seconds)
+        if files:
+            STAGE_FILES.labels(stage=name).inc(files)
+        if cues:
+            STAGE_CUES.labels(stage=name).inc(cues)
+
+    @contextmanager
+    def stage(self, name, files=0, cues=0, bytes=0):
+        """with 블록 시간 측정. 처리량은 블록 안에서 counts['files'] 등으로 채울 수 있음"""
+        counts = {'files': files, 'cues': cues, 'bytes': bytes}
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            self.add(name, time.perf_counter() - start, **counts)
+
+    def report(self):
+        """단계별 시간, 비율, 처리량 (JSON 저장용)"""
+        total = sum(stage['seconds'] for stage in self.stages.values())
+        names = [name for name in STAGES if name in self.stages] + \
+                [name for name in self.stages if name not in STAGES]
+        stages = {}
+        for name in names:
+            stage = self.stages[name]
+            seconds = stage['seconds']
+            entry = {'seconds': round(seconds, 4), 'share': round(seconds / total, 4) if total else 0.0}
+            for unit in ('files', 'cues', 'bytes'):
+                if stage[unit]:
+                    entry[unit] = stage[unit]
+                    entry[f'{unit}_per_second'] = round(stage[unit] / seconds, 1) if seconds else None
+            stages[name] = entry
+        return {'total_seconds': round(total, 4), 'stages': stages}
+
+    def print_report(self):
+        report = self.report()
+        if not report['stages']:
+            return
+        print(f"\n⏱️  단계별 시간 (합계 {report['total_seconds']:.2f}초)")
+        for name, stage in report['stages'].items():
+            rates = []
+            if stage.get('files_per_second'):
+                rates.append(f"{stage['files_per_second']:,.0f} 파일/초")
+            if stage.get('cues_per_second'):
+                rates.append(f"{stage['cues_per_second']:,.0f} 자막/초")
+            if stage.get('bytes_per_second'):
+                rates.append(f"{stage['bytes_per_second'] / (1024 * 1024):,.1f} MB/초")
+            print(f"   {STAGE_NAMES.get(name, name):12s}{stage['seconds']:8.2f}초 {stage['share'] * 100:5.1f}%"
+                  f"  {', '.join(rates)}")
+
+
+def output_path(output, label):
+    """디렉토리마다 따로 저장: results.prof → results_Drama.prof"""
+    if not output or not label:
+        return output
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}_{label}{path.suffix}"))
+
+
+@contextmanager
+def run_cprofile(output=None, top=25):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if output:
+            profiler.dump_stats(output)
+            print(f"💾 cProfile 결과 저장: {output} (python -m pstats {output})")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+        print(stream.getvalue())
+
+
+@contextmanager
+def run_pyinstrument(output=None):
+    from pyinstrument import Profiler
+
+    profiler = Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            print(f"💾 pyinstrument 결과 저장: {output}")
+        print(profiler.output_text(unicode=True))
+
+
+def profiled(kind=None, output=None, label=None):
+    """
+    kind: None(프로파일 없음) / 'cprofile' / 'pyinstrument'
+    pyinstrument가 설치되어 있지 않으면 cProfile 사용
+    """
+    if kind is None:
+        return nullcontext()
+    if kind not in PROFILERS:
+        raise ValueError(f"알 수 없는 프로파일러: {kind} (가능: {', '.join(PROFILERS)})")
+    output = output_path(output, label)
+    if kind == 'pyinstrument':
+        try:
+            import pyinstrument  # noqa: F401
+            return run_pyinstrument(output)
+        except ImportError:
+            print("⚠️  pyinstrument가 설치되어 있지 않아 cProfile을 사용합니다. (pip install pyinstrument)")
+    return run_cprofile(output)
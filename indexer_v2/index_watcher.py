@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+인덱스 감시 모드
+- 로컬 파일시스템: inotify (ctypes로 libc 직접 호출, 추가 패키지 없음)
+- 네트워크 마운트(SMB/NFS 등, inotify 이벤트가 오지 않음): 주기적으로 .srt 파일의 크기/mtime을 비교하는 폴러
+- 이벤트는 파일별로 디바운스(마지막 이벤트 후 일정 시간 조용해지면 처리)해서 복사 중인 파일을 여러 번 인덱싱하지 않음
+- 변경된 자막만 WorkingIndexer.index_subtitle_file로 교체/삭제 → 전체 스캔 없이 몇 초 안에 검색 가능
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from media_scanner import MediaScanner, MEDIA_EXTENSIONS, SKIP_PREFIXES
+
+# inotify 이벤트 마스크 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+# inotify가 동작하지 않는 파일시스템 (/proc/mounts의 fstype)
+NETWORK_FILESYSTEMS = {'cifs', 'smb3', 'smbfs', 'nfs', 'nfs4', 'afs', 'ceph', 'glusterfs', '9p'}
+
+
+def is_network_mount(path):
+    """경로가 네트워크 파일시스템 위에 있는지 (/proc/mounts에서 가장 긴 마운트 포인트 기준)"""
+    path = os.path.realpath(path)
+    best_mount, best_type = '', ''
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point = parts[1].replace('\\040', ' ')
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) \
+                        and len(mount_point) > len(best_mount):
+                    best_mount, best_type = mount_point, parts[2]
+    except OSError:
+        return False
+    return best_type in NETWORK_FILESYSTEMS or best_type.startswith('fuse.')
+
+
+def is_watched_file(name):
+    """자막(.srt) 또는 미디어 파일인지"""
+    ext = os.path.splitext(name)[1].lower()
+    return ext == '.srt' or ext in MEDIA_EXTENSIONS
+
+
+def subtitles_for(path):
+    """변경된 파일에 해당하는 자막 경로 목록 (미디어 파일이면 짝이 되는 .srt/_ko.srt)"""
+    path = Path(path)
+    if path.suffix.lower() == '.srt':
+        return [path]
+    return [path.with_suffix('.srt'), path.parent / f"{path.stem}_ko.srt"]
+
+
+class InotifyBackend:
+    """inotify 기반 감시 (디렉토리마다 watch 등록, 새 디렉토리는 생기는 즉시 등록)"""
+
+    def __init__(self, roots):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+
+        self.watches = {}
+        self.roots = [str(root) for root in roots]
+        self.overflowed = False
+        # 트리 밖으로 옮겨졌거나 이름이 바뀐 디렉토리 (이전 경로). 그 아래 자막은 감시 루프가 DB에서 찾아 삭제
+        self.moved_directories = []
+        for root in self.roots:
+            self.add_tree(root)
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            print(f"   ⚠️  감시 등록 실패: {directory} ({os.strerror(errno)})")
+            return
+        self.watches[wd] = directory
+
+    def remove_subtree_watches(self, directory):
+        """옮겨진 디렉토리와 하위 디렉토리의 watch 해제 (이전 경로로 이벤트가 들어오지 않게)"""
+        prefix = directory.rstrip('/') + '/'
+        for wd, path in list(self.watches.items()):
+            if path == directory or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def add_tree(self, root):
+        """디렉토리 트리 전체에 watch 등록. 등록 중에 이미 들어온 파일 목록 반환"""
+        existing = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            self.add_watch(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(SKIP_PREFIXES):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif is_watched_file(entry.name):
+                            existing.append(entry.path)
+            except OSError:
+                pass
+        return existing
+
+    def read_events(self, timeout):
+        """timeout(초) 동안 이벤트를 기다려서 변경된 파일 경로 목록 반환"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        data = os.read(self.fd, 64 * 1024)
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None or not name or name.startswith(SKIP_PREFIXES):
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & IN_MOVED_FROM:
+                    # 옮겨진 디렉토리: 이전 경로 아래 자막은 삭제, 트리 안으로 옮겨졌으면 IN_MOVED_TO에서 다시 등록
+                    self.remove_subtree_watches(path)
+                    self.moved_directories.append(path)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # 새 디렉토리: watch 등록 전에 복사된 파일도 놓치지 않도록 현재 목록을 같이 반환
+                    paths.extend(self.add_tree(path))
+                continue
+
+            if is_watched_file(name):
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """네트워크 마운트용: .srt/미디어 파일의 (크기, mtime) 스냅샷을 주기적으로 비교"""
+
+    def __init__(self, roots, interval=60):
+        self.roots = [str(root) for root in roots]
+        self.interval = interval
+        self.snapshot = self.take_snapshot()
+        self.next_poll = time.monotonic() + interval
+
+    def take_snapshot(self):
+        snapshot = {}
+        stack = list(self.roots)
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(SKIP_PREFIXES):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif is_watched_file(entry.name):
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                pass
+        return snapshot
+
+    def read_events(self, timeout):
+        wait = self.next_poll - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if time.monotonic() < self.next_poll:
+                return []
+
+        current = self.take_snapshot()
+        paths = [path for path, state in current.items() if self.snapshot.get(path) != state]
+        paths.extend(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        self.next_poll = time.monotonic() + self.interval
+        return paths
+
+    def close(self):
+        pass
+
+
+class IndexWatcher:
+    def __init__(self, indexer, roots=None, debounce=2.0, poll_interval=60, merge_interval=60):
+        """
+        Args:
+            indexer: WorkingIndexer
+            roots: 감시할 디렉토리 목록 (기본: indexer.media_root)
+            debounce: 마지막 이벤트 후 이 시간(초) 동안 조용하면 처리
+            poll_interval: 네트워크 마운트 폴링 주기(초)
+            merge_interval: 변경이 없을 때 FTS 세그먼트 병합을 시도하는 주기(초)
+        """
+        self.indexer = indexer
+        self.roots = [Path(root) for root in (roots or [indexer.media_root])]
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.merge_interval = merge_interval
+        self.pending = {}
+        self.backends = []
+        self.next_merge = time.monotonic() + merge_interval
+
+    def start_backends(self):
+        """루트별로 inotify / 폴링 선택 (네트워크 마운트는 폴링)"""
+        local_roots = []
+        network_roots = []
+        for root in self.roots:
+            if is_network_mount(root) or not InotifyBackend.available():
+                network_roots.append(root)
+            else:
+                local_roots.append(root)
+
+        if local_roots:
+            try:
+                self.backends.append(InotifyBackend(local_roots))
+                print(f"👀 inotify 감시: {', '.join(map(str, local_roots))}")
+            except OSError as e:
+                print(f"⚠️  inotify 사용 불가 ({e}) - 폴링으로 전환")
+                network_roots.extend(local_roots)
+
+        if network_roots:
+            self.backends.append(PollingBackend(network_roots, self.poll_interval))
+            print(f"🔁 폴링 감시 ({self.poll_interval}초 주기): {', '.join(map(str, network_roots))}")
+
+    def directory_for(self, srt_path):
+        """자막 행에 기록할 디렉토리 (media_root면 카테고리, 그 외 루트는 루트 자체 - index_directory와 동일)"""
+        for root in self.roots:
+            if root == self.indexer.media_root:
+                continue
+            if Path(srt_path).is_relative_to(root):
+                return root
+        return self.indexer.category_directory(srt_path)
+
+    def catch_up(self):
+        """
+        감시 시작 전에 추가/삭제/수정된 자막 반영
+        (DB에 있는 자막 파일 목록과 현재 트리 비교, 수정은 체크포인트의 크기/mtime과 비교)
+        """
+        indexed = self.indexer.indexed_subtitle_files()
+        checkpoints = self.indexer.load_checkpoints()
+        on_disk = set()
+        scanner = MediaScanner()
+        for root in self.roots:
+            for pair in scanner.find_media_and_subtitles(root):
+                on_disk.update(str(srt) for srt in pair['subtitle_files'])
+
+        now = time.monotonic()
+        for path in on_disk - indexed:
+            self.pending[path] = now
+        for path in indexed - on_disk:
+            if any(Path(path).is_relative_to(root) for root in self.roots):
+                self.pending[path] = now
+        for path in on_disk & indexed:
+            try:
+                if checkpoints.get(path) != self.indexer.file_signature(path):
+                    self.pending[path] = now
+            except OSError:
+                # 비교 중에 삭제됨 - 삭제 이벤트로 처리
+                self.pending[path] = now
+
+        if self.pending:
+            print(f"📋 감시 시작 전 변경: {len(self.pending)}개 자막 파일")
+
+    def queue_moved_directories(self, directories):
+        """옮겨진 디렉토리의 이전 경로 아래에 인덱싱된 자막을 처리 대기열에 추가 (파일이 없으므로 삭제됨)"""
+        now = time.monotonic()
+        for path in self.indexer.indexed_subtitle_files():
+            if any(Path(path).is_relative_to(directory) for directory in directories):
+                self.pending[path] = now
+
+    def queue(self, paths):
+        now = time.monotonic()
+        for path in paths:
+            for srt_path in subtitles_for(path):
+                self.pending[str(srt_path)] = now
+
+    def flush(self, force=False):
+        """디바운스 시간이 지난 자막 파일 처리. 처리한 파일 수 반환"""
+        now = time.monotonic()
+        ready = [path for path, last in self.pending.items() if force or now - last >= self.debounce]
+        if not ready:
+            return 0
+
+        results = {'indexed': 0, 'removed': 0, 'skipped': 0}
+        for path in sorted(ready):
+            del self.pending[path]
+            try:
+                result = self.indexer.index_subtitle_file(path, self.directory_for(path))
+                results[result] += 1
+            except Exception as e:
+                print(f"   ❌ {path} 처리 실패: {e}")
+
+        if results['indexed'] or results['removed']:
+            self.indexer.update_theme_hits()
+            self.indexer.update_metadata("last_indexing", datetime.now().isoformat())
+            print(f"✅ 증분 인덱싱: 갱신 {results['indexed']}개, 삭제 {results['removed']}개 "
+                  f"({datetime.now().strftime('%H:%M:%S')})")
+        return results['indexed'] + results['removed']
+
+    def run(self, catch_up=True):
+        """감시 루프 (Ctrl+C로 종료)"""
+        self.start_backends()
+        if catch_up:
+            self.catch_up()
+
+        timeout = min(self.debounce, 1.0)
+        # 마지막 증분 인덱싱 후 병합할 세그먼트가 남아 있는지
+        dirty = False
+        try:
+            while True:
+                for backend in self.backends:
+                    # 여러 백엔드가 있으면 각각 짧게 기다림
+                    self.queue(backend.read_events(timeout / len(self.backends)))
+                    if getattr(backend, 'overflowed', False):
+                        # 이벤트 큐가 넘쳤으면 누락분을 DB와 비교해서 복구
+                        print("⚠️  inotify 이벤트 큐 초과 - 트리를 다시 비교합니다")
+                        backend.overflowed = False
+                        self.catch_up()
+                    if getattr(backend, 'moved_directories', None):
+                        self.queue_moved_directories(backend.moved_directories)
+                        backend.moved_directories = []
+                if self.flush():
+                    dirty = True
+                    self.next_merge = time.monotonic() + self.merge_interval
+                elif dirty and not self.pending and time.monotonic() >= self.next_merge:
+                    # 유휴 시간: 증분 갱신으로 쌓인 작은 세그먼트를 제한된 단계로 병합
+                    self.indexer.fts.merge_idle(time_budget=1.0)
+                    dirty = False
+        except KeyboardInterrupt:
+            print("\n👋 감시 종료")
+        finally:
+            self.flush(force=True)
+            for backend in self.backends:
+                backend.close()
+
+
+# 테스트
+if __name__ == "__main__":
+    import argparse
+
+    from working_indexer import WorkingIndexer
+
+    parser = argparse.ArgumentParser(description="자막 인덱스 감시 모드")
+    parser.add_argument('roots', nargs='*', help='감시할 디렉토리 (기본: /mnt/qnap/media_eng)')
+    parser.add_argument('--db', default='working_subtitles_v2.db')
+    parser.add_argument('--debounce', type=float, default=2.0)
+    parser.add_argument('--poll-interval', type=int, default=60)
+    parser.add_argument('--no-catch-up', action='store_true', help='시작 시 DB와 트리 비교 생략')
+    args = parser.parse_args()
+
+    indexer = WorkingIndexer(args.db)
+    watcher = IndexWatcher(indexer, args.roots or None, args.debounce, args.poll_interval)
+    watcher.run(catch_up=not args.no_catch_up)
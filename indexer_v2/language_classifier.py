@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+자막 파일 단위 언어 분류
+- SRT 파일 하나당 한 번, 고르게 뽑은 자막 샘플의 문자 히스토그램(한글/라틴 글자 수)으로 판정
+- 글자 수는 str.translate 한 번으로 한글/라틴 글자를 표시 문자로 바꾼 뒤 count (문자 단위 파이썬 루프 없음)
+- 파일명 힌트(_ko)는 글자만으로 판정할 수 없을 때만 사용 (영어 자막이 _ko 파일에 들어 있어도 en)
+- 자막별 판정은 두 문자 체계가 확실히 섞인 파일(이중 자막 등)에서만 사용.
+  그 외에는 파일 언어를 모든 자막에 적용하므로 영어 자막의 한글 한두 글자로 ko가 되지 않음
+- 글자 수는 서식 태그(<font color=...>, <i>, {\an8})를 지운 뒤 셈 (인덱서 clean_text와 같은 태그 패턴)
+"""
+
+import re
+
+from sentence_extractor import HANGUL_RANGES, LATIN_RANGES
+
+# 샘플: 파일 전체에 고르게 떨어진 SAMPLE_BLOCKS개 구간 × 구간당 연속 자막 BLOCK_CUES개
+# (연속 구간이라 영어/한글이 한 줄씩 번갈아 나오는 파일도 샘플에 두 언어가 모두 들어감)
+SAMPLE_BLOCKS = 8
+BLOCK_CUES = 8
+# 한글 음절 하나 ≈ 라틴 글자 몇 개 (같은 대사의 글자 수 비율)
+HANGUL_WEIGHT = 2.5
+# 가중 한글 비율이 이 값 이상이면 ko, 1 - 값 이하이면 en, 그 사이면 mixed
+DOMINANT_SHARE = 0.8
+MIXED = 'mixed'
+
+# 서식 태그: HTML 태그와 ASS 재정의 블록 (태그 안의 라틴 글자가 한국어 자막을 en/mixed로 만들지 않게)
+MARKUP = re.compile(r'<[^>]+>|{[^}]*}')
+
+HANGUL_MARK = '\x01'
+LATIN_MARK = '\x02'
+
+
+def _ranges_to_codepoints(ranges):
+    """'A-Za-z' 형식의 범위 문자열 → 코드 포인트 목록"""
+    codepoints = []
+    i = 0
+    while i < len(ranges):
+        if i + 2 < len(ranges) and ranges[i + 1] == '-':
+            start, end = ord(ranges[i]), ord(ranges[i + 2])
+            i += 3
+        else:
+            start = end = ord(ranges[i])
+            i += 1
+        codepoints.extend(range(start, end + 1))
+    return codepoints
+
+
+# 한 번의 translate로 한글 → HANGUL_MARK, 라틴 → LATIN_MARK (원문에 있던 표시 문자는 삭제) 후 count
+SCRIPT_TABLE = str.maketrans({
+    HANGUL_MARK: None, LATIN_MARK: None,
+    **dict.fromkeys(_ranges_to_codepoints(HANGUL_RANGES), HANGUL_MARK),
+    **dict.fromkeys(_ranges_to_codepoints(LATIN_RANGES), LATIN_MARK),
+})
+
+
+def script_counts(text):
+    """(한글 글자 수, 라틴 글자 수) - 서식 태그 제외"""
+    marked = MARKUP.sub('', text).translate(SCRIPT_TABLE)
+    return marked.count(HANGUL_MARK), marked.count(LATIN_MARK)
+
+
+def hangul_share(hangul, latin):
+    """가중 한글 비율 (글자가 없으면 None)"""
+    weighted = hangul * HANGUL_WEIGHT
+    total = weighted + latin
+    return weighted / total if total else None
+
+
+def filename_hint(filename):
+    return 'ko' if '_ko' in filename.lower() else 'en'
+
+
+def sample(texts, blocks=SAMPLE_BLOCKS, block_cues=BLOCK_CUES):
+    """자막 목록에서 고르게 떨어진 연속 구간들을 뽑아 한 문자열로 (짧은 파일은 전체)"""
+    if len(texts) <= blocks * block_cues:
+        return '\n'.join(texts)
+    stride = (len(texts) - block_cues) // (blocks - 1)
+    return '\n'.join('\n'.join(texts[i * stride:i * stride + block_cues]) for i in range(blocks))
+
+
+def classify_file(texts, filename=''):
+    """
+    자막 텍스트 목록 → 'en' / 'ko' / 'mixed'
+    글자가 거의 없는 파일(음악 기호만 있는 자막 등)은 파일명 힌트 사용
+    """
+    share = hangul_share(*script_counts(sample(texts)))
+    if share is None:
+        return filename_hint(filename)
+    if share >= DOMINANT_SHARE:
+        return 'ko'
+    if share <= 1 - DOMINANT_SHARE:
+        return 'en'
+    return MIXED
+
+
+def classify_cue(text, fallback):
+    """mixed 파일의 자막 한 줄: 가중 글자 수가 많은 쪽. 글자가 없으면 fallback"""
+    share = hangul_share(*script_counts(text))
+    if share is None:
+        return fallback
+    return 'ko' if share >= 0.5 else 'en'
+
+
+def cue_languages(texts, filename=''):
+    """
+    자막 목록의 언어 목록 (인덱서용)
+    파일 언어가 정해지면 모든 자막에 같은 값, mixed 파일만 자막별로 판정
+    """
+    language = classify_file(texts, filename)
+    if language != MIXED:
+        return [language] * len(texts)
+    fallback = filename_hint(filename)
+    return [classify_cue(text, fallback) for text in texts]
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+미디어 파일 정보 캐시 (ffprobe)
+- media_info: 미디어 파일별 길이, 컨테이너, 비디오/오디오 코덱, 오디오 트랙 수, 스트림 목록
+- (크기, mtime_ns)가 같으면 다시 검사하지 않음. 인덱서가 디렉토리마다 새/바뀐 미디어만 병렬로 검사
+- ffprobe가 없으면 크기/mtime만 기록하는 stub 행 (나중에 ffprobe가 생기면 다시 검사)
+- 재생/클립 쪽은 ffprobe를 다시 부르지 않고 lookup()으로 읽음: 자막 시간이 영상 길이 안인지, 스트림 복사가 가능한지
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+PROBE_WORKERS = min(8, os.cpu_count() or 1)
+PROBE_TIMEOUT = 30
+# IN (...) 한 번에 넣는 경로 수 (SQLite 변수 개수 제한)
+LOOKUP_CHUNK = 500
+
+# mp4 클립으로 재인코딩 없이 복사할 수 있는 코덱
+STREAM_COPY_VIDEO = {'h264', 'hevc'}
+STREAM_COPY_AUDIO = {'aac', 'mp3', 'ac3', 'eac3', 'opus'}
+
+COLUMNS = ('media_file', 'size', 'mtime_ns', 'probe_tool', 'duration_seconds', 'format_name', 'bit_rate',
+           'video_codec', 'width', 'height', 'audio_codec', 'audio_tracks', 'subtitle_tracks', 'streams', 'error')
+
+
+def create(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS media_info (
+            media_file TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            probe_tool TEXT NOT NULL,
+            duration_seconds REAL,
+            format_name TEXT,
+            bit_rate INTEGER,
+            video_codec TEXT,
+            width INTEGER,
+            height INTEGER,
+            audio_codec TEXT,
+            audio_tracks INTEGER,
+            subtitle_tracks INTEGER,
+            streams TEXT,
+            error TEXT,
+            probed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def ffprobe_path():
+    return shutil.which('ffprobe')
+
+
+def parse_ffprobe(output):
+    """ffprobe -show_format -show_streams JSON → media_info 컬럼 값"""
+    data = json.loads(output)
+    fmt = data.get('format', {})
+    streams = []
+    for stream in data.get('streams', []):
+        entry = {'type': stream.get('codec_type'), 'codec': stream.get('codec_name')}
+        language = stream.get('tags', {}).get('language')
+        if language:
+            entry['language'] = language
+        if stream.get('codec_type') == 'video':
+            entry.update(width=stream.get('width'), height=stream.get('height'))
+        elif stream.get('codec_type') == 'audio':
+            entry['channels'] = stream.get('channels')
+        streams.append(entry)
+
+    video = next((s for s in streams if s['type'] == 'video'), {})
+    audio = [s for s in streams if s['type'] == 'audio']
+    duration = fmt.get('duration')
+    bit_rate = fmt.get('bit_rate')
+    return {
+        'duration_seconds': float(duration) if duration else None,
+        'format_name': fmt.get('format_name'),
+        'bit_rate': int(bit_rate) if bit_rate else None,
+        'video_codec': video.get('codec'),
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'audio_codec': audio[0]['codec'] if audio else None,
+        'audio_tracks': len(audio),
+        'subtitle_tracks': sum(1 for s in streams if s['type'] == 'subtitle'),
+        'streams': json.dumps(streams, ensure_ascii=False),
+    }
+
+
+def probe_file(path, size, mtime_ns, ffprobe=None):
+    """미디어 파일 한 개 검사 → media_info 행 dict (오류도 행으로 기록해서 파일이 바뀔 때까지 재시도하지 않음)"""
+    row = dict.fromkeys(COLUMNS)
+    row.update(media_file=str(path), size=size, mtime_ns=mtime_ns, probe_tool='ffprobe' if ffprobe else 'stub')
+    if not ffprobe:
+        return row
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', str(path)],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+        if result.returncode != 0:
+            row['error'] = result.stderr.strip()[:500] or f"ffprobe 종료 코드 {result.returncode}"
+        else:
+            row.update(parse_ffprobe(result.stdout))
+    except (subprocess.TimeoutExpired, OSError, ValueError) as e:
+        row['error'] = str(e)[:500]
+    return row
+
+
+def cached_signatures(cursor, media_files):
+    """media_file → (크기, mtime_ns, probe_tool)"""
+    cached = {}
+    for i in range(0, len(media_files), LOOKUP_CHUNK):
+        chunk = media_files[i:i + LOOKUP_CHUNK]
+        cursor.execute(f"""
+            SELECT media_file, size, mtime_ns, probe_tool FROM media_info
+            WHERE media_file IN ({','.join('?' * len(chunk))})
+        """, chunk)
+        cached.update((row[0], tuple(row[1:])) for row in cursor.fetchall())
+    return cached
+
+
+def probe_missing(conn, media_files, workers=PROBE_WORKERS, force=False):
+    """
+    캐시에 없거나 (크기, mtime)가 바뀐 미디어만 병렬 검사해서 저장 (커밋은 호출한 쪽)
+    ffprobe가 생겼으면 stub 행도 다시 검사. (검사한 수, 캐시 사용 수) 반환
+    """
+    ffprobe = ffprobe_path()
+    cursor = conn.cursor()
+    media_files = sorted({str(path) for path in media_files})
+    cached = {} if force else cached_signatures(cursor, media_files)
+
+    pending, missing = [], 0
+    for path in media_files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            missing += 1
+            continue
+        entry = cached.get(path)
+        if entry and entry[:2] == (stat.st_size, stat.st_mtime_ns) and (entry[2] == 'ffprobe' or not ffprobe):
+            continue
+        pending.append((path, stat.st_size, stat.st_mtime_ns))
+
+    if not pending:
+        return 0, len(media_files) - missing
+    # ffprobe는 별도 프로세스라 스레드 풀로 충분 (대기 중에는 GIL을 놓음)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+        rows = list(pool.map(lambda item: probe_file(*item, ffprobe=ffprobe), pending))
+    cursor.executemany(f"""
+        INSERT OR REPLACE INTO media_info ({', '.join(COLUMNS)})
+        VALUES ({', '.join('?' * len(COLUMNS))})
+    """, [tuple(row[column] for column in COLUMNS) for row in rows])
+    return len(rows), len(media_files) - len(rows) - missing
+
+
+def lookup(cursor, media_file):
+    """캐시된 미디어 정보 dict (streams는 목록). 없거나 테이블이 없는 DB면 None"""
+    try:
+        cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM media_info WHERE media_file = ?", (str(media_file),))
+    except sqlite3.OperationalError:
+        return None
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    info = dict(zip(COLUMNS, row))
+    info['streams'] = json.loads(info['streams']) if info['streams'] else []
+    return info
+
+
+def cue_fits(info, start_seconds, end_seconds=None):
+    """자막 시간이 영상 길이 안인지. 길이를 모르면 None"""
+    if not info or info['duration_seconds'] is None:
+        return None
+    end = start_seconds if end_seconds is None else end_seconds
+    return 0 <= start_seconds <= end <= info['duration_seconds']
+
+
+def can_stream_copy(info):
+    """mp4 클립을 재인코딩 없이(-c copy) 잘라낼 수 있는지. 코덱을 모르면 None"""
+    if not info or info['video_codec'] is None:
+        return None
+    return info['video_codec'] in STREAM_COPY_VIDEO and \
+        (info['audio_codec'] is None or info['audio_codec'] in STREAM_COPY_AUDIO)
+
+
+def describe(info):
+    """한 줄 요약 (재생/CLI 출력용)"""
+    if info['error']:
+        return f"❌ {info['error']}"
+    if info['probe_tool'] == 'stub':
+        return "ℹ️  ffprobe 없음 (크기/수정 시각만 기록)"
+    parts = []
+    if info['duration_seconds'] is not None:
+        minutes, seconds = divmod(int(info['duration_seconds']), 60)
+        parts.append(f"{minutes // 60:d}:{minutes % 60:02d}:{seconds:02d}")
+    if info['video_codec']:
+        parts.append(f"{info['video_codec']} {info['width']}x{info['height']}")
+    if info['audio_codec']:
+        parts.append(f"{info['audio_codec']} (오디오 {info['audio_tracks']}개)")
+    return ', '.join(parts)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import db_access
+
+    parser = argparse.ArgumentParser(description="미디어 정보 캐시 (ffprobe)")
+    parser.add_argument('--db', default="working_subtitles_v2.db")
+    parser.add_argument('--workers', type=int, default=PROBE_WORKERS)
+    parser.add_argument('--force', action='store_true', help="캐시를 무시하고 모두 다시 검사")
+    parser.add_argument('media_files', nargs='*', help="검사할 미디어 (없으면 DB의 모든 미디어)")
+    args = parser.parse_args()
+
+    conn = db_access.connect(args.db, 'maintenance')
+    cursor = conn.cursor()
+    create(cursor)
+    media_files = args.media_files or [row[0] for row in cursor.execute("SELECT DISTINCT media_file FROM subtitles")]
+    if not ffprobe_path():
+        print("⚠️  ffprobe가 없어 stub 행만 기록합니다. (sudo apt install ffmpeg)")
+
+    start = time.perf_counter()
+    with conn:
+        probed, cached = probe_missing(conn, media_files, args.workers, args.force)
+    print(f"🎞️  미디어 {len(media_files):,}개: 검사 {probed:,}개, 캐시 사용 {cached:,}개 "
+          f"({time.perf_counter() - start:.2f}초)")
+    for media_file in args.media_files:
+        info = lookup(cursor, media_file)
+        if info:
+            print(f"   {os.path.basename(media_file)}: {describe(info)}")
+    conn.close()
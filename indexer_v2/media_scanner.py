@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+미디어/자막 디렉토리 스캐너
+- os.scandir로 디렉토리마다 목록을 한 번만 읽고 DirEntry의 캐시된 타입 정보 사용 (파일별 stat 없음)
+- .srt / _ko.srt 자막은 같은 디렉토리 목록(메모리)에서 짝을 찾음 (exists() 호출 없음)
+- 하위 디렉토리는 스레드 풀로 병렬 탐색 (SMB/NFS 마운트에서 왕복 지연을 겹쳐서 처리)
+"""
+
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+MEDIA_EXTENSIONS = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
+
+# 숨김 디렉토리와 QNAP 시스템 디렉토리(@Recycle, @eaDir 등)는 건너뜀
+SKIP_PREFIXES = ('.', '@')
+# walk(use_cache=True) 결과를 보관하는 루트 수 (오래된 것부터 버림)
+WALK_CACHE_SIZE = 4
+
+
+class DirectoryListing:
+    """디렉토리 한 개의 스캔 결과"""
+    __slots__ = ('path', 'pairs', 'subdirs', 'media_count')
+
+    def __init__(self, path, pairs, subdirs, media_count):
+        self.path = path
+        self.pairs = pairs
+        self.subdirs = subdirs
+        self.media_count = media_count
+
+
+class MediaScanner:
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.errors = []
+        self._walk_cache = {}
+
+    def list_directory(self, path):
+        """디렉토리 목록을 한 번 읽어서 미디어-자막 쌍과 하위 디렉토리 반환"""
+        file_names = set()
+        subdirs = []
+
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.startswith(SKIP_PREFIXES):
+                        continue
+                    # d_type 캐시 사용. 디렉토리 심볼릭 링크는 따라가지 않음 (Disney/link -> .. 같은 순환 방지)
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        file_names.add(entry.name)
+        except OSError as e:
+            self.errors.append((path, str(e)))
+            return DirectoryListing(path, [], [], 0)
+
+        pairs = []
+        media_count = 0
+        for name in sorted(file_names):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in MEDIA_EXTENSIONS:
+                continue
+            media_count += 1
+
+            subtitle_files = []
+            for candidate in (f"{stem}.srt", f"{stem}_ko.srt"):
+                if candidate in file_names:
+                    subtitle_files.append(Path(path) / candidate)
+
+            if subtitle_files:
+                pairs.append((Path(path) / name, subtitle_files))
+
+        return DirectoryListing(path, pairs, subdirs, media_count)
+
+    def walk(self, root, use_cache=False):
+        """루트 아래 모든 디렉토리를 병렬로 스캔해서 DirectoryListing 목록 반환 (경로 순 정렬)"""
+        root = str(root)
+        if use_cache and root in self._walk_cache:
+            return self._walk_cache[root]
+
+        listings = []
+
+        if self.max_workers <= 1:
+            stack = [str(root)]
+            while stack:
+                listing = self.list_directory(stack.pop())
+                listings.append(listing)
+                stack.extend(listing.subdirs)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = {pool.submit(self.list_directory, str(root))}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        listing = future.result()
+                        listings.append(listing)
+                        for subdir in listing.subdirs:
+                            pending.add(pool.submit(self.list_directory, subdir))
+
+        listings.sort(key=lambda listing: listing.path)
+        if use_cache:
+            self._walk_cache[root] = listings
+            while len(self._walk_cache) > WALK_CACHE_SIZE:
+                del self._walk_cache[next(iter(self._walk_cache))]
+        return listings
+
+    def clear_cache(self):
+        """walk 캐시 비우기 (트리가 바뀐 뒤 find_directories를 다시 부를 때)"""
+        self._walk_cache.clear()
+
+    def find_media_and_subtitles(self, directory):
+        """디렉토리에서 미디어-자막 쌍 찾기 (FinalMediaIndexer.find_media_and_subtitles와 같은 형식)"""
+        directory = Path(directory)
+        pairs = []
+        for listing in self.walk(directory):
+            for media_file, subtitle_files in listing.pairs:
+                pairs.append({
+                    'media_file': media_file,
+                    'subtitle_files': subtitle_files,
+                    'directory': directory
+                })
+        return pairs
+
+    def find_media_for_subtitle(self, srt_path):
+        """자막 파일과 짝이 되는 미디어 파일 찾기 (X.srt / X_ko.srt → X.<미디어 확장자>), 없으면 None"""
+        srt_path = Path(srt_path)
+        stem = srt_path.stem
+        if stem.lower().endswith('_ko'):
+            stem = stem[:-3]
+
+        try:
+            with os.scandir(srt_path.parent) as entries:
+                for entry in entries:
+                    name_stem, ext = os.path.splitext(entry.name)
+                    if name_stem == stem and ext.lower() in MEDIA_EXTENSIONS and entry.is_file():
+                        return Path(entry.path)
+        except OSError:
+            pass
+        return None
+
+    def find_directories(self, root, patterns, min_media=1, max_media=30):
+        """
+        스캔 결과(메모리)에서 패턴에 맞는 디렉토리 찾기
+
+        Args:
+            patterns: 루트 기준 상대 경로에 대한 fnmatch 패턴 목록 (앞쪽 패턴 우선)
+                      같은 루트의 스캔 결과는 재사용하므로 여러 번 호출해도 트리는 한 번만 읽음
+            min_media, max_media: 디렉토리 안 미디어 파일 수 범위
+        """
+        root = Path(root)
+        listings = [l for l in self.walk(root, use_cache=True) if min_media <= l.media_count <= max_media]
+
+        matches = []
+        for pattern in patterns:
+            for listing in listings:
+                relative = Path(listing.path).relative_to(root).as_posix()
+                if fnmatch.fnmatch(relative, pattern) and listing.path not in matches:
+                    matches.append(listing.path)
+        return [Path(path) for path in matches]
+
+
+# 테스트
+if __name__ == "__main__":
+    import sys
+    import time
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "/mnt/qnap/media_eng"
+    scanner = MediaScanner()
+
+    start = time.time()
+    pairs = scanner.find_media_and_subtitles(root)
+    elapsed = time.time() - start
+
+    print(f"📁 {root}: 미디어-자막 쌍 {len(pairs):,}개 ({elapsed:.2f}초)")
+    for path, error in scanner.errors[:10]:
+        print(f"   ⚠️  {path}: {error}")
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import sys
 import os
+import re
 from pathlib import Path
 
 # 현재 디렉토리를 Python 경로에 추가
@@ -10,10 +10,16 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from search_interface import SubtitleSearch
 from video_player import VideoPlayer
+import stats_summary
+import db_access
+import fts_schema
+
+# 재인덱싱 결과는 세대별 파일(<DB>.gen-N)에 두고 라이브 경로는 그 파일을 가리키는 심볼릭 링크
+GENERATION_SUFFIX = '.gen-'
 
 class MediaIndexSystem:
-    def __init__(self):
-        self.db_path = "working_subtitles.db"
+    def __init__(self, db_path="working_subtitles.db"):
+        self.db_path = db_path
         self.searcher = SubtitleSearch(self.db_path)
         self.player = VideoPlayer(self.db_path)
         
@@ -23,31 +29,14 @@ class MediaIndexSystem:
             print("❌ 데이터베이스 파일을 찾을 수 없습니다.")
             return False
             
-        conn = sqlite3.connect(self.db_path)
+        conn = db_access.connect(self.db_path, 'serve', query_only=None)
         cursor = conn.cursor()
         
-        # 전체 통계
-        cursor.execute('SELECT COUNT(*) FROM subtitles')
-        total_subtitles = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT media_file) FROM subtitles')
-        total_files = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT directory) FROM subtitles')
-        total_dirs = cursor.fetchone()[0]
-        
-        # 언어별 통계
-        cursor.execute('SELECT language, COUNT(*) FROM subtitles GROUP BY language')
-        lang_stats = cursor.fetchall()
-        
-        # 디렉토리별 통계
-        cursor.execute('''
-            SELECT directory, COUNT(*) as subtitle_count, COUNT(DISTINCT media_file) as file_count
-            FROM subtitles 
-            GROUP BY directory 
-            ORDER BY subtitle_count DESC
-        ''')
-        dir_stats = cursor.fetchall()
+        # 자막 행 대신 인덱서가 갱신하는 요약 테이블에서 집계 (미디어 파일 수에 비례)
+        stats_summary.ensure(conn)
+        total_subtitles, total_files, total_dirs = stats_summary.totals(cursor)
+        lang_stats = stats_summary.language_counts(cursor)
+        dir_stats = stats_summary.directory_counts(cursor)
         
         # 결과 출력
         print("=" * 80)
@@ -131,9 +120,19 @@ class MediaIndexSystem:
                 print(f"❌ 오류 발생: {e}")
     
     def reindex_media(self):
-        """미디어 재인덱싱"""
+        """
+        미디어 재인덱싱 (검색 중단 없음)
+        - 새 인덱스는 섀도 DB 파일에 만들고, 완료되면 새 세대 파일로 한 번에 교체 (swap_in_database)
+        - 재구축 중에도 검색은 기존 DB로 계속 동작하고, SubtitleSearch는 교체를 감지해서 연결을 새로 엶
+        """
         print("🔄 미디어 파일 재인덱싱...")
-        print("⚠️  주의: 기존 데이터베이스가 백업되고 새로 생성됩니다.")
+        print("ℹ️  새 인덱스는 별도 파일에 만들어지고, 완료 후 교체됩니다. 그동안 검색은 계속 사용할 수 있습니다.")
+        
+        shadow_path = f"{self.db_path}.rebuild"
+        resume = False
+        if Path(shadow_path).exists():
+            answer = input("이전에 중단된 재인덱싱이 있습니다. 이어서 하시겠습니까? (Y/n): ").strip().lower()
+            resume = answer != 'n'
         
         confirm = input("계속하시겠습니까? (y/N): ").strip().lower()
         if confirm != 'y':
@@ -141,21 +140,108 @@ class MediaIndexSystem:
             return
         
         try:
-            # 기존 DB 백업
-            if Path(self.db_path).exists():
-                backup_path = f"{self.db_path}.backup"
-                Path(self.db_path).rename(backup_path)
-                print(f"✅ 기존 데이터베이스가 {backup_path}로 백업되었습니다.")
+            if not resume:
+                self.remove_database_files(shadow_path)
             
-            # 인덱서 실행
+            # 인덱서 실행 (섀도 DB, 라이브 DB와 같은 FTS 레이아웃)
             from working_indexer import WorkingIndexer
-            indexer = WorkingIndexer()
-            indexer.index_all_directories()
+            layout = self.database_layout(self.db_path)
+            indexer = WorkingIndexer(db_path=shadow_path, fts_layout=layout)
+            indexer.index_all_directories(resume=resume, bulk=True)
+            
+            self.swap_in_database(shadow_path)
+            self.searcher.check_generation()
+            swapped_layout = self.database_layout(self.db_path)
+            if layout and swapped_layout != layout:
+                print(f"⚠️  FTS 레이아웃이 바뀌었습니다: {layout} → {swapped_layout}")
             
             print("✅ 재인덱싱이 완료되었습니다!")
             
         except Exception as e:
             print(f"❌ 재인덱싱 중 오류 발생: {e}")
+            print(f"   기존 데이터베이스는 그대로 사용됩니다. (섀도 DB: {shadow_path})")
+    
+    def database_layout(self, db_path):
+        """DB의 FTS 레이아웃 (fts_schema). DB나 FTS 테이블이 없으면 None (인덱서 기본값 사용)"""
+        if not Path(db_path).exists():
+            return None
+        conn = db_access.connect(db_path, 'serve')
+        try:
+            return fts_schema.current_layout(conn.cursor())
+        finally:
+            conn.close()
+    
+    def remove_database_files(self, db_path):
+        """DB 파일과 저널/WAL 파일 삭제"""
+        for suffix in ('', '-journal', '-wal', '-shm'):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    
+    def swap_in_database(self, shadow_path, checkpoint_timeout=None):
+        """
+        섀도 DB를 라이브 DB 자리로 원자적 교체
+        - 섀도 DB는 롤백 저널 모드로 정리해서 파일 하나에 모든 내용이 들어 있게 함
+        - 섀도 DB는 새 세대 파일(<DB>.gen-N)이 되고, 라이브 경로는 그 파일을 가리키는 링크로 교체
+          SQLite는 링크를 따라간 파일 이름으로 -wal/-shm을 만들므로 세대마다 WAL이 따로 있음
+          (같은 경로에 파일을 덮어쓰면 이전 파일의 -wal/-shm이 새 파일에 붙어서 이전 내용이 재생됨)
+        - 기존 DB는 WAL을 모두 반영한 뒤 하드 링크로 .backup에 보존 (복사 없음). 반영이 끝나지 않으면 교체 중단
+        - checkpoint_timeout: 읽는 중인 연결을 기다리는 시간(초). None이면 maintenance 프로필 기본값
+        """
+        conn = db_access.connect(shadow_path, 'maintenance', journal_mode='DELETE')
+        conn.close()
+        
+        live_path = Path(self.db_path)
+        previous = None
+        if live_path.exists():
+            self.checkpoint_database(self.db_path, checkpoint_timeout)
+            previous = live_path.resolve()
+            
+            backup_path = f"{self.db_path}.backup"
+            self.remove_database_files(backup_path)
+            try:
+                os.link(previous, backup_path)
+                print(f"✅ 기존 데이터베이스가 {backup_path}로 백업되었습니다.")
+            except OSError as e:
+                print(f"⚠️  백업 생략 ({e})")
+        
+        # 한 번도 쓰지 않은 세대 이름이라 남아 있는 -wal/-shm이 없음
+        generation_path = self.next_generation_path()
+        os.replace(shadow_path, generation_path)
+        
+        # 링크 교체는 같은 디렉토리 안의 rename이라 원자적. 열려 있는 연결은 이전 세대 파일을 끝까지 읽음
+        link_path = f"{self.db_path}.link"
+        Path(link_path).unlink(missing_ok=True)
+        os.symlink(generation_path.name, link_path)
+        os.replace(link_path, self.db_path)
+        
+        # 이전 세대 파일 이름 정리 (내용은 .backup 하드 링크와 열려 있는 연결에 남음)
+        if previous is not None and previous != live_path.absolute() and self.is_generation_file(previous):
+            previous.unlink(missing_ok=True)
+        print(f"🔁 새 데이터베이스로 교체 완료: {self.db_path} → {generation_path.name}")
+    
+    def checkpoint_database(self, db_path, timeout=None):
+        """
+        WAL 내용을 DB 파일에 모두 반영 (백업이 완전하도록). 읽는 중인 연결 때문에 끝나지 않으면 RuntimeError
+        wal_checkpoint 결과: (busy, WAL 프레임 수, 반영한 프레임 수). WAL 모드가 아니면 (0, -1, -1)
+        """
+        conn = db_access.connect(db_path, 'maintenance', timeout=timeout, journal_mode=None)
+        try:
+            busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(FULL)").fetchone()
+        finally:
+            conn.close()
+        if busy or log_frames != checkpointed:
+            raise RuntimeError(f"WAL 반영이 끝나지 않아 교체를 중단합니다 "
+                               f"(busy={busy}, 프레임 {checkpointed}/{log_frames}). 검색을 멈춘 뒤 다시 시도하세요.")
+    
+    def is_generation_file(self, path):
+        return re.fullmatch(re.escape(Path(self.db_path).name + GENERATION_SUFFIX) + r'\d+', Path(path).name) is not None
+    
+    def next_generation_path(self):
+        """다음 세대 파일 경로 (-wal/-shm만 남은 세대 번호도 건너뜀)"""
+        live_path = Path(self.db_path).absolute()
+        pattern = re.compile(re.escape(live_path.name + GENERATION_SUFFIX) + r'(\d+)')
+        numbers = [int(match.group(1)) for path in live_path.parent.iterdir()
+                   if (match := pattern.match(path.name))]
+        return live_path.with_name(f"{live_path.name}{GENERATION_SUFFIX}{max(numbers, default=0) + 1}")
 
 def main():
     """메인 함수"""
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Prometheus 텍스트 형식 메트릭 (표준 라이브러리만 사용)
+- Counter / Gauge / Histogram, 프로세스 전역 레지스트리 REGISTRY
+- 핫 패스 비용: 라벨 자식은 모듈 로드 시 미리 만들어 두고(labels()), 기록은 잠금 + 정수/실수 덧셈 한 번
+- Histogram은 버킷별 개수만 기록하고 누적값은 수집(/metrics 요청) 시점에 계산
+- collector: 수집 시점에 샘플을 만드는 함수 (예: clip_requests 상태별 대기열 깊이)
+- serve(): 별도 프로세스(인덱서 감시 모드 등)에서 /metrics만 내보내는 작은 HTTP 서버
+"""
+
+import bisect
+import math
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import db_access
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# 검색 지연용 기본 버킷 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        # 라벨 없는 메트릭은 관측 전에도 0으로 노출
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, **labels):
+        """라벨 값이 정해진 자식 메트릭 (핫 패스에서는 미리 만들어 두고 재사용)"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self.new_child())
+        return child
+
+    def new_child(self):
+        raise NotImplementedError
+
+    def default_child(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name}: labels()로 라벨을 지정해야 합니다")
+        return self.labels()
+
+    def samples(self):
+        """(접미사, 라벨 [(이름, 값)], 값) 목록"""
+        for key, child in sorted(self._children.items()):
+            yield from child.samples(list(zip(self.labelnames, key)))
+
+
+class CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, labels):
+        yield '', labels, self.value
+
+
+class Counter(Metric):
+    """이름은 노출 이름(_total 접미사 포함)으로 저장 → HELP/TYPE와 샘플 이름이 같음 (prometheus_client 0.0.4 형식)"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(counter_name(name), help_text, labelnames)
+
+    def new_child(self):
+        return CounterChild()
+
+    def inc(self, amount=1):
+        self.default_child().inc(amount)
+
+
+class GaugeChild:
+    __slots__ = ('value', 'function', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, function):
+        """수집 시점에 값을 계산 (예: 큐 크기)"""
+        self.function = function
+
+    def samples(self, labels):
+        yield '', labels, self.function() if self.function else self.value
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def new_child(self):
+        return GaugeChild()
+
+    def set(self, value):
+        self.default_child().set(value)
+
+    def inc(self, amount=1):
+        self.default_child().inc(amount)
+
+    def dec(self, amount=1):
+        self.default_child().dec(amount)
+
+    def set_function(self, function):
+        self.default_child().set_function(function)
+
+
+class HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # 마지막 칸은 +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, labels):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            yield '_bucket', labels + [('le', format_value(float(bound)))], cumulative
+        yield '_sum', labels, total
+        yield '_count', labels, cumulative
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def new_child(self):
+        return HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.default_child().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, cls, name, help_text, labelnames=(), **kwargs):
+        """같은 이름이 이미 있으면 기존 메트릭 반환 (모듈을 다시 불러와도 안전)"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name}: 이미 {metric.kind}로 등록됨")
+            return metric
+
+    def add_collector(self, collector):
+        """collector() → [(이름, 종류, 설명, [(라벨 dict, 값)])]. 수집할 때마다 호출"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        for collector in list(self._collectors):
+            try:
+                families = collector()
+            except Exception as e:
+                lines.append(f"# collector 오류: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(sorted(labels.items()))} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter_name(name):
+    return name if name.endswith('_total') else f"{name}_total"
+
+
+def counter(name, help_text, labelnames=()):
+    """카운터 (레지스트리에도 _total이 붙은 노출 이름으로 등록)"""
+    return REGISTRY.register(Counter, counter_name(name), help_text, labelnames)
+
+
+def gauge(name, help_text, labelnames=()):
+    return REGISTRY.register(Gauge, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+CLIP_STATUSES = ('pending', 'processing', 'completed', 'failed')
+
+
+def clip_queue_collector(db_path):
+    """
+    clip_requests 테이블(클립 서비스가 기록)에서 상태별 대기열 깊이와 완료 처리량 수집
+    - clip_queue_depth{status}: 상태별 요청 수
+    - clip_completed_total: 완료 누적 (rate()로 작업자 처리량)
+    - clip_output_seconds_total / clip_output_bytes_total: 완료된 클립 길이/크기 합
+    """
+    def collect():
+        try:
+            conn = db_access.connect(db_path, 'serve')
+        except sqlite3.Error:
+            return []
+        try:
+            rows = conn.execute("""
+                SELECT status, COUNT(*), COALESCE(SUM(duration_seconds), 0), COALESCE(SUM(file_size), 0)
+                FROM clip_requests GROUP BY status
+            """).fetchall()
+        except sqlite3.OperationalError:
+            # 클립 테이블이 없는 DB
+            return []
+        finally:
+            conn.close()
+
+        counts = {status: 0 for status in CLIP_STATUSES}
+        totals = {}
+        for status, count, duration, size in rows:
+            counts[status or 'unknown'] = count
+            totals[status] = (duration, size)
+        duration, size = totals.get('completed', (0, 0))
+        return [
+            ('clip_queue_depth', 'gauge', "clip_requests 상태별 요청 수",
+             [({'status': status}, count) for status, count in counts.items()]),
+            ('clip_completed_total', 'counter', "완료된 클립 요청 누적 (rate()로 처리량)",
+             [({}, counts['completed'])]),
+            ('clip_output_seconds_total', 'counter', "완료된 클립 길이 합(초)",
+             [({}, duration)]),
+            ('clip_output_bytes_total', 'counter', "완료된 클립 파일 크기 합(바이트)",
+             [({}, size)]),
+        ]
+    return collect
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_response(404)
+            self.end_headers()
+            return
+        send_metrics(self, self.registry)
+
+
+def send_metrics(handler, registry=REGISTRY):
+    """BaseHTTPRequestHandler로 /metrics 응답 전송"""
+    body = registry.render().encode('utf-8')
+    handler.send_response(200)
+    handler.send_header('Content-Type', CONTENT_TYPE)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def serve(port, host='0.0.0.0'):
+    """백그라운드 스레드에서 /metrics 서버 시작 (인덱서, 감시 모드 등 API 서버가 아닌 프로세스용)"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    print(f"📈 메트릭 서버: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+자막 줄 중복/유사 중복 묶음 (minhash)
+- 정규화(소문자, 문장부호 제거) 후 단어 + 이웃 단어 쌍 집합 → minhash 서명 16개 (32비트)
+  (자막 한 줄은 단어 10개 안팎이라 글자 n-gram보다 원소가 적고, 원소별 해시는 캐시에서 재사용)
+- LSH: 서명을 4개씩 4개 밴드로 나눠 밴드 키 테이블(cue_cluster_bands)에서 후보 묶음 조회
+  후보 묶음의 대표 서명과 추정 유사도(같은 서명 값 비율)가 SIMILARITY 이상이면 같은 묶음
+- subtitles.cluster_id: 같은 묶음이면 같은 값 (반복 대사, 재방송, 같은 영화의 다른 폴더 사본, 중복 .srt)
+- 같은 정규화 문장은 서명을 다시 계산하지 않음 (lru_cache)
+"""
+
+import re
+import struct
+import zlib
+from hashlib import blake2b
+from functools import lru_cache
+from operator import eq
+
+NUM_HASHES = 16
+BAND_SIZE = 4
+# 추정 자카드 유사도 (서명 16개 중 12개 이상 같음)
+SIMILARITY = 0.75
+# IN (...) 한 번에 넣는 키 수 (SQLite 변수 개수 제한)
+LOOKUP_CHUNK = 500
+SIGNATURE_CACHE_SIZE = 65536
+SHINGLE_CACHE_SIZE = 262144
+
+# 해시 함수 NUM_HASHES개 = blake2b 다이제스트의 32비트 조각 (리틀 엔디언 고정이라 실행/기기마다 같은 서명)
+HASH_STRUCT = struct.Struct(f'<{NUM_HASHES}I')
+BAND_BYTES = BAND_SIZE * 4
+
+NON_WORD = re.compile(r"[^\w\s]+")
+SPACES = re.compile(r'\s+')
+
+
+def normalize(text):
+    return SPACES.sub(' ', NON_WORD.sub('', text.casefold())).strip()
+
+
+def shingles(normalized):
+    """서명 원소: 단어 + 이웃 단어 쌍 (어순이 다른 짧은 대사를 구분). 빈 문장은 빈 문자열 하나"""
+    words = normalized.split()
+    return set(words).union(map(' '.join, zip(words, words[1:]))) or {''}
+
+
+@lru_cache(maxsize=SHINGLE_CACHE_SIZE)
+def shingle_hashes(shingle):
+    """원소 하나의 해시 NUM_HASHES개: blake2b 다이제스트 하나를 32비트씩 나눔 (해시 함수별 파이썬 루프 없음)"""
+    return HASH_STRUCT.unpack(blake2b(shingle.encode('utf-8'), digest_size=HASH_STRUCT.size).digest())
+
+
+@lru_cache(maxsize=SIGNATURE_CACHE_SIZE)
+def signature(normalized):
+    """정규화된 문장의 minhash 서명 (32비트 정수 NUM_HASHES개 튜플). 해시 함수별 최솟값은 zip/min으로 (C 루프)"""
+    return tuple(map(min, zip(*map(shingle_hashes, shingles(normalized)))))
+
+
+def band_keys(packed):
+    """LSH 밴드 키: 서명 바이트(pack)를 밴드 크기로 잘라 crc32, 밴드 번호는 상위 비트 (63비트 이하 정수)"""
+    return [(band << 32) | zlib.crc32(packed[start:start + BAND_BYTES])
+            for band, start in enumerate(range(0, len(packed), BAND_BYTES))]
+
+
+def similarity(a, b):
+    """추정 자카드 유사도 = 같은 서명 값 비율"""
+    return sum(map(eq, a, b)) / NUM_HASHES
+
+
+def create(cursor):
+    """cluster_id 컬럼이 없던 DB면 추가하고 True 반환 (기존 행은 backfill로 채움)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cue_clusters (
+            cluster_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cue_cluster_bands (
+            band_key INTEGER PRIMARY KEY,
+            cluster_id INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("PRAGMA table_info(subtitles)")
+    added = 'cluster_id' not in {row[1] for row in cursor.fetchall()}
+    if added:
+        cursor.execute("ALTER TABLE subtitles ADD COLUMN cluster_id INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subtitles_cluster ON subtitles(cluster_id)")
+    return added
+
+
+def lookup_chunks(cursor, sql, keys):
+    rows = []
+    for i in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[i:i + LOOKUP_CHUNK]
+        cursor.execute(sql.format(placeholders=','.join('?' * len(chunk))), chunk)
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+def assign_clusters(cursor, texts):
+    """
+    자막 목록의 cluster_id 목록. 새 묶음과 밴드 키는 같은 트랜잭션에서 저장
+    파일 단위로 호출: 밴드/대표 서명 조회는 파일 전체를 IN (...)으로 한 번에
+    """
+    signatures = [signature(normalize(text)) for text in texts]
+    packed_signatures = [HASH_STRUCT.pack(*sig) for sig in signatures]
+    keys_per_cue = [band_keys(packed) for packed in packed_signatures]
+
+    all_keys = sorted({key for keys in keys_per_cue for key in keys})
+    band_clusters = dict(lookup_chunks(
+        cursor, "SELECT band_key, cluster_id FROM cue_cluster_bands WHERE band_key IN ({placeholders})", all_keys))
+    cluster_signatures = {
+        cluster_id: HASH_STRUCT.unpack(blob) for cluster_id, blob in lookup_chunks(
+            cursor, "SELECT cluster_id, signature FROM cue_clusters WHERE cluster_id IN ({placeholders})",
+            sorted(set(band_clusters.values())))
+    }
+
+    cursor.execute("SELECT COALESCE(MAX(cluster_id), 0) FROM cue_clusters")
+    next_id = cursor.fetchone()[0] + 1
+    new_clusters, new_bands = [], []
+    cluster_ids = []
+    for sig, packed, keys in zip(signatures, packed_signatures, keys_per_cue):
+        best, best_score = None, SIMILARITY
+        for key in keys:
+            cluster_id = band_clusters.get(key)
+            if cluster_id is None:
+                continue
+            score = similarity(sig, cluster_signatures[cluster_id])
+            if score >= best_score:
+                best, best_score = cluster_id, score
+        if best is None:
+            best = next_id
+            next_id += 1
+            cluster_signatures[best] = sig
+            new_clusters.append((best, packed))
+        # 이 자막의 밴드도 묶음에 연결 (대표와 조금 다른 변형도 다음에 찾을 수 있게)
+        for key in keys:
+            if key not in band_clusters:
+                band_clusters[key] = best
+                new_bands.append((key, best))
+        cluster_ids.append(best)
+
+    cursor.executemany("INSERT INTO cue_clusters (cluster_id, signature) VALUES (?, ?)", new_clusters)
+    cursor.executemany("INSERT OR IGNORE INTO cue_cluster_bands (band_key, cluster_id) VALUES (?, ?)", new_bands)
+    return cluster_ids
+
+
+def backfill(cursor, chunk=20000):
+    """
+    cluster_id가 없는 행 채우기 (id 순). 채운 행 수 반환
+    FTS 컬럼은 바뀌지 않으므로 호출하는 쪽에서 FTS UPDATE 트리거를 내린 상태로 호출
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, text FROM subtitles WHERE cluster_id IS NULL AND id > ? ORDER BY id LIMIT ?
+        """, (last_id, chunk))
+        rows = cursor.fetchall()
+        if not rows:
+            return filled
+        cluster_ids = assign_clusters(cursor, [text or '' for _, text in rows])
+        cursor.executemany("UPDATE subtitles SET cluster_id = ? WHERE id = ?",
+                           [(cluster_id, row_id) for cluster_id, (row_id, _) in zip(cluster_ids, rows)])
+        filled += len(rows)
+        last_id = rows[-1][0]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+검색 쿼리 계측과 느린 쿼리 로그
+- 모든 쿼리: 쿼리 모양(query shape)별 횟수, 총/최대 시간, 반환 행 수, VM 단계 수를 메모리에서 집계하고 주기적으로 저장
+- 임계값 이상 걸린 쿼리: 검색어, SQL, EXPLAIN QUERY PLAN을 slow_queries 테이블에 기록 (최근 max_entries개만 유지)
+- 스캔량: Python sqlite3에는 행 스캔 수 API가 없으므로 progress handler로 센 VM 단계 수(PROGRESS_STEPS 단위)로 대신함
+- 쿼리 모양: 검색어 값을 지운 MATCH 구조 (예: '"thank you"' → PHRASE2, 'meet*' → PREFIX, 문장 검색 → TERM OR×8)
+- 자막 DB와 분리된 별도 DB (검색 히스토리와 같은 방식)
+"""
+
+import atexit
+import re
+import threading
+import time
+from datetime import datetime
+
+import db_access
+
+DEFAULT_THRESHOLD_MS = 100.0
+MAX_ENTRIES = 5000
+FLUSH_INTERVAL = 30.0
+# progress handler 호출 간격 (VM 명령 수). 작을수록 정확하지만 느려짐
+PROGRESS_STEPS = 1000
+
+MATCH_TOKEN = re.compile(r'"[^"]*"\*?|\(|\)|[^\s()"]+')
+OPERATORS = {'AND', 'OR', 'NOT', 'NEAR'}
+
+
+def query_shape(match_query, language=None):
+    """MATCH 구문에서 검색어 값을 지운 구조 (같은 모양끼리 집계)"""
+    parts = []
+    for token in MATCH_TOKEN.findall(match_query or ''):
+        if token in OPERATORS or token in ('(', ')'):
+            parts.append(token)
+            continue
+        prefix = token.endswith('*')
+        if token.startswith('"'):
+            words = len(token.strip('*').strip('"').split())
+            kind = 'PREFIX' if prefix else ('PHRASE' + str(words) if words > 1 else 'TERM')
+        elif ':' in token:
+            kind = 'COLUMN'
+        else:
+            kind = 'PREFIX' if prefix else 'TERM'
+        # 연산자 없이 이어진 단어는 암시적 AND
+        if parts and parts[-1] not in OPERATORS and parts[-1] != '(':
+            parts.append('AND')
+        parts.append(kind)
+
+    operands = parts[0::2]
+    operators = set(parts[1::2])
+    if len(operands) > 2 and len(operators) == 1 and len(set(operands)) == 1 and '(' not in parts:
+        # 문장 검색처럼 같은 모양이 길게 반복되면 개수로 줄임
+        shape = f"{operands[0]} {operators.pop()}×{len(operands)}"
+    else:
+        shape = ' '.join(parts) or 'EMPTY'
+    return f"{shape} [{language}]" if language else shape
+
+
+def format_plan(rows):
+    """EXPLAIN QUERY PLAN 행 (id, parent, notused, detail) → 들여쓴 트리 문자열"""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append(f"{'  ' * depth[node_id]}{detail}")
+    return '\n'.join(lines)
+
+
+class QueryLog:
+    def __init__(self, db_path="query_log.db", threshold_ms=DEFAULT_THRESHOLD_MS, max_entries=MAX_ENTRIES):
+        self.db_path = db_path
+        self.threshold_ms = threshold_ms
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.time()
+        self.init_db()
+        # 종료 시 남은 집계 저장
+        atexit.register(self.flush)
+
+    def connect(self):
+        return db_access.connect(self.db_path, 'write')
+
+    def init_db(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        # 쿼리 모양별 누적 집계
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS query_shapes (
+                source TEXT NOT NULL,
+                shape TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                total_ms REAL NOT NULL DEFAULT 0,
+                max_ms REAL NOT NULL DEFAULT 0,
+                total_rows INTEGER NOT NULL DEFAULT 0,
+                total_steps INTEGER NOT NULL DEFAULT 0,
+                slow_count INTEGER NOT NULL DEFAULT 0,
+                last_seen TEXT,
+                PRIMARY KEY (source, shape)
+            )
+        """)
+        # 임계값을 넘은 쿼리 (회전: 최근 max_entries개)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS slow_queries (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                source TEXT NOT NULL,
+                shape TEXT NOT NULL,
+                query TEXT,
+                language TEXT,
+                sql TEXT NOT NULL,
+                elapsed_ms REAL NOT NULL,
+                rows_returned INTEGER NOT NULL,
+                vm_steps INTEGER NOT NULL,
+                plan TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_slow_queries_shape ON slow_queries(shape, elapsed_ms)")
+
+        conn.commit()
+        conn.close()
+
+    def execute(self, conn, sql, params, source, query=None, language=None, shape=None):
+        """
+        conn에서 sql 실행 후 결과 행 반환. 시간/반환 행 수/VM 단계 수 기록
+        임계값 이상이면 EXPLAIN QUERY PLAN과 함께 slow_queries에 기록
+        shape: 없으면 query(MATCH 구문)에서 계산
+        """
+        steps = [0]
+
+        def count_steps():
+            steps[0] += 1
+            return 0
+
+        conn.set_progress_handler(count_steps, PROGRESS_STEPS)
+        start = time.perf_counter()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            conn.set_progress_handler(None, 0)
+
+        if shape is None:
+            shape = query_shape(query, language) if query is not None else 'SQL'
+        vm_steps = steps[0] * PROGRESS_STEPS
+        slow = elapsed_ms >= self.threshold_ms
+        self.observe(source, shape, elapsed_ms, len(rows), vm_steps, slow)
+        if slow:
+            plan = format_plan(conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+            self.record_slow(source, shape, query, language, sql, elapsed_ms, len(rows), vm_steps, plan)
+        return rows
+
+    def observe(self, source, shape, elapsed_ms, rows, vm_steps, slow=False):
+        """모양별 집계에 추가 (FLUSH_INTERVAL마다 저장)"""
+        with self._lock:
+            stats = self._pending.setdefault((source, shape), [0, 0.0, 0.0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += elapsed_ms
+            stats[2] = max(stats[2], elapsed_ms)
+            stats[3] += rows
+            stats[4] += vm_steps
+            stats[5] += 1 if slow else 0
+            due = time.time() - self._last_flush >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """메모리 집계를 query_shapes에 반영"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if not pending:
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        conn = self.connect()
+        with conn:
+            conn.executemany("""
+                INSERT INTO query_shapes (source, shape, count, total_ms, max_ms, total_rows, total_steps,
+                                          slow_count, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source, shape) DO UPDATE SET
+                    count = count + excluded.count,
+                    total_ms = total_ms + excluded.total_ms,
+                    max_ms = MAX(max_ms, excluded.max_ms),
+                    total_rows = total_rows + excluded.total_rows,
+                    total_steps = total_steps + excluded.total_steps,
+                    slow_count = slow_count + excluded.slow_count,
+                    last_seen = excluded.last_seen
+            """, [(source, shape, *stats, now) for (source, shape), stats in pending.items()])
+        conn.close()
+
+    def record_slow(self, source, shape, query, language, sql, elapsed_ms, rows, vm_steps, plan):
+        conn = self.connect()
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO slow_queries (timestamp, source, shape, query, language, sql, elapsed_ms,
+                                          rows_returned, vm_steps, plan)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (datetime.now().isoformat(timespec='seconds'), source, shape, query, language,
+                  ' '.join(sql.split()), elapsed_ms, rows, vm_steps, plan))
+            # 오래된 기록 정리 (id 기준 최근 max_entries개 유지)
+            conn.execute("DELETE FROM slow_queries WHERE id <= ?", (cursor.lastrowid - self.max_entries,))
+        conn.close()
+
+    def worst_shapes(self, limit=20, order='total'):
+        """느린 쿼리 모양 목록. order: total(총 시간) / avg(평균) / max(최대) / slow(느린 횟수)"""
+        self.flush()
+        order_by = {'total': 'total_ms', 'avg': 'total_ms / count', 'max': 'max_ms', 'slow': 'slow_count'}[order]
+        conn = self.connect()
+        rows = conn.execute(f"""
+            SELECT source, shape, count, total_ms, total_ms / count, max_ms,
+                   total_rows * 1.0 / count, total_steps / count, slow_count
+            FROM query_shapes
+            ORDER BY {order_by} DESC
+            LIMIT ?
+        """, (limit,)).fetchall()
+        conn.close()
+        return rows
+
+    def slow_queries(self, limit=10, shape=None):
+        """최근 느린 쿼리 (계획 포함)"""
+        conn = self.connect()
+        if shape:
+            rows = conn.execute("""
+                SELECT timestamp, source, shape, query, language, elapsed_ms, rows_returned, vm_steps, plan
+                FROM slow_queries WHERE shape = ? ORDER BY elapsed_ms DESC LIMIT ?
+            """, (shape, limit)).fetchall()
+        else:
+            rows = conn.execute("""
+                SELECT timestamp, source, shape, query, language, elapsed_ms, rows_returned, vm_steps, plan
+                FROM slow_queries ORDER BY id DESC LIMIT ?
+            """, (limit,)).fetchall()
+        conn.close()
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM query_shapes")
+            conn.execute("DELETE FROM slow_queries")
+        conn.close()
+
+
+def print_report(log, limit=20, order='total'):
+    rows = log.worst_shapes(limit, order)
+    if not rows:
+        print("ℹ️  기록된 쿼리가 없습니다.")
+        return
+    print(f"\n🐢 쿼리 모양별 집계 (정렬: {order}, 느린 쿼리 기준 {log.threshold_ms:.0f}ms)")
+    print("-" * 100)
+    print(f"{'source':16s}{'shape':32s}{'횟수':>8s}{'총(s)':>9s}{'평균':>10s}{'최대':>10s}"
+          f"{'행':>7s}{'VM 단계':>11s}{'느림':>6s}")
+    for source, shape, count, total_ms, avg_ms, max_ms, avg_rows, avg_steps, slow_count in rows:
+        print(f"{source:16s}{shape[:31]:32s}{count:8d}{total_ms / 1000:9.2f}{avg_ms:8.1f}ms{max_ms:8.1f}ms"
+              f"{avg_rows:7.1f}{avg_steps:11,d}{slow_count:6d}")
+
+
+def print_slow(log, limit=10, shape=None):
+    rows = log.slow_queries(limit, shape)
+    if not rows:
+        print("ℹ️  느린 쿼리 기록이 없습니다.")
+        return
+    for timestamp, source, shape, query, language, elapsed_ms, rows_returned, vm_steps, plan in rows:
+        print(f"\n⏱️  {elapsed_ms:.1f}ms  {timestamp}  [{source}] {shape}")
+        print(f"   검색어: {query!r}{f' ({language})' if language else ''}, 반환 {rows_returned}행, "
+              f"VM 단계 ≈{vm_steps:,}")
+        for line in (plan or '').splitlines():
+            print(f"   │ {line}")
+
+
+# 보고서
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="느린 쿼리 로그 보고서")
+    parser.add_argument('--db', default="query_log.db", help="쿼리 로그 DB 경로")
+    subparsers = parser.add_subparsers(dest='command')
+    report_parser = subparsers.add_parser('report', help="느린 쿼리 모양 순위")
+    report_parser.add_argument('--limit', type=int, default=20)
+    report_parser.add_argument('--order', choices=['total', 'avg', 'max', 'slow'], default='total')
+    slow_parser = subparsers.add_parser('slow', help="최근 느린 쿼리와 실행 계획")
+    slow_parser.add_argument('--limit', type=int, default=10)
+    slow_parser.add_argument('--shape', help="이 모양의 쿼리만 (느린 순)")
+    subparsers.add_parser('clear', help="기록 삭제")
+    args = parser.parse_args()
+
+    query_log = QueryLog(args.db)
+    if args.command == 'slow':
+        print_slow(query_log, args.limit, args.shape)
+    elif args.command == 'clear':
+        query_log.clear()
+        print("🗑️  쿼리 로그를 비웠습니다.")
+    else:
+        print_report(query_log, getattr(args, 'limit', 20), getattr(args, 'order', 'total'))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+검색 히스토리 저장소
+- search_history: 추가 전용(append-only) 로그, timestamp 인덱스
+- query_stats: 검색어별 집계 (횟수, 마지막 검색 시각, 평균 지연, 평균 결과 수)를 기록 시점에 증분 갱신
+- 인기 검색어 상위 N개는 인덱스 순서대로 N행만 읽어서 반환 (캐시 예열에 사용)
+"""
+
+import json
+import db_access
+from datetime import datetime
+
+
+class SearchHistory:
+    def __init__(self, db_path="search_history.db"):
+        self.db_path = db_path
+        self.init_db()
+
+    def connect(self):
+        return db_access.connect(self.db_path, 'write')
+
+    def init_db(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS search_history (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                query TEXT,
+                language TEXT NOT NULL DEFAULT '',
+                sentences TEXT,
+                result_count INTEGER,
+                latency_ms REAL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_history_timestamp ON search_history(timestamp)")
+
+        # kind: 'search' (일반 검색어) / 'sentence' (배치 검색 문장)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS query_stats (
+                kind TEXT NOT NULL,
+                query TEXT NOT NULL,
+                language TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL,
+                last_seen TEXT NOT NULL,
+                avg_latency_ms REAL NOT NULL,
+                avg_results REAL NOT NULL,
+                PRIMARY KEY (kind, query, language)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_query_stats_popular ON query_stats(count DESC, last_seen DESC)")
+
+        conn.commit()
+        conn.close()
+
+    def record(self, query, result_count, latency_ms, language=None, kind='search'):
+        """검색 1건 기록 + query_stats 증분 갱신 (같은 트랜잭션)"""
+        self.record_many([(query, result_count, latency_ms, language, kind)])
+
+    def record_many(self, entries):
+        """
+        검색 여러 건을 한 트랜잭션으로 기록 (배치 검색의 문장별 기록 → 커밋/fsync 한 번)
+        entries: (query, result_count, latency_ms, language, kind) 목록
+        """
+        now = datetime.now().isoformat()
+        rows = [(kind, query, language or '', result_count, latency_ms)
+                for query, result_count, latency_ms, language, kind in entries]
+        if not rows:
+            return
+
+        conn = self.connect()
+        with conn:
+            conn.executemany("""
+                INSERT INTO search_history (timestamp, kind, query, language, result_count, latency_ms)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(now, kind, query, language, result_count, latency_ms)
+                  for kind, query, language, result_count, latency_ms in rows])
+
+            # 이동 평균: avg + (x - avg) / (count + 1), UPDATE 식은 모두 갱신 전 값 기준으로 계산됨
+            conn.executemany("""
+                INSERT INTO query_stats (kind, query, language, count, last_seen, avg_latency_ms, avg_results)
+                VALUES (?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (kind, query, language) DO UPDATE SET
+                    count = count + 1,
+                    last_seen = excluded.last_seen,
+                    avg_latency_ms = avg_latency_ms + (excluded.avg_latency_ms - avg_latency_ms) / (count + 1),
+                    avg_results = avg_results + (excluded.avg_results - avg_results) / (count + 1)
+            """, [(kind, query, language, now, latency_ms, result_count)
+                  for kind, query, language, result_count, latency_ms in rows])
+        conn.close()
+
+    def save_batch(self, sentences, total_results):
+        """배치 검색 결과 저장 (/api/save-search)"""
+        now = datetime.now().isoformat()
+
+        conn = self.connect()
+        with conn:
+            conn.execute("""
+                INSERT INTO search_history (timestamp, kind, sentences, result_count)
+                VALUES (?, 'batch', ?, ?)
+            """, (now, json.dumps(sentences, ensure_ascii=False), total_results))
+        conn.close()
+
+    def recent(self, limit=50, since=None, kind=None):
+        """최근 히스토리 (오래된 것 → 최신 순). kind: 'search' / 'sentence' / 'batch' (None이면 전체)"""
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        conditions, params = [], []
+        if since:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f"""
+            SELECT timestamp, kind, query, language, sentences, result_count, latency_ms
+            FROM search_history
+            {where}
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """, (*params, limit))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        history = []
+        for timestamp, row_kind, query, language, sentences, result_count, latency_ms in reversed(rows):
+            history.append({
+                'timestamp': timestamp,
+                'kind': row_kind,
+                'query': query,
+                'language': language or None,
+                'sentences': json.loads(sentences) if sentences else [query],
+                'total_results': result_count,
+                'latency_ms': latency_ms
+            })
+        return history
+
+    def top_queries(self, limit=20, kind=None):
+        """인기 검색어 상위 N개 (idx_query_stats_popular 순서로 N행만 읽음)"""
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        if kind:
+            cursor.execute("""
+                SELECT kind, query, language, count, last_seen, avg_latency_ms, avg_results
+                FROM query_stats
+                WHERE kind = ?
+                ORDER BY count DESC, last_seen DESC
+                LIMIT ?
+            """, (kind, limit))
+        else:
+            cursor.execute("""
+                SELECT kind, query, language, count, last_seen, avg_latency_ms, avg_results
+                FROM query_stats
+                ORDER BY count DESC, last_seen DESC
+                LIMIT ?
+            """, (limit,))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{
+            'kind': row_kind,
+            'query': query,
+            'language': language or None,
+            'count': count,
+            'last_seen': last_seen,
+            'avg_latency_ms': round(avg_latency_ms, 3),
+            'avg_results': round(avg_results, 2)
+        } for row_kind, query, language, count, last_seen, avg_latency_ms, avg_results in rows]
+
+
+# 테스트
+if __name__ == "__main__":
+    history = SearchHistory()
+
+    print("=== 인기 검색어 ===")
+    for i, item in enumerate(history.top_queries(10), 1):
+        print(f"{i:2d}. [{item['kind']}] {item['query']} - {item['count']}회, "
+              f"평균 {item['avg_latency_ms']:.2f}ms, 평균 결과 {item['avg_results']:.1f}개")
@@ -1,15 +1,163 @@
 #!/usr/bin/env python3
 
+import os
 import sqlite3
+import threading
+import queue
 import time
 import re
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
+import db_access
+import duplicate_subtitles
+import fts_schema
+import metrics
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9']+")
+
+# /metrics 노출용 (라벨 자식은 미리 만들어서 검색마다 조회하지 않음)
+SEARCH_QUERIES = metrics.counter('search_queries', "검색 요청 수", ('cached',))
+SEARCH_LATENCY = metrics.histogram('search_latency_seconds', "검색 지연 (초)", ('cached',))
+QUERIES_HIT, QUERIES_MISS = SEARCH_QUERIES.labels(cached='true'), SEARCH_QUERIES.labels(cached='false')
+LATENCY_HIT, LATENCY_MISS = SEARCH_LATENCY.labels(cached='true'), SEARCH_LATENCY.labels(cached='false')
+POOL_IN_USE = metrics.gauge('search_pool_in_use', "사용 중인 검색 연결 수")
+POOL_IDLE = metrics.gauge('search_pool_idle', "풀에서 대기 중인 검색 연결 수")
+POOL_SIZE = metrics.gauge('search_pool_size', "검색 연결 풀 크기")
+SEARCH_ERRORS = metrics.counter('search_errors', "예외로 끝난 검색 수")
+POOL_OPENED = metrics.counter('search_pool_connections_opened', "풀이 비어서 새로 연 연결 수")
+
+# 패싯 이름 → subtitles 컬럼 (directory는 카테고리 폴더 이름으로 묶음)
+FACETS = {
+    'title': 's.title',
+    'season': 's.season',
+    'directory': 's.directory',
+    'language': 's.language',
+}
+# 패싯 계산 시 셀 일치 행 수 상한 (흔한 단어는 이 개수 기준 근사치)
+FACET_SCAN_LIMIT = 20000
+# 중복 묶음(collapse) 검색 시 순위 상위 몇 행을 묶음으로 접을지 (묶음별 개수는 이 행들 기준)
+COLLAPSE_SCAN_LIMIT = 2000
+
+class PooledConnection:
+    """풀에 보관되는 연결 + 마지막으로 확인한 data_version + 연결한 DB 파일 세대"""
+    __slots__ = ('conn', 'data_version', 'generation')
+    
+    def __init__(self, conn, generation=None):
+        self.conn = conn
+        self.data_version = None
+        self.generation = generation
+
 class SubtitleSearch:
-    def __init__(self, db_path="working_subtitles.db"):
+    def __init__(self, db_path="working_subtitles.db", cache_size=256, pool_size=8, query_log=None):
+        """query_log: query_log.QueryLog (있으면 쿼리별 시간/스캔량 기록, 느린 쿼리는 실행 계획까지 기록)"""
         self.db_path = db_path
+        self.query_log = query_log
+        self.cache_size = cache_size
+        self.pool_size = pool_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pool = queue.LifoQueue()
+        self._generation_lock = threading.Lock()
+        self.generation = self.db_generation()
+        self._layout = None
+        POOL_SIZE.set(pool_size)
+        POOL_IDLE.set_function(self._pool.qsize)
         
-    def search(self, query, language=None, limit=20):
+        # 예열 상태 (예열을 시작하지 않으면 바로 사용 가능)
+        self.ready = threading.Event()
+        self.ready.set()
+        self.warmup_report = None
+    
+    def db_generation(self):
+        """DB 파일 세대 = (st_dev, st_ino). 재구축 후 os.replace로 교체되면 inode가 바뀜"""
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+    
+    def check_generation(self):
+        """
+        DB 파일이 새 세대로 교체됐으면 풀의 연결을 닫고 결과 캐시 비우기
+        (기존 연결은 교체 전 파일을 계속 읽으므로 진행 중인 검색은 그대로 끝남)
+        """
+        generation = self.db_generation()
+        if generation == self.generation:
+            return
+        with self._generation_lock:
+            if generation == self.generation:
+                return
+            self.generation = generation
+            self._layout = None
+            self.close()
+            self.clear_cache()
+    
+    def acquire(self):
+        """풀에서 연결 꺼내기 (없으면 새로 연결). 연결을 재사용해야 SQLite 페이지 캐시가 유지됨"""
+        self.check_generation()
+        try:
+            pooled = self._pool.get_nowait()
+        except queue.Empty:
+            # 연결에 실패하면 게이지를 올리지 않음 (release가 호출되지 않으므로)
+            pooled = PooledConnection(db_access.connect(self.db_path, 'serve', check_same_thread=False), self.generation)
+            POOL_OPENED.inc()
+        POOL_IN_USE.inc()
+        return pooled
+    
+    def release(self, pooled):
+        """연결을 풀에 반환 (풀이 가득 찼거나 이전 세대 연결이면 닫기)"""
+        POOL_IN_USE.dec()
+        if pooled.generation != self.generation or self._pool.qsize() >= self.pool_size:
+            pooled.conn.close()
+        else:
+            self._pool.put(pooled)
+    
+    @contextmanager
+    def connection(self):
+        pooled = self.acquire()
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+    
+    def close(self):
+        """풀의 연결 모두 닫기"""
+        while True:
+            try:
+                self._pool.get_nowait().conn.close()
+            except queue.Empty:
+                break
+    
+    def check_data_version(self, pooled):
+        """다른 연결이 DB를 변경했으면 결과 캐시 비우기"""
+        data_version = pooled.conn.execute('PRAGMA data_version').fetchone()[0]
+        if pooled.data_version is not None and data_version != pooled.data_version:
+            self.clear_cache()
+        pooled.data_version = data_version
+    
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def cache_get(self, key):
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+    
+    def cache_put(self, key, result):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def search(self, query, language=None, limit=20, title=None, season=None, facets=None, collapse=False):
         """
         자막에서 텍스트 검색
         
@@ -17,43 +165,263 @@ class SubtitleSearch:
             query: 검색할 텍스트
             language: 언어 필터 ('en', 'ko', None for all)
             limit: 결과 개수 제한
-        """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+            title: 작품 제목 필터 (예: 'Batman The Animated Series', 대소문자 무시)
+            season: 시즌 필터 (예: 1)
+            facets: 함께 계산할 패싯 이름 목록 (FACETS 키, 예: ['title', 'directory', 'language'])
+            collapse: 같은 중복 묶음(cluster_id)의 자막은 대표 한 개만. 행 끝에 묶음 안 일치 자막 수 추가
         
+        결과의 linked_media: 결과 자막 파일 → 내용이 같은 사본 자막의 미디어 목록 (duplicate_subtitles)
+        """
         start_time = time.time()
+        facets = tuple(facets or ())
+        unknown = [name for name in facets if name not in FACETS]
+        if unknown:
+            raise ValueError(f"알 수 없는 패싯: {', '.join(unknown)} (가능: {', '.join(FACETS)})")
+        
+        with self.connection() as pooled:
+            self.check_data_version(pooled)
+            
+            cache_key = (query, language, limit, title, season, facets, collapse)
+            cached = self.cache_get(cache_key)
+            if cached is not None:
+                elapsed = time.time() - start_time
+                QUERIES_HIT.inc()
+                LATENCY_HIT.observe(elapsed)
+                return dict(cached, search_time_ms=elapsed * 1000, cached=True)
+            
+            try:
+                if collapse:
+                    results, collapse_scanned, collapse_capped = self.execute_collapsed(
+                        pooled.conn, query, language, limit, title, season)
+                else:
+                    results = self.execute_search(pooled.conn, query, language, limit, title, season)
+                if facets:
+                    facet_counts = self.execute_facets(pooled.conn, query, language, facets, title, season)
+                linked_media = duplicate_subtitles.linked_media(pooled.conn.cursor(), (row[5] for row in results))
+            except Exception:
+                SEARCH_ERRORS.inc()
+                raise
+        
+        elapsed = time.time() - start_time
+        QUERIES_MISS.inc()
+        LATENCY_MISS.observe(elapsed)
+        search_time = elapsed * 1000
+        
+        result = {
+            'results': results,
+            'count': len(results),
+            'search_time_ms': search_time,
+            'query': query,
+            'language_filter': language,
+            'title_filter': title,
+            'season_filter': season,
+            'collapsed': collapse,
+            'linked_media': linked_media,
+            'cached': False
+        }
+        if collapse:
+            result['collapse_scanned'], result['collapse_capped'] = collapse_scanned, collapse_capped
+        if facets:
+            result['facets'], result['facet_scanned'], result['facets_capped'] = facet_counts
+        self.cache_put(cache_key, result)
+        return result
+    
+    def fts_layout(self, conn):
+        """FTS 레이아웃 (DB 파일 세대마다 한 번 확인)"""
+        if self._layout is None:
+            self._layout = fts_schema.current_layout(conn.cursor())
+        return self._layout
+    
+    def match_source(self, conn, query, language, title=None, season=None):
+        """
+        검색/패싯 쿼리 공통 부분: (FTS 테이블, WHERE 조건, 파라미터)
+        partitioned 레이아웃이면 언어 필터 검색은 해당 언어 FTS 테이블만 검색
+        title/season: 작품 제목(대소문자 무시)/시즌 필터 (idx_subtitles_title 컬럼, 경로 LIKE 없음)
+        """
+        table, target, filter_language = fts_schema.search_source(self.fts_layout(conn), language)
+        conditions = [f'{target} MATCH ?']
+        params = [query]
+        if filter_language:
+            conditions.append('s.language = ?')
+            params.append(language)
+        if title:
+            conditions.append('s.title = ? COLLATE NOCASE')
+            params.append(title)
+        if season is not None:
+            conditions.append('s.season = ?')
+            params.append(season)
+        return table, ' AND '.join(conditions), params
+    
+    def run_query(self, conn, sql, params, source, query, language):
+        if self.query_log:
+            return self.query_log.execute(conn, sql, params, source=source, query=query, language=language)
+        return conn.execute(sql, params).fetchall()
+    
+    def result_columns(self, language):
+        """검색 결과 행 컬럼 (전체 검색일 때만 언어 포함)"""
+        columns = ['media_file', 'start_time', 'end_time', 'text', 'directory', 'subtitle_file']
+        if not language:
+            columns.append('language')
+        return columns
+    
+    def execute_search(self, conn, query, language, limit, title=None, season=None):
+        """FTS 검색 쿼리 실행"""
+        table, where, params = self.match_source(conn, query, language, title, season)
+        columns = ', '.join(f's.{column}' for column in self.result_columns(language))
         
-        if language:
-            cursor.execute('''
-                SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory, s.subtitle_file
-                FROM subtitles_fts fts
+        sql = f'''
+            SELECT {columns}
+            FROM {table} fts
+            JOIN subtitles s ON s.id = fts.rowid
+            WHERE {where}
+            ORDER BY rank
+            LIMIT ?
+        '''
+        return self.run_query(conn, sql, params + [limit], table, query, language)
+    
+    def execute_collapsed(self, conn, query, language, limit, title=None, season=None, cap=COLLAPSE_SCAN_LIMIT):
+        """
+        중복 묶음별 대표 한 개씩 검색
+        - 순위 상위 cap개 일치 행을 cluster_id로 GROUP BY (cluster_id가 없는 행은 자기 자신이 묶음)
+        - 대표는 묶음에서 순위가 가장 높은 행 (MIN(rank)의 bare column), 묶음은 대표 순위 순
+        반환: (행 목록 (검색 행 + 묶음 안 일치 자막 수), 훑은 행 수, capped)
+        """
+        table, where, params = self.match_source(conn, query, language, title, season)
+        columns = self.result_columns(language)
+        sql = f'''
+            SELECT {', '.join(columns)}, MIN(r), COUNT(*), SUM(COUNT(*)) OVER ()
+            FROM (
+                SELECT {', '.join(f's.{column}' for column in columns)},
+                       COALESCE(s.cluster_id, -s.id) AS cluster, fts.rank AS r
+                FROM {table} fts
                 JOIN subtitles s ON s.id = fts.rowid
-                WHERE fts.text MATCH ? AND s.language = ?
+                WHERE {where}
                 ORDER BY rank
                 LIMIT ?
-            ''', (query, language, limit))
-        else:
-            cursor.execute('''
-                SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory, s.subtitle_file, s.language
-                FROM subtitles_fts fts
+            )
+            GROUP BY cluster
+            ORDER BY MIN(r)
+            LIMIT ?
+        '''
+        rows = self.run_query(conn, sql, params + [max(cap, limit), limit], f'{table} collapse', query, language)
+        scanned = rows[0][-1] if rows else 0
+        return [row[:-3] + row[-2:-1] for row in rows], scanned, scanned >= max(cap, limit)
+    
+    def execute_facets(self, conn, query, language, facets, title=None, season=None, cap=FACET_SCAN_LIMIT):
+        """
+        패싯별 개수를 일치 집합 한 번 훑어서 계산
+        - 요청한 패싯 컬럼 조합으로 GROUP BY 한 번 → 조합별 개수를 패싯별로 합산 (패싯마다 쿼리하지 않음)
+        - 일치 행은 cap개까지만 셈 (순위 정렬 없음). 흔한 단어면 capped=True, 개수는 cap개 기준
+        반환: ({패싯: [[값, 개수], ...] (개수 내림차순)}, 센 행 수, capped)
+        """
+        table, where, params = self.match_source(conn, query, language, title, season)
+        aliases = [f'f{i}' for i in range(len(facets))]
+        columns = ', '.join(f'{FACETS[name]} AS {alias}' for name, alias in zip(facets, aliases))
+        sql = f'''
+            SELECT {', '.join(aliases)}, COUNT(*)
+            FROM (
+                SELECT {columns}
+                FROM {table} fts
                 JOIN subtitles s ON s.id = fts.rowid
-                WHERE fts.text MATCH ?
-                ORDER BY rank
+                WHERE {where}
                 LIMIT ?
-            ''', (query, limit))
+            )
+            GROUP BY {', '.join(aliases)}
+        '''
+        rows = self.run_query(conn, sql, params + [cap], f'{table} facets', query, language)
         
-        results = cursor.fetchall()
-        search_time = (time.time() - start_time) * 1000
+        counts = {name: {} for name in facets}
+        scanned = 0
+        for row in rows:
+            count = row[-1]
+            scanned += count
+            for name, value in zip(facets, row):
+                if name == 'directory' and value:
+                    value = Path(value).name
+                counts[name][value] = counts[name].get(value, 0) + count
+        facet_counts = {name: sorted(([value, count] for value, count in values.items()),
+                                     key=lambda item: (-item[1], str(item[0])))
+                        for name, values in counts.items()}
+        return facet_counts, scanned, scanned >= cap
+    
+    def build_sentence_query(self, sentence, positional=True):
+        """
+        문장을 FTS5 MATCH 구문으로 변환 (단어별 OR, bm25 순위에 맡김)
+        positional=False(detail=none 레이아웃)면 "i'm" 같은 단어도 토큰(i, m)으로 나눔 (구문 검색 불가)
+        """
+        words = []
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            word = word.strip("'")
+            if word and word not in words:
+                words.append(word)
         
-        conn.close()
+        terms = []
+        for word in words:
+            for term in (word.split("'") if not positional else [word]):
+                if term and term not in terms:
+                    terms.append(term)
+        return ' OR '.join(f'"{term}"' for term in terms), words
+    
+    def search_sentence(self, sentence, language=None, limit=20, title=None, season=None, facets=None,
+                        collapse=False):
+        """문장 검색 (배치 검색용). 결과에 문장 단어 목록 포함"""
+        if self._layout is None:
+            with self.connection() as pooled:
+                self.fts_layout(pooled.conn)
+        query, words = self.build_sentence_query(sentence, positional=self._layout != 'minimal')
+        if not query:
+            return {'results': [], 'count': 0, 'search_time_ms': 0.0, 'query': query,
+                    'language_filter': language, 'title_filter': title, 'season_filter': season,
+                    'collapsed': collapse, 'linked_media': {}, 'cached': False, 'words': words}
+        return dict(self.search(query, language, limit, title, season, facets, collapse), words=words)
+    
+    def warmup(self, queries, time_budget=10.0, limit=20):
+        """
+        검색어 목록을 재실행해서 결과 캐시와 SQLite 페이지 캐시 예열
         
-        return {
-            'results': results,
-            'count': len(results),
-            'search_time_ms': search_time,
-            'query': query,
-            'language_filter': language
-        }
+        Args:
+            queries: (kind, query, language) 목록. kind는 'search' 또는 'sentence'
+            time_budget: 최대 예열 시간(초)
+            limit: 예열할 결과 개수 (실제 검색의 limit과 같아야 캐시가 적중함)
+        """
+        start_time = time.time()
+        warmed = []
+        failed = []
+        timed_out = False
+        
+        try:
+            for kind, query, language in queries:
+                if time.time() - start_time >= time_budget:
+                    timed_out = True
+                    break
+                try:
+                    if kind == 'sentence':
+                        result = self.search_sentence(query, language, limit)
+                    else:
+                        result = self.search(query, language, limit)
+                    warmed.append({'kind': kind, 'query': query, 'language': language,
+                                   'count': result['count'], 'search_time_ms': round(result['search_time_ms'], 3)})
+                except sqlite3.Error as e:
+                    failed.append({'kind': kind, 'query': query, 'language': language, 'error': str(e)})
+        finally:
+            self.warmup_report = {
+                'warmed': warmed,
+                'failed': failed,
+                'skipped': len(queries) - len(warmed) - len(failed),
+                'timed_out': timed_out,
+                'elapsed_ms': round((time.time() - start_time) * 1000, 3)
+            }
+            self.ready.set()
+        
+        return self.warmup_report
+    
+    def start_warmup(self, queries, time_budget=10.0, limit=20):
+        """백그라운드 스레드에서 예열 시작. 끝나면 self.ready가 설정됨"""
+        self.ready.clear()
+        thread = threading.Thread(target=self.warmup, args=(list(queries), time_budget, limit),
+                                  name='search-warmup', daemon=True)
+        thread.start()
+        return thread
     
     def format_time(self, time_str):
         """SRT 시간을 초로 변환"""
@@ -95,6 +463,10 @@ class SubtitleSearch:
             print(f"    📺 {media_file}")
             print(f"    ⏰ {start_time} → {end_time}")
             print(f"    💬 {text}")
+            if search_result.get('collapsed') and result[-1] > 1:
+                print(f"    🧬 같은 대사 {result[-1]}개")
+            for linked in search_result.get('linked_media', {}).get(result[5], []):
+                print(f"    🔗 같은 자막: {Path(linked).name}")
             
             # 비디오 플레이를 위한 정보
             start_seconds = self.format_time(start_time)
@@ -109,6 +481,7 @@ class SubtitleSearch:
         print("💡 사용법:")
         print("  - 검색어 입력 후 Enter")
         print("  - 'en:검색어' (영어만), 'ko:검색어' (한글만)")
+        print("  - '=검색어' (같은 대사는 하나로 묶기, 예: 'en:=I'll be back')")
         print("  - 'quit' 또는 'exit'로 종료")
         print("-" * 60)
         
@@ -133,13 +506,16 @@ class SubtitleSearch:
                     query = user_input[3:].strip()
                 else:
                     query = user_input
+                collapse = query.startswith('=')
+                if collapse:
+                    query = query[1:].strip()
                 
                 if not query:
                     print("❌ 검색어를 입력해주세요.")
                     continue
                 
                 # 검색 실행
-                result = self.search(query, language, limit=10)
+                result = self.search(query, language, limit=10, collapse=collapse)
                 self.print_results(result)
                 
                 if result['count'] == 0:
@@ -155,7 +531,7 @@ def main():
     searcher = SubtitleSearch()
     
     # 데이터베이스 상태 확인
-    conn = sqlite3.connect(searcher.db_path)
+    conn = db_access.connect(searcher.db_path, 'serve')
     cursor = conn.cursor()
     
     cursor.execute('SELECT COUNT(*) FROM subtitles')
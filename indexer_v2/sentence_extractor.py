@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+영어/한글 혼합 텍스트 문장 분리기
+- 정규식 한 번의 finditer로 문장 분리와 스크립트(문자 체계) 분류를 동시에 수행
+- 문자 단위 파이썬 루프나 문장별 langdetect 호출 없음
+"""
+
+import re
+
+# 유니코드 스크립트 범위
+HANGUL_RANGES = '\u1100-\u11ff\u3130-\u318f\uac00-\ud7af'
+LATIN_RANGES = 'A-Za-z\u00c0-\u024f'
+
+SENTENCE_END = '.!?\u2026\u3002\uff01\uff1f'
+CLOSING_QUOTES = '"\'\u201d\u2019)\\]'
+
+
+def _build_pattern():
+    """문장 하나에 매치되는 정규식 생성"""
+    # 문장 안쪽의 마침표: 3.5, e.g, U.S 처럼 공백/따옴표가 뒤따르지 않는 경우와 약어
+    inner = (
+        rf'[{SENTENCE_END}](?=[^\s{SENTENCE_END}{CLOSING_QUOTES}])'
+        r'|(?<=\b(?:Mr|Ms|Dr|St|Jr|Sr|vs))\.'
+        r'|(?<=\b(?:Mrs|etc|Inc|Ltd))\.'
+        r'|(?<=\bProf)\.'
+    )
+    # 구간(segment): 한글/라틴 문자가 처음 나오는 지점에서 그룹을 한 번만 잡고 나머지는 통째로 소비
+    # 각 구간은 문장 끝 문자에서만 멈추므로 되추적 없이 선형으로 매치됨
+    segment = (
+        rf'[^{SENTENCE_END}\n{HANGUL_RANGES}{LATIN_RANGES}]*'
+        rf'(?:(?P<en>[{LATIN_RANGES}])[^{SENTENCE_END}\n{HANGUL_RANGES}]*)?'
+        rf'(?:(?P<ko>[{HANGUL_RANGES}])[^{SENTENCE_END}\n]*)?'
+    )
+    end = rf'(?:[{SENTENCE_END}]+[{CLOSING_QUOTES}]*)?'
+
+    # 그룹은 반복 중 한 번이라도 매치되면 값이 남으므로 문장 전체의 스크립트 판정에 사용
+    return re.compile(
+        rf'(?=[^\s{SENTENCE_END}])(?:(?:{inner})?{segment})+{end}'
+    )
+
+
+class SentenceExtractor:
+    """정규식 기반 문장 분리 + 스크립트 분류"""
+
+    SENTENCE_PATTERN = _build_pattern()
+
+    def iter_sentences(self, text):
+        """(문장, 스크립트) 튜플을 순서대로 생성. 스크립트: 'en', 'ko', 'other'"""
+        for match in self.SENTENCE_PATTERN.finditer(text):
+            sentence = match.group().strip()
+            if not sentence:
+                continue
+            if match.group('ko'):
+                yield sentence, 'ko'
+            elif match.group('en'):
+                yield sentence, 'en'
+            else:
+                yield sentence, 'other'
+
+    def iter_script(self, text, script):
+        """지정한 스크립트의 문장만 생성"""
+        for sentence, sentence_script in self.iter_sentences(text):
+            if sentence_script == script:
+                yield sentence
+
+    def extract_english(self, text):
+        """영어 문장 목록 반환"""
+        return list(self.iter_script(text, 'en'))
+
+    def extract_korean(self, text):
+        """한글 문장 목록 반환"""
+        return list(self.iter_script(text, 'ko'))
+
+
+# 테스트
+if __name__ == "__main__":
+    extractor = SentenceExtractor()
+
+    test_text = """
+    The meeting has been postponed until next Wednesday.
+    회의가 다음 주 수요일로 연기되었습니다.
+
+    Please submit your expense reports by the end of the month.
+    이달 말까지 경비 보고서를 제출해 주십시오.
+
+    Mr. Smith paid $3.50 for it. I hope you have a great day!
+    좋은 하루 되세요!
+    """
+
+    print("=== 문장 분리 테스트 ===")
+    for sentence, script in extractor.iter_sentences(test_text):
+        print(f"[{script}] {sentence}")
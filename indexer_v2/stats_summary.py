@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+통계/탐색 화면용 요약 테이블
+- stats_summary: (directory, media_file, language)별 자막 수. 인덱서가 파일을 저장/삭제할 때 해당 미디어 행만 갱신
+- 통계 화면과 디렉토리 탐색은 자막 행(수백만 개) 대신 미디어 파일 수만큼의 요약 행만 읽음
+- idx_subtitles_media_cover: 미디어 한 개의 요약을 다시 계산할 때 subtitles 본문을 읽지 않는 커버링 인덱스
+"""
+
+
+def create(cursor):
+    """요약 테이블과 커버링 인덱스 생성. 새로 만들었으면 전체 내용을 채우고 True 반환"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='stats_summary'")
+    exists = cursor.fetchone() is not None
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subtitles_media_cover
+        ON subtitles(media_file, directory, language)
+    """)
+    if exists:
+        return False
+
+    cursor.execute("""
+        CREATE TABLE stats_summary (
+            directory TEXT NOT NULL,
+            media_file TEXT NOT NULL,
+            language TEXT NOT NULL,
+            cue_count INTEGER NOT NULL,
+            PRIMARY KEY (directory, media_file, language)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX idx_stats_summary_media ON stats_summary(media_file)")
+    cursor.execute("CREATE INDEX idx_stats_summary_language ON stats_summary(language, cue_count)")
+    rebuild(cursor)
+    return True
+
+
+def ensure(conn):
+    """읽기 쪽에서 호출: 요약 테이블이 없는 예전 DB면 한 번 만들어 채움"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='stats_summary'")
+    if cursor.fetchone() is None:
+        with conn:
+            create(cursor)
+
+
+def rebuild(cursor):
+    """subtitles 전체로 요약 재계산"""
+    cursor.execute("DELETE FROM stats_summary")
+    cursor.execute("""
+        INSERT INTO stats_summary (directory, media_file, language, cue_count)
+        SELECT COALESCE(directory, ''), COALESCE(media_file, ''), COALESCE(language, ''), COUNT(*)
+        FROM subtitles
+        GROUP BY 1, 2, 3
+    """)
+
+
+def refresh_media(cursor, media_file):
+    """미디어 파일 한 개의 요약 행 재계산 (커버링 인덱스만 읽음)"""
+    cursor.execute("DELETE FROM stats_summary WHERE media_file = ?", (str(media_file),))
+    cursor.execute("""
+        INSERT INTO stats_summary (directory, media_file, language, cue_count)
+        SELECT COALESCE(directory, ''), media_file, COALESCE(language, ''), COUNT(*)
+        FROM subtitles
+        WHERE media_file = ?
+        GROUP BY directory, language
+    """, (str(media_file),))
+
+
+def totals(cursor):
+    """(총 자막 수, 미디어 파일 수, 디렉토리 수)"""
+    cursor.execute("""
+        SELECT COALESCE(SUM(cue_count), 0), COUNT(DISTINCT media_file), COUNT(DISTINCT directory)
+        FROM stats_summary
+    """)
+    return cursor.fetchone()
+
+
+def language_counts(cursor):
+    cursor.execute("SELECT language, SUM(cue_count) FROM stats_summary GROUP BY language")
+    return cursor.fetchall()
+
+
+def directory_counts(cursor, order_by='subtitle_count DESC'):
+    """[(directory, 자막 수, 파일 수)]"""
+    cursor.execute(f"""
+        SELECT directory, SUM(cue_count) AS subtitle_count, COUNT(DISTINCT media_file) AS file_count
+        FROM stats_summary
+        GROUP BY directory
+        ORDER BY {order_by}
+    """)
+    return cursor.fetchall()
+
+
+def media_counts(cursor, directory):
+    """[(media_file, 자막 수)] - 디렉토리 안 파일 목록 (기본 키 범위 스캔)"""
+    cursor.execute("""
+        SELECT media_file, SUM(cue_count)
+        FROM stats_summary
+        WHERE directory = ?
+        GROUP BY media_file
+        ORDER BY media_file
+    """, (directory,))
+    return cursor.fetchall()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+FTS 레이아웃(fts_schema) 테스트
+- partitioned 레이아웃의 언어별 FTS 테이블도 integrity-check 통과 (생성, 증분 갱신, 예전 DB 변환)
+실행: python -m pytest test_fts_schema.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db_access
+import fts_schema
+from working_indexer import WorkingIndexer
+
+ROWS = [
+    ('we should order dinner', 'en'),
+    ('저녁 주문하자', 'ko'),
+    ('the meeting is over', 'en'),
+    ('회의 끝났어 OK', 'ko'),
+    ('okay thanks for dinner', 'en'),
+]
+
+
+def insert_rows(conn, rows):
+    conn.executemany("""
+        INSERT INTO subtitles (media_file, subtitle_file, text, language, directory)
+        VALUES ('/media/Movie/A.mkv', ?, ?, ?, '/media/Movie')
+    """, [(f"/media/Movie/A{'_ko' if language == 'ko' else ''}.srt", text, language) for text, language in rows])
+    conn.commit()
+
+
+def partition_ids(conn, language, term):
+    table = fts_schema.partition_table(language)
+    return sorted(row[0] for row in conn.execute(f"SELECT rowid FROM {table} WHERE {table} MATCH ?", (term,)))
+
+
+def filtered_ids(conn, language, term):
+    return sorted(row[0] for row in conn.execute(f"""
+        SELECT s.id FROM {fts_schema.FTS_TABLE} f JOIN subtitles s ON s.id = f.rowid
+        WHERE {fts_schema.FTS_TABLE} MATCH ? AND s.language = ?
+    """, (term, language)))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "partitioned.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        WorkingIndexer(path, fts_layout='partitioned')
+    return path
+
+
+def test_partitions_pass_integrity_check_after_build_and_updates(db_path):
+    conn = db_access.connect(db_path, 'write')
+    insert_rows(conn, ROWS)
+    fts_schema.integrity_check(conn.cursor())
+
+    # 증분 갱신: 언어 변경(테이블 간 이동), 텍스트 변경, 삭제
+    conn.execute("UPDATE subtitles SET language = 'ko' WHERE text = 'okay thanks for dinner'")
+    conn.execute("UPDATE subtitles SET text = 'the meeting starts now' WHERE text = 'the meeting is over'")
+    conn.execute("DELETE FROM subtitles WHERE text = '저녁 주문하자'")
+    conn.commit()
+    fts_schema.integrity_check(conn.cursor())
+
+    for language, term in (('en', 'dinner'), ('ko', 'dinner'), ('en', 'meeting'), ('ko', '회의')):
+        assert partition_ids(conn, language, term) == filtered_ids(conn, language, term)
+
+    with conn:
+        fts_schema.rebuild(conn.cursor())
+    fts_schema.integrity_check(conn.cursor())
+    conn.close()
+
+
+def test_old_partitions_are_upgraded(db_path):
+    conn = db_access.connect(db_path, 'write')
+    insert_rows(conn, ROWS)
+    # 예전 구조: 언어별 테이블의 콘텐츠가 subtitles 전체
+    cursor = conn.cursor()
+    fts_schema.drop_partitions(cursor)
+    for language in fts_schema.PARTITION_LANGUAGES:
+        table = fts_schema.partition_table(language)
+        cursor.execute(f"CREATE VIRTUAL TABLE {table} USING fts5(text, content='subtitles', content_rowid='id')")
+        cursor.execute(f"INSERT INTO {table}(rowid, text) SELECT id, text FROM subtitles WHERE language = ?",
+                       (language,))
+    conn.commit()
+    with pytest.raises(db_access.sqlite3.DatabaseError):
+        fts_schema.integrity_check(cursor)
+    conn.rollback()
+    conn.close()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        WorkingIndexer(db_path)
+    conn = db_access.connect(db_path, 'write')
+    assert fts_schema.current_layout(conn.cursor()) == 'partitioned'
+    fts_schema.integrity_check(conn.cursor())
+    assert partition_ids(conn, 'ko', '회의') == filtered_ids(conn, 'ko', '회의')
+    conn.close()
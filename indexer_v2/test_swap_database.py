@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+섀도 DB 교체(MediaIndexSystem.swap_in_database) 테스트
+- 라이브 DB가 WAL 모드이고 다른 연결이 열려 있는 상태에서 교체
+- 교체 후 새 연결이 이전 파일의 WAL이 아니라 새 DB 내용을 읽는지 확인
+실행: python -m pytest test_swap_database.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db_access
+from media_system import MediaIndexSystem
+
+
+def create_db(path, rows):
+    conn = db_access.connect(path, 'write')
+    conn.execute("CREATE TABLE items (v INTEGER)")
+    conn.executemany("INSERT INTO items (v) VALUES (?)", ((v,) for v in range(rows)))
+    conn.commit()
+    return conn
+
+
+def add_rows(conn, start, count):
+    conn.executemany("INSERT INTO items (v) VALUES (?)", ((v,) for v in range(start, start + count)))
+    conn.commit()
+
+
+def read_items(path):
+    conn = db_access.connect(path, 'write')
+    try:
+        return conn.execute("SELECT COUNT(*), MAX(v) FROM items").fetchone()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def system(tmp_path):
+    system = MediaIndexSystem(str(tmp_path / "live.db"))
+    yield system
+    system.searcher.close()
+
+
+def build_shadow(system, rows=5000):
+    shadow_path = f"{system.db_path}.rebuild"
+    conn = db_access.connect(shadow_path, 'bulk-load')
+    conn.execute("CREATE TABLE items (v INTEGER)")
+    conn.executemany("INSERT INTO items (v) VALUES (?)", ((v,) for v in range(rows)))
+    conn.commit()
+    conn.close()
+    return shadow_path
+
+
+def test_swap_with_open_reader_reads_new_database(system):
+    # 라이브 DB: WAL에 반영 안 된 커밋이 있고, 읽기 연결이 열려 있음 (검색 서버의 풀 연결)
+    writer = create_db(system.db_path, 3000)
+    reader = db_access.connect(system.db_path, 'serve')
+    assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 3000
+    add_rows(writer, 3000, 500)
+
+    system.swap_in_database(build_shadow(system))
+
+    assert read_items(system.db_path) == (5000, 4999)
+    # 이전 연결은 이전 파일을 계속 읽고, 닫아도 새 DB에 영향 없음
+    assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 3500
+    reader.close()
+    writer.close()
+    assert read_items(system.db_path) == (5000, 4999)
+    assert read_items(f"{system.db_path}.backup") == (3500, 3499)
+    conn = db_access.connect(system.db_path, 'serve')
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    conn.close()
+
+
+def test_swap_aborts_while_reader_holds_old_snapshot(system):
+    writer = create_db(system.db_path, 3000)
+    reader = db_access.connect(system.db_path, 'serve')
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM items").fetchone()
+    add_rows(writer, 3000, 500)
+    shadow_path = build_shadow(system)
+
+    with pytest.raises(RuntimeError):
+        system.swap_in_database(shadow_path, checkpoint_timeout=0.2)
+
+    # 라이브 DB와 섀도 DB 모두 그대로 (다시 시도 가능)
+    assert os.path.exists(shadow_path)
+    reader.rollback()
+    assert read_items(system.db_path) == (3500, 3499)
+
+    system.swap_in_database(shadow_path)
+    assert read_items(system.db_path) == (5000, 4999)
+    reader.close()
+    writer.close()
+
+
+def test_repeated_swaps_use_new_generation_files(system):
+    create_db(system.db_path, 10).close()
+    system.swap_in_database(build_shadow(system, 20))
+    first = os.path.realpath(system.db_path)
+    writer = db_access.connect(system.db_path, 'write')
+    add_rows(writer, 20, 5)
+
+    system.swap_in_database(build_shadow(system, 30))
+    second = os.path.realpath(system.db_path)
+
+    assert first != second
+    assert not os.path.exists(first)
+    assert read_items(system.db_path) == (30, 29)
+    writer.close()
+    assert read_items(system.db_path) == (30, 29)
+    assert read_items(f"{system.db_path}.backup") == (25, 24)
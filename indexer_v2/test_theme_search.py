@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+테마 히트(theme_search.ThemeIndex) 증분 갱신 테스트
+- 자막 삭제 후 기준점(last_subtitle_id): 재사용될 수 있는 id(남은 최대 id 초과)만 다시 검사
+실행: python -m pytest test_theme_search.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db_access
+import fts_schema
+from theme_search import ThemeIndex
+from working_indexer import WorkingIndexer
+
+THEMES = {'dinner': {'title': '저녁', 'phrases': ['dinner']}}
+
+
+def insert_texts(conn, texts):
+    conn.executemany("INSERT INTO subtitles (subtitle_file, text, language) VALUES ('/media/A.srt', ?, 'en')",
+                     [(text,) for text in texts])
+    conn.commit()
+
+
+def watermark(conn):
+    return conn.execute("SELECT last_subtitle_id FROM themes WHERE name = 'dinner'").fetchone()[0]
+
+
+def hit_ids(conn):
+    return [row[0] for row in conn.execute("SELECT subtitle_id FROM theme_hits ORDER BY subtitle_id")]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    db_path = str(tmp_path / "themes.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        WorkingIndexer(db_path)
+    conn = db_access.connect(db_path, 'write')
+    insert_texts(conn, [f"line {i} dinner" if i % 2 else f"line {i}" for i in range(1, 11)])
+    ThemeIndex(db_path, THEMES).update_hits()
+    yield conn
+    conn.close()
+
+
+def themes_for(conn):
+    return ThemeIndex(conn.execute("PRAGMA database_list").fetchone()[2], THEMES)
+
+
+def test_deleting_old_rows_keeps_watermark(conn):
+    assert watermark(conn) == 10
+    conn.execute("DELETE FROM subtitles WHERE id <= 3")
+    conn.commit()
+    assert watermark(conn) == 10
+    assert hit_ids(conn) == [5, 7, 9]
+    assert themes_for(conn).update_hits() == {}
+
+
+def test_deleting_newest_rows_rescans_reused_ids(conn):
+    conn.execute("DELETE FROM subtitles WHERE id >= 8")
+    conn.commit()
+    assert watermark(conn) == 7
+    insert_texts(conn, ["more dinner", "no match", "dinner again"])
+    assert themes_for(conn).update_hits() == {'dinner': 2}
+    assert hit_ids(conn) == [1, 3, 5, 7, 8, 10]
+
+
+def test_recreated_subtitles_table_resets_hits(conn):
+    schema = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='subtitles'").fetchone()[0]
+    conn.execute("DROP TABLE subtitles")
+    conn.execute(schema)
+    fts_schema.create_triggers(conn.cursor())
+    conn.execute("INSERT INTO subtitles_fts (subtitles_fts) VALUES ('rebuild')")
+    conn.commit()
+    insert_texts(conn, ["dinner", "nothing"])
+    assert themes_for(conn).update_hits() == {'dinner': 1}
+    assert hit_ids(conn) == [1]
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+테마 검색 엔진
+- 테마 = 구문(phrase) 목록. 예: 레스토랑 주문 → "table for", "the menu", "the check" ...
+- 한글은 어절 단위로 토큰화되므로 '죄송*' 처럼 접두사 구문으로 정의
+- 인덱싱 시점에 테마별 매치 결과를 theme_hits 테이블에 미리 계산 (새로 추가된 자막만 증분 처리)
+- 테마 열기는 theme_hits 인덱스 조회 한 번 (구문마다 FTS 검색을 다시 하지 않음)
+- 위치 정보가 없는 FTS 레이아웃(minimal, detail=none)에서는 구문을 단어 AND로 찾고 원문에서 구문을 다시 확인
+"""
+
+import re
+import sqlite3
+import time
+
+import db_access
+import fts_schema
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+DEFAULT_THEMES = {
+    'restaurant-ordering': {
+        'title': '🍽️ 레스토랑 주문',
+        'phrases': ['table for', 'the menu', 'the check', "I'll have", 'ready to order',
+                    'reservation', 'for dessert', '주문*', '메뉴판*']
+    },
+    'apologizing': {
+        'title': '🙇 사과하기',
+        'phrases': ["I'm sorry", 'I apologize', 'my fault', 'forgive me', 'my bad',
+                    '죄송*', '미안*']
+    },
+    'thanking': {
+        'title': '🙏 감사 표현',
+        'phrases': ['thank you', 'thanks a lot', 'I appreciate', 'grateful',
+                    '감사*', '고마*']
+    },
+    'greetings': {
+        'title': '👋 인사',
+        'phrases': ['how are you', 'nice to meet you', 'good morning', 'see you later',
+                    '안녕하세요', '반가*']
+    },
+    'airport': {
+        'title': '✈️ 공항에서',
+        'phrases': ['boarding pass', 'my flight', 'the gate', 'passport', 'check in',
+                    'baggage', '탑승*']
+    },
+    'business': {
+        'title': '💼 비즈니스 영어',
+        'phrases': ['the meeting', 'the deadline', 'the report', 'the agenda', 'the presentation',
+                    'schedule a', '회의*']
+    },
+    'love': {
+        'title': '💕 사랑과 관계',
+        'phrases': ['I love you', 'marry me', 'miss you', 'my heart', '사랑*']
+    },
+}
+
+
+def phrase_to_match(phrase, positional=True):
+    """
+    구문을 FTS5 MATCH 구문으로 변환 ('*'로 끝나면 접두사 검색)
+    positional=False(detail=none)면 구문 검색 대신 단어별 AND
+    """
+    prefix = phrase.endswith('*')
+    phrase = phrase.rstrip('*').replace('"', '""').strip()
+    if not positional and len(TOKEN_PATTERN.findall(phrase)) > 1:
+        # unicode61 토크나이저처럼 영숫자 단위로 나눔 ("I'm" → i, m)
+        terms = [f'"{token}"' for token in TOKEN_PATTERN.findall(phrase)]
+        if prefix:
+            terms[-1] += '*'
+        return ' AND '.join(terms)
+    return f'"{phrase}"*' if prefix else f'"{phrase}"'
+
+
+class ThemeIndex:
+    def __init__(self, db_path="working_subtitles.db", themes=None):
+        self.db_path = db_path
+        self.themes = themes if themes is not None else DEFAULT_THEMES
+
+    def connect(self, profile='serve'):
+        """조회는 serve (읽기 전용), 히트/기준점 갱신은 maintenance"""
+        return db_access.connect(self.db_path, profile)
+    
+    def phrase_filter(self, layout, phrase):
+        """
+        (MATCH 구문, 원문 확인용 문자열) 반환
+        위치 정보가 있는 레이아웃이면 확인 문자열은 None (FTS 구문 검색으로 충분)
+        """
+        positional = layout != 'minimal'
+        exact = phrase.rstrip('*').strip()
+        if positional or len(TOKEN_PATTERN.findall(exact)) <= 1:
+            return phrase_to_match(phrase), None
+        return phrase_to_match(phrase, positional=False), exact.lower()
+
+    def init_db(self, conn):
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS themes (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                title TEXT,
+                phrases TEXT NOT NULL,
+                last_subtitle_id INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS theme_hits (
+                theme_id INTEGER NOT NULL,
+                subtitle_id INTEGER NOT NULL,
+                phrase TEXT NOT NULL,
+                PRIMARY KEY (theme_id, subtitle_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_theme_hits_subtitle ON theme_hits(subtitle_id)")
+
+        # 트리거가 없으면 처음이거나 subtitles 테이블을 새로 만든 것 (테이블을 지우면 트리거도 지워짐)
+        # → 이전 히트와 기준점은 다른 행을 가리키므로 모두 버리고 처음부터 계산
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name='theme_hits_subtitles_ad'")
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("DELETE FROM theme_hits")
+            cursor.execute("UPDATE themes SET last_subtitle_id = 0")
+        elif 'MAX(id)' not in row[0]:
+            # 예전 트리거 (지운 id마다 기준점을 낮춤) 교체
+            cursor.execute("DROP TRIGGER theme_hits_subtitles_ad")
+
+        # 자막이 지워지면 해당 히트도 지움. id는 남은 최대 id보다 큰 값만 재사용되므로
+        # 기준점은 남은 최대 id보다 클 때만 낮춤 (오래된 파일을 재인덱싱해도 전체를 다시 검사하지 않음)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS theme_hits_subtitles_ad AFTER DELETE ON subtitles BEGIN
+                DELETE FROM theme_hits WHERE subtitle_id = old.id;
+                UPDATE themes SET last_subtitle_id = (SELECT COALESCE(MAX(id), 0) FROM subtitles)
+                WHERE last_subtitle_id > (SELECT COALESCE(MAX(id), 0) FROM subtitles);
+            END
+        """)
+
+    def sync_definitions(self, conn):
+        """테마 정의를 DB에 반영. 구문 목록이 바뀐 테마는 히트를 다시 계산"""
+        cursor = conn.cursor()
+
+        for name, theme in self.themes.items():
+            phrases = '\n'.join(theme['phrases'])
+            cursor.execute("SELECT id, phrases FROM themes WHERE name = ?", (name,))
+            row = cursor.fetchone()
+
+            if row is None:
+                cursor.execute("INSERT INTO themes (name, title, phrases) VALUES (?, ?, ?)",
+                               (name, theme.get('title', name), phrases))
+            elif row[1] != phrases:
+                cursor.execute("DELETE FROM theme_hits WHERE theme_id = ?", (row[0],))
+                cursor.execute("UPDATE themes SET title = ?, phrases = ?, last_subtitle_id = 0 WHERE id = ?",
+                               (theme.get('title', name), phrases, row[0]))
+
+    def update_hits(self):
+        """새로 추가된 자막에 대해서만 테마 히트 계산. 테마별 추가된 히트 수 반환"""
+        conn = self.connect('maintenance')
+        added = {}
+
+        with conn:
+            self.init_db(conn)
+            self.sync_definitions(conn)
+
+            cursor = conn.cursor()
+            layout = fts_schema.current_layout(cursor)
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM subtitles")
+            max_id = cursor.fetchone()[0]
+
+            cursor.execute("SELECT id, name, phrases, last_subtitle_id FROM themes")
+            for theme_id, name, phrases, last_id in cursor.fetchall():
+                if name not in self.themes or last_id >= max_id:
+                    continue
+
+                count = 0
+                for phrase in phrases.split('\n'):
+                    match, exact = self.phrase_filter(layout, phrase)
+                    if exact is None:
+                        result = conn.execute(f"""
+                            INSERT OR IGNORE INTO theme_hits (theme_id, subtitle_id, phrase)
+                            SELECT ?, rowid, ? FROM subtitles_fts
+                            WHERE {fts_schema.match_column(layout)} MATCH ? AND rowid > ? AND rowid <= ?
+                        """, (theme_id, phrase, match, last_id, max_id))
+                    else:
+                        result = conn.execute(f"""
+                            INSERT OR IGNORE INTO theme_hits (theme_id, subtitle_id, phrase)
+                            SELECT ?, fts.rowid, ? FROM subtitles_fts fts
+                            JOIN subtitles s ON s.id = fts.rowid
+                            WHERE {fts_schema.match_column(layout, 'fts')} MATCH ? AND fts.rowid > ? AND fts.rowid <= ?
+                              AND instr(lower(s.text), ?) > 0
+                        """, (theme_id, phrase, match, last_id, max_id, exact))
+                    count += result.rowcount
+
+                conn.execute("UPDATE themes SET last_subtitle_id = ? WHERE id = ?", (max_id, theme_id))
+                added[name] = count
+
+        conn.close()
+        return added
+
+    def list_themes(self):
+        """테마 목록과 히트 수"""
+        conn = self.connect()
+        try:
+            rows = conn.execute("""
+                SELECT t.name, t.title, t.phrases,
+                       (SELECT COUNT(*) FROM theme_hits h WHERE h.theme_id = t.id)
+                FROM themes t
+                ORDER BY t.name
+            """).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        conn.close()
+
+        return [{'name': name, 'title': title, 'phrases': phrases.split('\n'), 'hit_count': hit_count}
+                for name, title, phrases, hit_count in rows]
+
+    def open_theme(self, name, language=None, limit=50, offset=0):
+        """미리 계산된 theme_hits에서 테마 결과 조회"""
+        start_time = time.time()
+        conn = self.connect()
+
+        try:
+            if language:
+                rows = conn.execute("""
+                    SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory, s.subtitle_file,
+                           s.language, h.phrase
+                    FROM themes t
+                    JOIN theme_hits h ON h.theme_id = t.id
+                    JOIN subtitles s ON s.id = h.subtitle_id
+                    WHERE t.name = ? AND s.language = ?
+                    ORDER BY h.subtitle_id
+                    LIMIT ? OFFSET ?
+                """, (name, language, limit, offset)).fetchall()
+            else:
+                rows = conn.execute("""
+                    SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory, s.subtitle_file,
+                           s.language, h.phrase
+                    FROM themes t
+                    JOIN theme_hits h ON h.theme_id = t.id
+                    JOIN subtitles s ON s.id = h.subtitle_id
+                    WHERE t.name = ?
+                    ORDER BY h.subtitle_id
+                    LIMIT ? OFFSET ?
+                """, (name, limit, offset)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        conn.close()
+
+        return {
+            'theme': name,
+            'results': rows,
+            'count': len(rows),
+            'search_time_ms': (time.time() - start_time) * 1000,
+            'language_filter': language
+        }
+
+    def live_theme_search(self, name, language=None, limit=50):
+        """비교용: theme_hits 없이 구문마다 FTS 검색"""
+        start_time = time.time()
+        conn = self.connect()
+        layout = fts_schema.current_layout(conn.cursor())
+        target = fts_schema.match_column(layout, 'fts')
+        rows = []
+
+        for phrase in self.themes[name]['phrases']:
+            match, exact = self.phrase_filter(layout, phrase)
+            if language:
+                rows.extend(conn.execute(f"""
+                    SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory, s.subtitle_file,
+                           s.language, ?
+                    FROM subtitles_fts fts
+                    JOIN subtitles s ON s.id = fts.rowid
+                    WHERE {target} MATCH ? AND s.language = ?
+                      AND (? IS NULL OR instr(lower(s.text), ?) > 0)
+                """, (phrase, match, language, exact, exact)).fetchall())
+            else:
+                rows.extend(conn.execute(f"""
+                    SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory, s.subtitle_file,
+                           s.language, ?
+                    FROM subtitles_fts fts
+                    JOIN subtitles s ON s.id = fts.rowid
+                    WHERE {target} MATCH ?
+                      AND (? IS NULL OR instr(lower(s.text), ?) > 0)
+                """, (phrase, match, exact, exact)).fetchall())
+        conn.close()
+
+        return {
+            'theme': name,
+            'results': rows[:limit],
+            'count': min(len(rows), limit),
+            'search_time_ms': (time.time() - start_time) * 1000,
+            'language_filter': language
+        }
+
+    def theme_queries(self):
+        """
+        캐시 예열용 검색어 목록 ((kind, query, language) 형식)
+        minimal(detail=none) 레이아웃은 구문 검색이 안 되므로 단어별 AND로 예열 (phrase_filter와 같은 변환)
+        """
+        conn = self.connect()
+        layout = fts_schema.current_layout(conn.cursor())
+        conn.close()
+        queries = []
+        for theme in self.themes.values():
+            for phrase in theme['phrases']:
+                queries.append(('search', self.phrase_filter(layout, phrase)[0], None))
+        return queries
+
+
+# 테스트
+if __name__ == "__main__":
+    import sys
+
+    theme_index = ThemeIndex(sys.argv[1] if len(sys.argv) > 1 else "working_subtitles.db")
+
+    print("=== 테마 히트 갱신 ===")
+    for name, count in theme_index.update_hits().items():
+        print(f"   {name}: +{count}개")
+
+    print("\n=== 테마 목록 ===")
+    for theme in theme_index.list_themes():
+        print(f"   {theme['title']} ({theme['name']}): {theme['hit_count']:,}개")
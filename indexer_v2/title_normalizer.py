@@ -1,9 +1,66 @@
 #!/usr/bin/env python3
 
 import re
-import os
+from collections import namedtuple
+from functools import lru_cache
 from pathlib import Path
 
+# 패턴은 모듈 로드 시 한 번만 컴파일
+YEAR_IN_PARENS = re.compile(r'\(\d{4}\)')
+EPISODE_PATTERN = re.compile(r'[- ._](?:S(\d{1,2})E(\d{1,3})|(\d{1,2})x(\d{1,3}))', re.IGNORECASE)
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+QUALITY_PATTERN = re.compile(r'\b(1080p|720p|480p|BluRay|DVDRip|WEBRip).*$', re.IGNORECASE)
+SEPARATOR_PATTERN = re.compile(r'[._-]+')
+SPACE_PATTERN = re.compile(r'\s+')
+SEASON_DIRECTORY = re.compile(r'^(?:Season|시즌)\s*(\d{1,2})$', re.IGNORECASE)
+UNSAFE_CHARS = re.compile(r'[^\w\s-]')
+SPACES_OR_DASHES = re.compile(r'[-\s]+')
+
+# 인덱싱 중에는 미디어 파일 하나당 자막 파일(영어/한글)이 여러 개라 같은 경로를 반복해서 파싱함
+PARSE_CACHE_SIZE = 8192
+
+MediaTitle = namedtuple('MediaTitle', ['title', 'season', 'episode'])
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_media_path(file_path):
+    """
+    미디어 경로 → MediaTitle(정규화된 제목, 시즌, 에피소드). 영화는 시즌/에피소드가 None
+    - 파일명에 S01E02 / 1x02가 없으면 상위 폴더 이름(Season 1, 시즌 1)에서 시즌만 가져옴
+    - 파일명에서 제목이 남지 않으면(예: S01E02.mkv) 시즌 폴더 위의 작품 폴더 이름 사용
+    """
+    path = Path(file_path)
+    name = YEAR_IN_PARENS.sub('', path.stem)
+
+    season = episode = None
+    # 시즌/에피소드 앞까지만
+    match = EPISODE_PATTERN.search(name)
+    if match:
+        season = int(match.group(1) or match.group(3))
+        episode = int(match.group(2) or match.group(4))
+        name = name[:match.start()]
+
+    # 년도 앞까지만 (영화)
+    match = YEAR_PATTERN.search(name)
+    if match:
+        name = name[:match.start()]
+
+    # 화질정보 제거, 특수문자를 공백으로
+    name = QUALITY_PATTERN.sub('', name)
+    name = SPACE_PATTERN.sub(' ', SEPARATOR_PATTERN.sub(' ', name)).strip()
+
+    parent = path.parent
+    season_directory = SEASON_DIRECTORY.match(parent.name)
+    if season_directory:
+        if season is None:
+            season = int(season_directory.group(1))
+        parent = parent.parent
+    if not name:
+        name = SPACE_PATTERN.sub(' ', SEPARATOR_PATTERN.sub(' ', YEAR_IN_PARENS.sub('', parent.name))).strip()
+
+    return MediaTitle(name, season, episode)
+
+
 class TitleNormalizer:
     """파일명에서 간단한 제목을 추출하는 클래스"""
     
@@ -12,43 +69,24 @@ class TitleNormalizer:
     
     def extract_title(self, file_path):
         """파일 경로에서 제목 추출"""
-        filename = os.path.basename(file_path)
-        name = os.path.splitext(filename)[0]
-        
-        # 년도 제거
-        name = re.sub(r'\(\d{4}\)', '', name)
-        
-        # 시즌/에피소드 앞까지만
-        season_match = re.search(r'[- ](S\d{1,2}E\d{1,2}|\d{1,2}x\d{1,2})', name, re.IGNORECASE)
-        if season_match:
-            name = name[:season_match.start()]
-        
-        # 년도 앞까지만 (영화)
-        year_match = re.search(r'\b(19|20)\d{2}\b', name)
-        if year_match:
-            name = name[:year_match.start()]
-        
-        # 화질정보 제거
-        name = re.sub(r'\b(1080p|720p|480p|BluRay|DVDRip|WEBRip).*$', '', name, flags=re.IGNORECASE)
-        
-        # 특수문자를 공백으로
-        name = re.sub(r'[._-]+', ' ', name)
-        name = name.strip()
-        
-        return name
+        return parse_media_path(str(file_path)).title
+    
+    def parse(self, file_path):
+        """파일 경로에서 (제목, 시즌, 에피소드) 추출"""
+        return parse_media_path(str(file_path))
     
     def normalize_for_folder(self, text):
         """폴더명에 사용할 수 있도록 정규화"""
         # 특수문자를 언더스코어로
-        normalized = re.sub(r'[^\w\s-]', '', text)
-        normalized = re.sub(r'[-\s]+', '_', normalized)
+        normalized = UNSAFE_CHARS.sub('', text)
+        normalized = SPACES_OR_DASHES.sub('_', normalized)
         return normalized.strip('_')
     
     def normalize_for_filename(self, text):
         """파일명에 사용할 수 있도록 정규화"""
         # 특수문자 제거하고 언더스코어로
-        normalized = re.sub(r'[^\w\s-]', '', text)
-        normalized = re.sub(r'[-\s]+', '_', normalized)
+        normalized = UNSAFE_CHARS.sub('', text)
+        normalized = SPACES_OR_DASHES.sub('_', normalized)
         return normalized.strip('_')
 
 # 테스트
@@ -65,7 +103,7 @@ if __name__ == "__main__":
     
     print("=== 제목 정규화 테스트 ===")
     for file in test_files:
-        normalized = normalizer.extract_title(file)
+        title, season, episode = normalizer.parse(file)
         print(f"원본: {file}")
-        print(f"정규화: {normalized}")
+        print(f"정규화: {title} (시즌 {season}, 에피소드 {episode})")
         print("-" * 50)
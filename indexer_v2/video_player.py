@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import subprocess
 import sys
 from pathlib import Path
 import re
 
+import fts_schema
+import stats_summary
+import media_probe
+import db_access
+
 class VideoPlayer:
     def __init__(self, db_path="working_subtitles.db"):
         self.db_path = db_path
@@ -23,27 +27,44 @@ class VideoPlayer:
         except:
             return 0
     
+    def media_info(self, video_path):
+        """media_info 캐시 조회 (인덱서가 검사하지 않은 파일이면 None)"""
+        conn = db_access.connect(self.db_path, 'serve')
+        info = media_probe.lookup(conn.cursor(), video_path)
+        conn.close()
+        return info
+    
     def search_and_play(self, search_query, language=None):
         """검색어로 자막을 찾고 해당 시점에서 비디오 재생"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_access.connect(self.db_path, 'serve')
         cursor = conn.cursor()
+        table, target, filter_language = fts_schema.search_source(fts_schema.current_layout(cursor), language)
         
-        # FTS 검색
-        if language:
-            cursor.execute('''
+        # FTS 검색 (언어별 FTS 테이블이 있으면 해당 테이블만 검색)
+        if language and not filter_language:
+            cursor.execute(f'''
+                SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory
+                FROM {table} fts
+                JOIN subtitles s ON s.id = fts.rowid
+                WHERE {target} MATCH ?
+                ORDER BY rank
+                LIMIT 10
+            ''', (search_query,))
+        elif language:
+            cursor.execute(f'''
                 SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory
-                FROM subtitles_fts fts
+                FROM {table} fts
                 JOIN subtitles s ON s.id = fts.rowid
-                WHERE fts.text MATCH ? AND s.language = ?
+                WHERE {target} MATCH ? AND s.language = ?
                 ORDER BY rank
                 LIMIT 10
             ''', (search_query, language))
         else:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT s.media_file, s.start_time, s.end_time, s.text, s.directory
-                FROM subtitles_fts fts
+                FROM {table} fts
                 JOIN subtitles s ON s.id = fts.rowid
-                WHERE fts.text MATCH ?
+                WHERE {target} MATCH ?
                 ORDER BY rank
                 LIMIT 10
             ''', (search_query,))
@@ -93,8 +114,16 @@ class VideoPlayer:
         
         start_seconds = self.format_time_to_seconds(start_time)
         
+        # 인덱싱 때 저장한 미디어 정보 (ffprobe를 다시 실행하지 않음)
+        info = self.media_info(video_path)
+        if media_probe.cue_fits(info, start_seconds) is False:
+            print(f"❌ 시작 시점 {start_time}이 영상 길이({info['duration_seconds']:.1f}초)를 넘습니다: {video_path}")
+            return
+        
         print(f"🎬 재생 시작: {Path(video_path).name}")
         print(f"⏰ 시작 시점: {start_time} ({start_seconds:.1f}초)")
+        if info:
+            print(f"🎞️  {media_probe.describe(info)}")
         
         # VLC 플레이어로 재생 (설치되어 있는 경우)
         players = [
@@ -119,18 +148,12 @@ class VideoPlayer:
     
     def browse_by_directory(self):
         """디렉토리별로 미디어 탐색"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_access.connect(self.db_path, 'serve', query_only=None)
         cursor = conn.cursor()
         
-        # 디렉토리 목록
-        cursor.execute('''
-            SELECT directory, COUNT(*) as subtitle_count, COUNT(DISTINCT media_file) as file_count
-            FROM subtitles 
-            GROUP BY directory 
-            ORDER BY directory
-        ''')
-        
-        directories = cursor.fetchall()
+        # 디렉토리 목록 (요약 테이블)
+        stats_summary.ensure(conn)
+        directories = stats_summary.directory_counts(cursor, order_by='directory')
         
         print("📁 미디어 디렉토리:")
         print("-" * 60)
@@ -160,18 +183,11 @@ class VideoPlayer:
     
     def browse_files_in_directory(self, directory):
         """특정 디렉토리의 파일들 탐색"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_access.connect(self.db_path, 'serve', query_only=None)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT media_file, COUNT(*) as subtitle_count
-            FROM subtitles 
-            WHERE directory = ?
-            GROUP BY media_file 
-            ORDER BY media_file
-        ''', (directory,))
-        
-        files = cursor.fetchall()
+        stats_summary.ensure(conn)
+        files = stats_summary.media_counts(cursor, directory)
         
         print(f"\n📺 {Path(directory).name} 디렉토리의 파일들:")
         print("-" * 60)
@@ -1,23 +1,65 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import pysrt
 import re
 import os
+import sys
+import time
 from pathlib import Path
+from contextlib import contextmanager
 from datetime import datetime
 
+from theme_search import ThemeIndex
+from media_scanner import MediaScanner
+from fts_maintenance import FtsMaintenance
+import fts_schema
+import stats_summary
+import media_probe
+import near_duplicates
+import duplicate_subtitles
+import db_access
+from title_normalizer import parse_media_path
+import metrics
+import language_classifier
+from index_profiler import StageTimer, profiled
+
 print("=== 미디어 자막 인덱서 v2.0 ===")
 print("영어/한글 자막 지원, FTS 검색, 메타데이터 추가")
 
+# 자막 파일 처리 결과 (indexed / skipped / failed / removed / linked), /metrics로 노출
+INDEXED_FILES = metrics.counter('indexer_files', "처리한 자막 파일 수 (결과별)", ('result',))
+FILES_INDEXED, FILES_SKIPPED, FILES_FAILED, FILES_REMOVED, FILES_LINKED = (
+    INDEXED_FILES.labels(result=result) for result in ('indexed', 'skipped', 'failed', 'removed', 'linked'))
+INDEXED_CUES = metrics.counter('indexer_cues', "DB에 저장한 자막 수")
+
 class WorkingIndexer:
-    def __init__(self):
-        self.db_path = "working_subtitles_v2.db"
+    def __init__(self, db_path="working_subtitles_v2.db", fts_layout=None):
+        """fts_layout: 'standard' / 'compact' / 'minimal' (fts_schema 참고). None이면 기존 DB의 레이아웃 유지"""
+        self.db_path = db_path
+        self.fts_layout = fts_layout
         self.media_root = Path("/mnt/qnap/media_eng")
+        self.scanner = MediaScanner()
+        self.bulk_mode = False
+        # 같은 내용의 자막 파일은 파싱/저장 없이 원본에 연결 (duplicate_subtitles). 비교 벤치마크용으로 끌 수 있음
+        self.dedupe_files = True
+        # 단계별 시간 측정 (index_profiler), 선택적 프로파일러 ('cprofile' / 'pyinstrument')
+        self.timer = StageTimer()
+        self.profile = None
+        self.profile_output = None
+        # 검색 테스트 계측 (query_log.QueryLog)
+        self.query_log = None
         self.init_db()
+        self.fts = FtsMaintenance(self.db_path)
+        self.fts.configure()
+    
+    def connect(self, profile=None):
+        """DB 연결 (db_access 프로필). 기본은 쓰기용, 대량 적재 중이면 bulk-load"""
+        if profile is None:
+            profile = 'bulk-load' if self.bulk_mode else 'write'
+        return db_access.connect(self.db_path, profile)
     
     def init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect()
         cursor = conn.cursor()
         
         # subtitles 테이블 (v2에서 indexed_at 컬럼 추가)
@@ -37,7 +79,11 @@ class WorkingIndexer:
                     text TEXT,
                     language TEXT,
                     directory TEXT,
-                    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    title TEXT,
+                    season INTEGER,
+                    episode INTEGER,
+                    cluster_id INTEGER
                 )
             """)
             
@@ -60,33 +106,88 @@ class WorkingIndexer:
         fts_exists = cursor.fetchone() is not None
         
         if not fts_exists:
-            cursor.execute("""
-                CREATE VIRTUAL TABLE subtitles_fts USING fts5(
-                    text, 
-                    media_file, 
-                    language, 
-                    directory,
-                    content='subtitles', 
-                    content_rowid='id'
-                )
-            """)
-            
-            # 기존 데이터가 있으면 FTS에 복사
-            cursor.execute("SELECT COUNT(*) FROM subtitles")
-            if cursor.fetchone()[0] > 0:
-                cursor.execute("""
-                    INSERT INTO subtitles_fts(rowid, text, media_file, language, directory)
-                    SELECT id, text, media_file, language, directory FROM subtitles
-                """)
-                print("✅ FTS 인덱스 구성 완료")
-            
+            # 기존 데이터가 있으면 FTS에 복사 (rebuild)
+            fts_schema.create_fts_table(cursor, self.fts_layout or fts_schema.DEFAULT_LAYOUT)
+            print(f"✅ FTS 인덱스 구성 완료 ({self.fts_layout or fts_schema.DEFAULT_LAYOUT})")
+            conn.commit()
+        elif self.fts_layout and fts_schema.change_layout(cursor, self.fts_layout):
+            print(f"✅ FTS 레이아웃 변경: {self.fts_layout}")
+            conn.commit()
+        elif fts_schema.upgrade_partitions(cursor):
+            print("✅ 언어별 FTS 테이블을 언어별 콘텐츠 뷰로 재구성")
             conn.commit()
         
+        # FTS는 트리거로 동기화. 대량 적재 도중 종료됐으면 FTS 재구성 후 트리거 복구
+        cursor.execute("SELECT value FROM metadata WHERE key = ?", (fts_schema.BULK_LOAD_KEY,))
+        interrupted_bulk_load = cursor.fetchone() is not None
+        if interrupted_bulk_load or not fts_schema.triggers_installed(cursor):
+            if interrupted_bulk_load:
+                print("⚠️  중단된 대량 적재 감지 - FTS 인덱스 재구성")
+                fts_schema.rebuild(cursor)
+                cursor.execute("DELETE FROM metadata WHERE key = ?", (fts_schema.BULK_LOAD_KEY,))
+            fts_schema.create_triggers(cursor)
+            conn.commit()
+        
+        # 파일별 완료 기록 (자막 행과 같은 트랜잭션에서 기록 → 중단 후 --resume으로 이어서 인덱싱)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS index_checkpoint (
+                subtitle_file TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                cue_count INTEGER NOT NULL,
+                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # 파일 단위 교체/삭제용
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_subtitles_subtitle_file ON subtitles(subtitle_file)")
+        # 통계/탐색용 요약 테이블 (기존 DB면 처음 한 번 채움)
+        if stats_summary.create(cursor):
+            print("📊 통계 요약 테이블 생성")
+        # 작품 제목/시즌/에피소드 (미디어 경로에서 한 번 계산, 검색 필터/그룹용). 예전 DB면 컬럼 추가 후 채움
+        cursor.execute("PRAGMA table_info(subtitles)")
+        if 'title' not in {row[1] for row in cursor.fetchall()}:
+            for column in ('title TEXT', 'season INTEGER', 'episode INTEGER'):
+                cursor.execute(f"ALTER TABLE subtitles ADD COLUMN {column}")
+            print(f"🏷️  작품 제목 정리: 미디어 {self.backfill_titles(cursor):,}개")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_subtitles_title
+            ON subtitles(title COLLATE NOCASE, season, episode)
+        """)
+        # 유사 중복 자막 묶음 (near_duplicates, 검색 collapse용). 예전 DB면 컬럼 추가 후 채움
+        if near_duplicates.create(cursor):
+            print(f"🧬 중복 자막 묶음: 자막 {self.backfill_clusters(cursor):,}개")
+        # 미디어 길이/코덱 캐시 (재생/클립용, media_probe)
+        media_probe.create(cursor)
+        # 같은 내용 자막 파일 기록 (duplicate_subtitles). 예전 DB의 파일은 다음 인덱싱 때 등록
+        duplicate_subtitles.create(cursor)
+        conn.commit()
+        
         conn.close()
     
+    def backfill_titles(self, cursor):
+        """
+        기존 행의 title/season/episode 채우기 (미디어 파일 단위 UPDATE). 처리한 미디어 수 반환
+        FTS 컬럼은 바뀌지 않으므로 UPDATE 트리거를 잠시 내려서 FTS 재색인을 피함
+        """
+        cursor.execute("SELECT DISTINCT media_file FROM subtitles")
+        media_files = [row[0] for row in cursor.fetchall()]
+        fts_schema.drop_triggers(cursor)
+        cursor.executemany(
+            "UPDATE subtitles SET title = ?, season = ?, episode = ? WHERE media_file = ?",
+            ((*parse_media_path(media_file), media_file) for media_file in media_files))
+        fts_schema.create_triggers(cursor)
+        return len(media_files)
+    
+    def backfill_clusters(self, cursor):
+        """기존 행의 cluster_id 채우기 (backfill_titles처럼 UPDATE 트리거를 내린 상태로). 채운 행 수 반환"""
+        fts_schema.drop_triggers(cursor)
+        filled = near_duplicates.backfill(cursor)
+        fts_schema.create_triggers(cursor)
+        return filled
+    
     def update_metadata(self, key, value):
         """메타데이터 업데이트"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -100,7 +201,7 @@ class WorkingIndexer:
     def get_metadata(self, key):
         """메타데이터 조회"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connect()
             cursor = conn.cursor()
             
             cursor.execute("SELECT value, updated_at FROM metadata WHERE key = ?", (key,))
@@ -124,14 +225,9 @@ class WorkingIndexer:
         except:
             return 0
 
-    def detect_language(self, text, filename):
-        if "_ko" in filename.lower():
-            return "ko"
-        
-        korean_chars = sum(1 for c in text if '\uac00' <= c <= '\ud7af')
-        if korean_chars > 0:
-            return "ko"
-        return "en"
+    def detect_language(self, texts, filename):
+        """자막 목록의 언어 목록 (파일 단위 판정, 이중 자막 파일만 자막별로, language_classifier 참고)"""
+        return language_classifier.cue_languages(texts, filename)
     
     def clean_text(self, text, language):
         text = re.sub(r'<[^>]+>', '', text)
@@ -161,188 +257,436 @@ class WorkingIndexer:
         print(f"📁 처리 중: {srt_path.name}")
         
         try:
+            start = time.perf_counter()
+            size = srt_path.stat().st_size
             subs = pysrt.open(str(srt_path), encoding='utf-8')
+            times = [(str(sub.start), str(sub.end)) for sub in subs]
             subtitles = []
             
-            for sub in subs:
-                language = self.detect_language(sub.text, srt_path.name)
+            t0 = time.perf_counter()
+            languages = self.detect_language([sub.text for sub in subs], srt_path.name)
+            t1 = time.perf_counter()
+            detect_time = t1 - t0
+            
+            for sub, (start_time, end_time), language in zip(subs, times, languages):
                 cleaned = self.clean_text(sub.text, language)
-                
                 if self.is_dialogue(cleaned):
                     subtitles.append({
-                        'start_time': str(sub.start),
-                        'end_time': str(sub.end),
+                        'start_time': start_time,
+                        'end_time': end_time,
                         'text': cleaned,
                         'language': language
                     })
             
+            clean_time = time.perf_counter() - t1
+            # parse = 파일 읽기 + pysrt 파싱 + 시간 문자열 변환 (언어 감지/정리 시간 제외)
+            parse_time = t0 - start
+            self.timer.add('parse', parse_time, files=1, cues=len(subs), bytes=size)
+            self.timer.add('detect', detect_time, cues=len(subs))
+            self.timer.add('clean', clean_time, cues=len(subs))
+            
             print(f"   추출된 자막: {len(subtitles)}개")
             return subtitles
             
         except Exception as e:
+            # 빈 목록과 구분 (오류 난 파일은 완료로 기록하지 않음)
             print(f"   ❌ 오류: {e}")
-            return []
+            return None
     
-    def save_subtitles(self, media_file, srt_file, subtitles, directory):
-        if not subtitles:
-            return
-        
-        conn = sqlite3.connect(self.db_path)
+    def delete_subtitle_rows(self, cursor, srt_file, content_hash=None):
+        """
+        자막 파일 한 개의 기존 행 삭제 (FTS는 삭제 트리거가 같이 제거). 삭제된 행 수 반환
+        통계 요약도 같은 트랜잭션에서 해당 미디어 행만 갱신 (대량 적재 중에는 끝날 때 한 번에 재계산)
+        content_hash: 새 내용 해시 (삭제면 None). 내용이 바뀐 원본에 사본이 있으면 행은 사본으로 옮겨짐
+        """
+        cursor.execute("SELECT DISTINCT media_file FROM subtitles WHERE subtitle_file = ?", (str(srt_file),))
+        media_files = [row[0] for row in cursor.fetchall()]
+        heir_media = duplicate_subtitles.detach(cursor, srt_file, content_hash)
+        if heir_media:
+            media_files.append(heir_media)
+        cursor.execute("DELETE FROM subtitles WHERE subtitle_file = ?", (str(srt_file),))
+        removed = cursor.rowcount
+        cursor.execute("DELETE FROM index_checkpoint WHERE subtitle_file = ?", (str(srt_file),))
+        if not self.bulk_mode:
+            for media_file in media_files:
+                stats_summary.refresh_media(cursor, media_file)
+        return removed
+    
+    def probe_media(self, media_files):
+        """새로 생기거나 바뀐 미디어만 ffprobe로 검사해서 media_info에 저장. 검사한 파일 수 반환"""
+        conn = self.connect()
+        with conn:
+            probed, _ = media_probe.probe_missing(conn, list(media_files))
+        conn.close()
+        if probed:
+            print(f"   🎞️  미디어 정보 검사: {probed}개")
+        return probed
+    
+    def file_signature(self, path):
+        """체크포인트 비교용 (크기, mtime_ns)"""
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+    
+    def load_checkpoints(self):
+        """완료된 자막 파일 → (크기, mtime_ns)"""
+        conn = self.connect()
+        checkpoints = {row[0]: (row[1], row[2])
+                       for row in conn.execute("SELECT subtitle_file, size, mtime_ns FROM index_checkpoint")}
+        conn.close()
+        return checkpoints
+    
+    def save_subtitles(self, media_file, srt_file, subtitles, directory, signature=None, content_hash=None):
+        """
+        자막 저장 (멱등): 같은 자막 파일의 기존 행을 교체하고 체크포인트를 같은 트랜잭션에서 기록
+        signature: 파싱 전에 읽은 (크기, mtime_ns). 없으면 지금 읽음
+        content_hash: 파싱 전에 계산한 내용 해시. 없으면 지금 계산 (같은 내용 사본 연결용 원본으로 등록)
+        """
+        if signature is None:
+            signature = self.file_signature(srt_file)
+        if content_hash is None:
+            content_hash = duplicate_subtitles.file_hash(srt_file)
+        
+        start = time.perf_counter()
+        conn = self.connect()
         cursor = conn.cursor()
         
-        for sub in subtitles:
+        self.delete_subtitle_rows(cursor, srt_file, content_hash)
+        title, season, episode = parse_media_path(str(media_file))
+        cluster_start = time.perf_counter()
+        cluster_ids = near_duplicates.assign_clusters(cursor, [sub['text'] for sub in subtitles])
+        cluster_time = time.perf_counter() - cluster_start
+        
+        for sub, cluster_id in zip(subtitles, cluster_ids):
             start_ms = self.convert_time_to_ms(sub['start_time'])
             end_ms = self.convert_time_to_ms(sub['end_time'])
             
             cursor.execute("""
                 INSERT INTO subtitles 
-                (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms, text, language, directory)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                (media_file, subtitle_file, start_time, end_time, start_time_ms, end_time_ms, text, language, directory,
+                 title, season, episode, cluster_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 str(media_file), str(srt_file),
                 sub['start_time'], sub['end_time'],
                 start_ms, end_ms,
-                sub['text'], sub['language'], str(directory)
+                sub['text'], sub['language'], str(directory),
+                title, season, episode, cluster_id
             ))
-            
-            # FTS에도 추가
-            subtitle_id = cursor.lastrowid
-            cursor.execute("""
-                INSERT INTO subtitles_fts (rowid, text, media_file, language, directory)
-                VALUES (?, ?, ?, ?, ?)
-            """, (subtitle_id, sub['text'], str(media_file), sub['language'], str(directory)))
+        
+        cursor.execute("""
+            INSERT OR REPLACE INTO index_checkpoint (subtitle_file, size, mtime_ns, cue_count, completed_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (str(srt_file), signature[0], signature[1], len(subtitles)))
+        duplicate_subtitles.register(cursor, srt_file, media_file, directory, content_hash, len(subtitles))
+        
+        if not self.bulk_mode:
+            stats_summary.refresh_media(cursor, media_file)
         
         conn.commit()
         conn.close()
+        self.timer.add('cluster', cluster_time, cues=len(subtitles))
+        self.timer.add('insert', time.perf_counter() - start - cluster_time, files=1, cues=len(subtitles),
+                       bytes=sum(len(sub['text'].encode('utf-8')) for sub in subtitles))
+        
+        if not subtitles:
+            return
         
         ko_count = sum(1 for s in subtitles if s['language'] == 'ko')
         en_count = sum(1 for s in subtitles if s['language'] == 'en')
         
         print(f"   💾 저장 완료: 한국어 {ko_count}개, 영어 {en_count}개")
     
-    def find_subtitles(self, media_file):
-        media_stem = media_file.stem
-        media_dir = media_file.parent
-        subtitles = []
-        
-        # 영어 자막
-        en_srt = media_dir / f"{media_stem}.srt"
-        if en_srt.exists():
-            subtitles.append(en_srt)
-        
-        # 한글 자막
-        ko_srt = media_dir / f"{media_stem}_ko.srt"
-        if ko_srt.exists():
-            subtitles.append(ko_srt)
+    def link_duplicate(self, media_file, srt_file, directory, signature, content_hash):
+        """
+        같은 내용의 원본 자막 파일이 이미 인덱싱돼 있으면 파싱/저장 없이 사본으로 연결
+        (자기 행이 있었으면 삭제, 체크포인트는 원본의 자막 수로 기록). 연결했으면 원본의 자막 수, 아니면 None
+        """
+        if not self.dedupe_files:
+            return None
+        conn = self.connect()
+        cursor = conn.cursor()
+        record = duplicate_subtitles.lookup(cursor, srt_file)
+        if record and record['content_hash'] == content_hash and record['canonical_file'] == str(srt_file):
+            # 내용이 그대로인 원본: 기존처럼 다시 파싱해서 행 교체
+            conn.close()
+            return None
+        canonical = duplicate_subtitles.find_canonical(cursor, content_hash, exclude=srt_file)
+        if canonical is None:
+            conn.close()
+            return None
         
-        return subtitles
+        with conn:
+            self.delete_subtitle_rows(cursor, srt_file, content_hash)
+            cursor.execute("""
+                INSERT OR REPLACE INTO index_checkpoint (subtitle_file, size, mtime_ns, cue_count, completed_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (str(srt_file), signature[0], signature[1], canonical['cue_count']))
+            duplicate_subtitles.register(cursor, srt_file, media_file, directory, content_hash,
+                                         canonical['cue_count'], canonical_file=canonical['subtitle_file'])
+        conn.close()
+        print(f"   🔗 같은 내용: {Path(canonical['subtitle_file']).name} ({canonical['cue_count']}개 자막 공유)")
+        return canonical['cue_count']
     
     def find_test_directory(self):
-        """테스트용 디렉토리 자동 검색"""
+        """테스트용 디렉토리 자동 검색 (트리를 한 번만 스캔하고 메모리에서 패턴 매칭)"""
+        # fnmatch의 *는 경로 구분자(/)도 포함
         test_patterns = [
-            "**/Batman*/**/Season*",
-            "**/Batman*",
-            "**/Ani/**/Season*"
+            "*Batman*/*Season*",
+            "*Batman*",
+            "Ani/*Season*"
         ]
         
-        for pattern in test_patterns:
-            matches = list(self.media_root.glob(pattern))
-            if matches:
-                # 가장 적당한 크기의 디렉토리 선택
-                for match in matches:
-                    if match.is_dir():
-                        media_files = list(match.glob("*.mp4")) + list(match.glob("*.mkv"))
-                        if 1 <= len(media_files) <= 30:  # 1-30개 파일이 있는 디렉토리
-                            return match
+        # 1-30개 파일이 있는 디렉토리
+        matches = self.scanner.find_directories(self.media_root, test_patterns, 1, 30)
+        if matches:
+            return matches[0]
         
         # 패턴이 없으면 첫 번째 발견되는 적당한 디렉토리
-        for category in self.media_root.iterdir():
-            if category.is_dir() and not category.name.startswith('.'):
-                for subdir in category.rglob("*"):
-                    if subdir.is_dir():
-                        media_files = list(subdir.glob("*.mp4")) + list(subdir.glob("*.mkv"))
-                        if 1 <= len(media_files) <= 10:
-                            return subdir
-        
-        return None
+        matches = self.scanner.find_directories(self.media_root, ["*/*"], 1, 10)
+        return matches[0] if matches else None
+    
+    def index_directory(self, directory_path, resume=False):
+        """
+        디렉토리 인덱싱. resume=True면 체크포인트와 크기/mtime이 같은 자막 파일은 건너뜀
+        self.profile이 설정되어 있으면 프로파일러로 감싸서 실행
+        """
+        with profiled(self.profile, self.profile_output, label=Path(directory_path).name):
+            self.index_directory_files(directory_path, resume)
     
-    def index_directory(self, directory_path):
+    def index_directory_files(self, directory_path, resume=False):
         directory = Path(directory_path)
         print(f"\n🎬 디렉토리 스캔: {directory.name}")
         
-        media_extensions = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
-        media_files = []
+        with self.timer.stage('scan') as counts:
+            pairs = self.scanner.find_media_and_subtitles(directory)
+            counts['files'] = sum(len(pair['subtitle_files']) for pair in pairs)
+        with self.timer.stage('probe') as counts:
+            counts['files'] = self.probe_media(pair['media_file'] for pair in pairs)
+        with self.timer.stage('checkpoint'):
+            checkpoints = self.load_checkpoints() if resume else {}
         
-        for file_path in directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in media_extensions:
-                media_files.append(file_path)
-        
-        print(f"   미디어 파일: {len(media_files)}개 발견")
+        print(f"   자막이 있는 미디어 파일: {len(pairs)}개 발견")
         
         processed = 0
-        for media_file in media_files:  # 전체 파일 처리
-            subtitle_files = self.find_subtitles(media_file)
+        skipped = 0
+        linked = 0
+        linked_cues = 0
+        added_rows = 0
+        for pair in pairs:  # 전체 파일 처리
+            media_file = pair['media_file']
+            subtitle_files = pair['subtitle_files']
             
             if subtitle_files:
                 print(f"\n🎥 {media_file.name}")
                 
                 for srt_file in subtitle_files:
+                    with self.timer.stage('checkpoint', files=1):
+                        try:
+                            signature = self.file_signature(srt_file)
+                        except OSError as e:
+                            print(f"   ❌ {srt_file.name}: {e}")
+                            FILES_FAILED.inc()
+                            continue
+                    
+                    if checkpoints.get(str(srt_file)) == signature:
+                        skipped += 1
+                        FILES_SKIPPED.inc()
+                        continue
+                    
+                    with self.timer.stage('dedup', files=1):
+                        content_hash = duplicate_subtitles.file_hash(srt_file)
+                        shared = self.link_duplicate(media_file, srt_file, directory, signature, content_hash)
+                    if shared is not None:
+                        linked += 1
+                        linked_cues += shared
+                        FILES_LINKED.inc()
+                        continue
+                    
                     subtitles = self.process_srt(srt_file)
-                    if subtitles:
-                        self.save_subtitles(media_file, srt_file, subtitles, directory)
+                    if subtitles is None:
+                        FILES_FAILED.inc()
+                    else:
+                        self.save_subtitles(media_file, srt_file, subtitles, directory, signature, content_hash)
                         processed += 1
+                        added_rows += len(subtitles)
+                        FILES_INDEXED.inc()
+                        INDEXED_CUES.inc(len(subtitles))
         
         print(f"\n✅ 처리 완료: {processed}개 파일")
+        if skipped:
+            print(f"   ⏭️  완료 기록이 있어 건너뜀: {skipped}개 파일")
+        if linked:
+            print(f"   🔗 같은 내용 자막 파일 연결: {linked}개 (자막 {linked_cues:,}개 파싱/저장 생략)")
+        
+        if not self.bulk_mode:
+            with self.timer.stage('maintenance'):
+                # 배치 크기에 따라 FTS 세그먼트 병합 (대량이면 optimize)
+                if self.fts.after_batch(added_rows) == 'optimize':
+                    print(f"   🧹 FTS optimize 완료 (자막 {added_rows:,}개 추가)")
+                
+                # 새로 추가된 자막에 대해 테마 히트 갱신 (대량 적재 중에는 FTS가 비어 있으므로 적재 후 한 번에)
+                self.update_theme_hits()
         
         # 인덱싱 완료 시간 기록
         self.update_metadata("last_indexing", datetime.now().isoformat())
     
+    @contextmanager
+    def bulk_load(self):
+        """
+        대량 적재 모드: FTS 트리거를 내리고 subtitles에만 쓴 뒤, 끝나면 'rebuild' 한 번으로 FTS 재구성
+        (적재 중에는 FTS 검색 결과가 최신이 아니므로 섀도 DB 재구축 등 검색하지 않는 DB에 사용)
+        """
+        conn = self.connect('maintenance')
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO metadata (key, value, updated_at) VALUES (?, '1', CURRENT_TIMESTAMP)",
+                         (fts_schema.BULK_LOAD_KEY,))
+            fts_schema.drop_triggers(conn.cursor())
+        conn.close()
+        
+        self.bulk_mode = True
+        try:
+            yield self
+        finally:
+            self.bulk_mode = False
+            print("\n🔧 FTS 인덱스 재구성 (rebuild)...")
+            with self.timer.stage('rebuild'):
+                conn = self.connect('maintenance')
+                with conn:
+                    cursor = conn.cursor()
+                    fts_schema.rebuild(cursor)
+                    fts_schema.create_triggers(cursor)
+                    stats_summary.rebuild(cursor)
+                    cursor.execute("DELETE FROM metadata WHERE key = ?", (fts_schema.BULK_LOAD_KEY,))
+                conn.close()
+                self.update_theme_hits()
+    
+    def category_directory(self, path):
+        """파일이 속한 카테고리 디렉토리 (media_root 바로 아래). media_root 밖이면 부모 디렉토리"""
+        path = Path(path)
+        try:
+            relative = path.relative_to(self.media_root)
+        except ValueError:
+            return path.parent
+        return self.media_root / relative.parts[0] if len(relative.parts) > 1 else path.parent
+    
+    def index_subtitle_file(self, srt_path, directory=None):
+        """
+        자막 파일 한 개 증분 인덱싱 (감시 모드용)
+        - 짝이 되는 미디어가 있으면 기존 행을 교체, 자막이나 미디어가 없어졌으면 기존 행 삭제
+        - 처리 후 결과: 'indexed' / 'removed' / 'skipped'
+        """
+        srt_path = Path(srt_path)
+        media_file = self.scanner.find_media_for_subtitle(srt_path) if srt_path.exists() else None
+        
+        if media_file is None:
+            if self.remove_subtitle_file(srt_path):
+                FILES_REMOVED.inc()
+                return 'removed'
+            return 'skipped'
+        
+        self.probe_media([media_file])
+        directory = directory or self.category_directory(srt_path)
+        signature = self.file_signature(srt_path)
+        content_hash = duplicate_subtitles.file_hash(srt_path)
+        if self.link_duplicate(media_file, srt_path, directory, signature, content_hash) is not None:
+            FILES_LINKED.inc()
+            return 'indexed'
+        subtitles = self.process_srt(srt_path)
+        if subtitles is None:
+            FILES_FAILED.inc()
+            return 'skipped'
+        self.save_subtitles(media_file, srt_path, subtitles, directory, signature, content_hash)
+        FILES_INDEXED.inc()
+        INDEXED_CUES.inc(len(subtitles))
+        return 'indexed'
+    
+    def remove_subtitle_file(self, srt_path):
+        """자막 파일 한 개의 행 삭제. 삭제된 행 수 반환 (행이 없는 사본이면 연결만 지우고 True)"""
+        conn = self.connect()
+        with conn:
+            cursor = conn.cursor()
+            record = duplicate_subtitles.lookup(cursor, srt_path)
+            removed = self.delete_subtitle_rows(cursor, srt_path)
+        conn.close()
+        
+        if removed:
+            print(f"🗑️  삭제됨: {Path(srt_path).name} ({removed}개 자막)")
+        elif record:
+            # 사본 연결 해제, 또는 행을 사본에 넘긴 원본
+            print(f"🔗 연결 해제: {Path(srt_path).name}")
+            return True
+        return removed
+    
+    def indexed_subtitle_files(self):
+        """DB에 들어 있는 자막 파일 경로 집합 (행 없이 연결된 같은 내용 사본 포함)"""
+        conn = self.connect('serve')
+        files = {row[0] for row in conn.execute("SELECT DISTINCT subtitle_file FROM subtitles")}
+        files |= duplicate_subtitles.linked_files(conn.cursor())
+        conn.close()
+        return files
+    
+    def update_theme_hits(self):
+        """테마 히트 증분 갱신 (theme_search.ThemeIndex)"""
+        added = ThemeIndex(self.db_path).update_hits()
+        total = sum(added.values())
+        if total:
+            print(f"   🏷️  테마 히트 추가: {total:,}개 ({', '.join(f'{k} +{v}' for k, v in added.items() if v)})")
+    
     def search(self, query, language=None, use_fts=True):
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect('serve')
         cursor = conn.cursor()
         
         start_time = datetime.now()
         
         if use_fts:
             # FTS 검색 사용
+            target = fts_schema.match_column(fts_schema.current_layout(cursor), 'f')
             if language:
-                cursor.execute("""
+                sql = f"""
                     SELECT s.media_file, s.start_time, s.end_time, s.text, s.language
                     FROM subtitles_fts f
                     JOIN subtitles s ON f.rowid = s.id
-                    WHERE f.text MATCH ? AND s.language = ?
+                    WHERE {target} MATCH ? AND s.language = ?
                     ORDER BY s.media_file, s.start_time
                     LIMIT 10
-                """, (query, language))
+                """
+                params = (query, language)
             else:
-                cursor.execute("""
+                sql = f"""
                     SELECT s.media_file, s.start_time, s.end_time, s.text, s.language
                     FROM subtitles_fts f
                     JOIN subtitles s ON f.rowid = s.id
-                    WHERE f.text MATCH ?
+                    WHERE {target} MATCH ?
                     ORDER BY s.language, s.media_file, s.start_time
                     LIMIT 10
-                """, (query,))
+                """
+                params = (query,)
         else:
             # LIKE 검색 사용
             if language:
-                cursor.execute("""
+                sql = """
                     SELECT media_file, start_time, end_time, text, language
                     FROM subtitles 
                     WHERE text LIKE ? AND language = ?
                     ORDER BY media_file, start_time
                     LIMIT 10
-                """, (f"%{query}%", language))
+                """
+                params = (f"%{query}%", language)
             else:
-                cursor.execute("""
+                sql = """
                     SELECT media_file, start_time, end_time, text, language
                     FROM subtitles 
                     WHERE text LIKE ?
                     ORDER BY language, media_file, start_time
                     LIMIT 10
-                """, (f"%{query}%",))
+                """
+                params = (f"%{query}%",)
         
-        results = cursor.fetchall()
+        if self.query_log:
+            results = self.query_log.execute(conn, sql, params, source='indexer', query=query, language=language,
+                                             shape=None if use_fts else f"LIKE [{language}]" if language else "LIKE")
+        else:
+            results = cursor.execute(sql, params).fetchall()
         search_time = (datetime.now() - start_time).total_seconds() * 1000
         conn.close()
         
@@ -370,7 +714,7 @@ class WorkingIndexer:
     
     def get_table_info(self):
         """테이블 정보 조회"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect('serve')
         cursor = conn.cursor()
         
         # 테이블 목록
@@ -388,21 +732,13 @@ class WorkingIndexer:
         return table_info
     
     def stats(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect('serve')
         cursor = conn.cursor()
         
-        # 기본 통계
-        cursor.execute("SELECT COUNT(*) FROM subtitles")
-        total = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT language, COUNT(*) FROM subtitles GROUP BY language")
-        lang_stats = cursor.fetchall()
-        
-        cursor.execute("SELECT COUNT(DISTINCT media_file) FROM subtitles")
-        media_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(DISTINCT directory) FROM subtitles")
-        dir_count = cursor.fetchone()[0]
+        # 기본 통계 (자막 행 대신 요약 테이블에서)
+        total, media_count, dir_count = stats_summary.totals(cursor)
+        lang_stats = stats_summary.language_counts(cursor)
+        linked_count, linked_cues = duplicate_subtitles.savings(cursor)
         
         conn.close()
         
@@ -436,6 +772,12 @@ class WorkingIndexer:
             percentage = (count / total * 100) if total > 0 else 0
             print(f"   {lang_name}: {count:,}개 ({percentage:.1f}%)")
         
+        if linked_count:
+            # 저장하지 않은 자막의 DB 크기는 현재 자막당 평균 크기로 추정
+            saved_mb = db_size * linked_cues / total if total else 0
+            print(f"   🔗 같은 내용 자막 파일: {linked_count:,}개 연결 "
+                  f"(자막 {linked_cues:,}개, 약 {saved_mb:.2f} MB 저장 생략)")
+        
         print(f"\n🗄️  테이블 구조:")
         for table_name, columns in table_info.items():
             print(f"   📋 {table_name}:")
@@ -443,7 +785,7 @@ class WorkingIndexer:
                 print(f"      - {col_name} ({col_type})")
         
         # FTS 테이블 존재 여부
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect('serve')
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='subtitles_fts'")
         fts_exists = cursor.fetchone() is not None
@@ -451,14 +793,30 @@ class WorkingIndexer:
         
         print(f"\n🔍 검색 엔진:")
         if fts_exists:
+            fts_stats = self.fts.segment_stats()
             print(f"   ✅ FTS5 가상 테이블 활성화")
+            print(f"   🧩 세그먼트: {fts_stats['segments']}개, 인덱스 크기: {fts_stats['index_bytes'] / (1024 * 1024):.2f} MB")
         else:
             print(f"   ❌ FTS5 테이블 없음 (LIKE 검색만 가능)")
     
-    def index_all_directories(self):
-        """전체 미디어 디렉토리 인덱싱"""
-        print(f"\n🚀 전체 인덱싱 시작: {self.media_root}")
+    def index_all_directories(self, resume=False, bulk=False):
+        """
+        전체 미디어 디렉토리 인덱싱
+        - resume=True: 이전 실행에서 완료된 파일은 건너뜀
+        - bulk=True: FTS 트리거 없이 적재 후 한 번에 rebuild (검색 중이 아닌 DB용)
+        """
+        if bulk and not self.bulk_mode:
+            self.timer.reset()
+            with self.bulk_load():
+                self.index_all_directories(resume=resume)
+            # 단계별 시간은 FTS 재구성까지 포함해서 출력
+            self.timer.print_report()
+            return
+        
+        print(f"\n🚀 전체 인덱싱 {'재개' if resume else '시작'}: {self.media_root}")
         start_time = datetime.now()
+        if not self.bulk_mode:
+            self.timer.reset()
         
         total_processed = 0
         total_dirs = 0
@@ -474,10 +832,10 @@ class WorkingIndexer:
                 print(f"{'='*60}")
                 
                 try:
-                    self.index_directory(category_dir)
+                    self.index_directory(category_dir, resume=resume)
                     
                     # 현재까지의 통계 출력
-                    conn = sqlite3.connect(self.db_path)
+                    conn = self.connect('serve')
                     cursor = conn.cursor()
                     cursor.execute("SELECT COUNT(*) FROM subtitles")
                     current_total = cursor.fetchone()[0]
@@ -488,12 +846,18 @@ class WorkingIndexer:
                 except Exception as e:
                     print(f"❌ {category_dir.name} 처리 실패: {e}")
         
+        # 전체 인덱싱 후 세그먼트를 하나로 병합
+        with self.timer.stage('maintenance'):
+            self.fts.optimize()
+        
         end_time = datetime.now()
         duration = end_time - start_time
         
         print(f"\n🎉 전체 인덱싱 완료!")
         print(f"   처리된 카테고리: {total_dirs}개")
         print(f"   소요 시간: {duration}")
+        if not self.bulk_mode:
+            self.timer.print_report()
         
         # 인덱싱 완료 정보 저장
         self.update_metadata("last_full_indexing", end_time.isoformat())
@@ -503,7 +867,35 @@ class WorkingIndexer:
 
 # 테스트 실행
 if __name__ == "__main__":
-    indexer = WorkingIndexer()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="미디어 자막 인덱서 v2.0")
+    parser.add_argument('--db', default="working_subtitles_v2.db")
+    parser.add_argument('--fts-layout', choices=sorted(fts_schema.FTS_LAYOUTS),
+                        help='FTS 레이아웃 (기본: 기존 DB 유지, 새 DB는 standard)')
+    parser.add_argument('--resume', action='store_true',
+                        help='중단된 전체 인덱싱 이어서 실행 (완료된 파일 건너뜀, 확인 질문 없음)')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help='디렉토리 인덱싱을 프로파일러로 감싸서 실행 (pyinstrument 미설치면 cProfile)')
+    parser.add_argument('--query-log', help='검색 테스트 쿼리를 기록할 쿼리 로그 DB 경로')
+    parser.add_argument('--metrics-port', type=int,
+                        help='이 포트에서 /metrics (Prometheus 형식) 제공, 감시 모드 등 장시간 실행용')
+    parser.add_argument('--profile-output',
+                        help='프로파일 결과 파일 (디렉토리 이름이 붙음, 예: index.prof → index_Drama.prof)')
+    args = parser.parse_args()
+    
+    indexer = WorkingIndexer(args.db, fts_layout=args.fts_layout)
+    indexer.profile = args.profile
+    indexer.profile_output = args.profile_output
+    if args.query_log:
+        from query_log import QueryLog
+        indexer.query_log = QueryLog(args.query_log)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    
+    if args.resume:
+        indexer.index_all_directories(resume=True)
+        sys.exit(0)
     
     print("\n🎯 인덱싱 옵션을 선택하세요:")
     print("1. 전체 인덱싱 (모든 미디어 디렉토리)")
@@ -511,8 +903,9 @@ if __name__ == "__main__":
     print("3. 사용자 지정 디렉토리")
     print("4. 현재 DB 통계만 보기")
     print("5. 검색 테스트 (FTS vs LIKE 비교)")
+    print("6. 감시 모드 (새 자막 자동 인덱싱)")
     
-    choice = input("\n선택 (1-5): ").strip()
+    choice = input("\n선택 (1-6): ").strip()
     
     if choice == "1":
         print("\n⚠️  전체 인덱싱을 시작합니다. 시간이 오래 걸릴 수 있습니다.")
@@ -529,6 +922,7 @@ if __name__ == "__main__":
             confirm = input("이 디렉토리로 테스트하시겠습니까? (y/N): ").strip().lower()
             if confirm == 'y':
                 indexer.index_directory(test_dir)
+                indexer.timer.print_report()
                 indexer.stats()
                 
                 # 샘플 검색 테스트
@@ -546,6 +940,7 @@ if __name__ == "__main__":
         custom_path = input("인덱싱할 디렉토리 경로를 입력하세요: ").strip()
         if Path(custom_path).exists():
             indexer.index_directory(custom_path)
+            indexer.timer.print_report()
             indexer.stats()
         else:
             print("❌ 디렉토리를 찾을 수 없습니다")
@@ -565,6 +960,10 @@ if __name__ == "__main__":
                 print("\n--- LIKE 검색 ---")
                 indexer.search(query, use_fts=False)
     
+    elif choice == "6":
+        from index_watcher import IndexWatcher
+        IndexWatcher(indexer).run()
+    
     else:
         print("❌ 잘못된 선택입니다.")
 